@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Mide el rendimiento de las rutas críticas de subtítulos y mux sin red ni
+programas reales: traducción (translate_subs), conversión y validación de
+codificación (convert_srt_to_utf8, is_utf8), detección de idioma,
+process_existing_videos, el parser de progreso de yt-dlp y el reparto del
+traductor entre dos endpoints cuando uno falla o va lento (endpoint_failover).
+
+Genera corpus SRT sintéticos (español e inglés, en UTF-8, Latin-1, CP1252 y
+UTF-16), levanta un servidor de traducción local con latencia y tasa de error
+configurables y pone en el PATH versiones falsas de yt-dlp, ffmpeg y mkvmerge.
+
+Uso:
+    python3 benchmarks/bench_hotpaths.py [--sizes 1000,20000,200000] [--runs 3]
+        [--latency-ms 0] [--error-rate 0] [--only translate_subs,is_utf8]
+        [--output resultados.json] [--compare base.json]
+
+Imprime (o guarda con --output) un JSON con la mediana de cada caso, su
+rendimiento y el pico de memoria; con --compare muestra la variación respecto
+a un JSON anterior, por ejemplo el de otro commit.
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+SCRIPT = Path(__file__).resolve().parent.parent / "yt-downloader.py"
+ENCODINGS = ["utf-8", "latin-1", "cp1252", "utf-16"]
+LANGUAGES = ["es", "en"]
+BENCHMARKS = ["translate_subs", "convert_srt_to_utf8", "is_utf8", "detect_language",
+              "process_existing_videos", "progress_parser", "endpoint_failover"]
+
+# Frases base; las de CP1252 añaden comillas tipográficas que no existen en Latin-1
+PHRASES = {
+    "es": ["¿Dónde está la estación?", "¡Qué día más bonito!", "El niño comió muchísimo.",
+           "Mañana iremos a la montaña con Begoña.", "No sé qué decirte, corazón.",
+           "La canción sonó en el salón.", "Él llegó tarde otra vez.", "Pásame el azúcar, por favor."],
+    "en": ["Where is the station?", "What a beautiful day!", "The kid ate a lot.",
+           "Tomorrow we are going to the mountains.", "I don't know what to tell you.",
+           "The song played in the hall.", "He was late again.", "Pass me the sugar, please."],
+}
+CP1252_EXTRAS = ["“Vale”, dijo él — sin más.", "It’s “fine” — really."]
+
+# Programas falsos: mismas opciones que usa yt-downloader.py y una salida parecida a la real
+FAKE_YT_DLP = r'''
+import json, sys, time
+args = sys.argv[1:]
+if "--version" in args:
+    print("2024.08.06"); sys.exit(0)
+template = args[args.index("--progress-template") + 1].split(":", 1)[1] if "--progress-template" in args else None
+done = args[args.index("--print") + 1].split(":", 1)[1] if "--print" in args else None
+videos = int(__import__("os").environ.get("FAKE_YT_DLP_VIDEOS", "3"))
+for n in range(1, videos + 1):
+    video_id, title, total = f"vid{n:08d}", f"Video de prueba {n}", 52_428_800
+    print(f"[youtube] Extracting URL: https://www.youtube.com/watch?v={video_id}")
+    print(f"[info] {video_id}: Downloading 1 format(s): 303+251")
+    for step in range(0, 101):
+        done_bytes = total * step // 100
+        progress = {"status": "finished" if step == 100 else "downloading", "downloaded_bytes": done_bytes,
+                    "total_bytes": total, "speed": 10_485_760.0, "eta": (total - done_bytes) // 10_485_760,
+                    "elapsed": step / 20, "filename": f"tmp/{title} [{video_id}].f303.webm"}
+        if template:
+            print(template.replace("%(info.id)j", json.dumps(video_id))
+                          .replace("%(info.title)j", json.dumps(title))
+                          .replace("%(progress)j", json.dumps(progress)))
+        else:
+            print(f"[download] {step:5.1f}% of   50.00MiB at   10.00MiB/s ETA 00:04")
+    print(f'[Merger] Merging formats into "tmp/{title} [{video_id}].mkv"')
+    if done:
+        print(done.replace("%(filepath)s", f"tmp/{title} [{video_id}].mkv"))
+'''
+
+FAKE_FFMPEG = r'''
+import sys
+if "-version" in sys.argv:
+    print("ffmpeg version 6.1.1 Copyright (c) 2000-2023 the FFmpeg developers"); sys.exit(0)
+print("Input #0, matroska,webm, from '%s':" % sys.argv[sys.argv.index("-i") + 1], file=sys.stderr)
+print("video:51200kB audio:4096kB subtitle:12kB other streams:0kB global headers:0kB", file=sys.stderr)
+open(sys.argv[-1], "wb").close()
+'''
+
+FAKE_MKVMERGE = r'''
+import sys
+if "-V" in sys.argv:
+    print("mkvmerge v82.0 ('I'm The President') 64-bit"); sys.exit(0)
+output = sys.argv[sys.argv.index("-o") + 1]
+print("mkvmerge v82.0 ('I'm The President') 64-bit")
+print("'%s': Using the demultiplexer for the format 'Matroska'." % sys.argv[sys.argv.index("-o") + 2])
+print("The file '%s' has been opened for writing." % output)
+print("Progress: 100%")
+open(output, "wb").close()
+print("Multiplexing took 0 seconds.")
+'''
+
+
+class StubTranslateHandler(BaseHTTPRequestHandler):
+    """
+    Imita translate_a/single (un segmento por línea) o, en rutas que acaban en
+    /t, el endpoint alternativo (todo el texto en un elemento); el texto vuelve
+    en mayúsculas. Cuenta las peticiones recibidas en `hits`.
+    """
+
+    latency = 0.0
+    error_rate = 0.0
+    random = random.Random(0)
+    hits = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        self.hits.append(1)
+        time.sleep(self.latency)
+        if self.random.random() < self.error_rate:
+            self.send_response(429)
+            self.end_headers()
+            return
+        params = parse_qs(urlparse(self.path).query)
+        params.update(parse_qs(body))
+        lines = params.get("q", [""])[0].split("\n")
+        if urlparse(self.path).path.endswith("/t"):
+            data = json.dumps([["\n".join(lines).upper(), "en"]]).encode()
+        else:
+            segments = [[line.upper() + ("\n" if i < len(lines) - 1 else ""), line, None, None]
+                        for i, line in enumerate(lines)]
+            data = json.dumps([segments, None, "en"]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server(latency, error_rate, path="/translate_a/single"):
+    handler = type("Handler", (StubTranslateHandler,),
+                   {"latency": latency, "error_rate": error_rate, "random": random.Random(0), "hits": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}{path}"
+
+
+def install_fake_tools(bin_dir):
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for name, source in (("yt-dlp", FAKE_YT_DLP), ("ffmpeg", FAKE_FFMPEG), ("mkvmerge", FAKE_MKVMERGE)):
+        path = bin_dir / name
+        path.write_text(f"#!{sys.executable}\n{source}", encoding="utf-8")
+        path.chmod(0o755)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+
+
+def srt_time(ms):
+    return f"{ms // 3600000:02}:{ms // 60000 % 60:02}:{ms // 1000 % 60:02},{ms % 1000:03}"
+
+
+def write_corpus(path, cues, lang, encoding, seed=0):
+    """Escribe un .srt de `cues` bloques de una o dos líneas con la codificación pedida."""
+    rng = random.Random(seed)
+    phrases = PHRASES[lang] + (CP1252_EXTRAS if encoding == "cp1252" else [])
+    blocks = []
+    for i in range(cues):
+        start = i * 2500
+        text = "\n".join(rng.choice(phrases) for _ in range(rng.choice((1, 1, 2))))
+        blocks.append(f"{i + 1}\n{srt_time(start)} --> {srt_time(start + 2000)}\n{text}\n")
+    path.write_text("\n".join(blocks), encoding=encoding, newline="\r\n")
+    return path
+
+
+def load_module(workdir):
+    """Importa yt-downloader.py con la caché y las carpetas dentro de workdir."""
+    os.environ["XDG_CACHE_HOME"] = str(workdir / "cache")
+    os.chdir(workdir)
+    spec = importlib.util.spec_from_file_location("yt_downloader", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["yt_downloader"] = module  # Los procesos hijos lo resuelven al deserializar
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.contextmanager
+def silenced():
+    """Descarta la salida estándar, también la de los programas externos que se lancen."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(devnull):
+                yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def measure(fn, runs):
+    """Ejecuta fn una vez para calentar, `runs` veces cronometradas y una más con tracemalloc."""
+    with silenced():
+        fn()
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return statistics.median(samples), peak
+
+
+class Suite:
+    def __init__(self, ytd, workdir, stub_url, args):
+        self.ytd = ytd
+        self.workdir = workdir
+        self.args = args
+        self.results = []
+        self.downloader = ytd.YouTubeDownloader()
+        self.downloader.memory = None  # Cada ejecución traduce de verdad, sin aciertos de caché
+        self.downloader.translator = ytd.Translator(rate=args.rate, backoff=0.01,
+                                                    base_url=stub_url, fallback_url=stub_url)
+        self.corpus_dir = workdir / "corpus"
+        self.corpus_dir.mkdir()
+        self.corpora = {}
+
+    def corpus(self, cues, lang, encoding):
+        key = (cues, lang, encoding)
+        if key not in self.corpora:
+            name = f"{lang}_{encoding}_{cues}.srt"
+            self.corpora[key] = write_corpus(self.corpus_dir / name, cues, lang, encoding)
+        return self.corpora[key]
+
+    def add(self, name, case, fn, items, unit, **extra):
+        seconds, peak = measure(fn, self.args.runs)
+        result = {
+            "name": name, "case": case, "seconds": round(seconds, 6), "items": items, "unit": unit,
+            "throughput": round(items / seconds, 2) if seconds else None,
+            "peak_kib": round(peak / 1024, 1), **extra,
+        }
+        self.results.append(result)
+        print(f"{name:<24} {case:<28} {seconds * 1000:>10.1f} ms {result['throughput']:>14,.0f} {unit}/s "
+              f"{result['peak_kib']:>10,.0f} KiB", file=sys.stderr)
+
+    def translate_subs(self):
+        for cues in self.args.sizes:
+            path = self.corpus(cues, "en", "utf-8")
+            self.add("translate_subs", f"en/utf-8/{cues}",
+                     lambda: self.downloader.translate_subs(path, "es"), cues, "cues")
+
+    def convert_srt_to_utf8(self):
+        for cues in self.args.sizes:
+            for encoding in ENCODINGS:
+                path = self.corpus(cues, "es", encoding)
+                size = path.stat().st_size
+                self.add("convert_srt_to_utf8", f"es/{encoding}/{cues}",
+                         lambda: self.downloader.convert_srt_to_utf8(path), size, "bytes")
+
+    def is_utf8(self):
+        for cues in self.args.sizes:
+            for encoding in ENCODINGS:
+                path = self.corpus(cues, "es", encoding)
+                size = path.stat().st_size
+                self.add("is_utf8", f"es/{encoding}/{cues}",
+                         lambda: self.downloader.is_utf8(path), size, "bytes")
+
+    def detect_language(self):
+        runs = iter(range(10 ** 9))
+        for cues in self.args.sizes:
+            for lang in LANGUAGES:
+                for encoding in ("utf-8", "cp1252"):
+                    path = self.corpus(cues, lang, encoding)
+                    # Un detector nuevo por ejecución: se mide la detección, no la caché
+                    detect = lambda: self.ytd.LanguageDetector(
+                        self.workdir / "cache" / f"lang-{next(runs)}.sqlite3").detect_file(path)
+                    self.add("detect_language", f"{lang}/{encoding}/{cues}", detect, 1, "files")
+
+    def process_existing_videos(self):
+        cues = min(self.args.sizes)
+        folder = self.workdir / "folder"
+        folder.mkdir()
+        for n in range(self.args.videos):
+            lang, encoding = LANGUAGES[n % 2], ENCODINGS[n % len(ENCODINGS)]
+            (folder / f"episodio{n:03d}.mkv").write_bytes(b"\x1a\x45\xdf\xa3")
+            write_corpus(folder / f"episodio{n:03d}.{lang}.srt", cues, lang, encoding, seed=n)
+
+        def run():
+            for path in folder.glob("translated_*"):
+                path.unlink()
+            return self.downloader.process_existing_videos(folder, translate=True)
+
+        self.add("process_existing_videos", f"{self.args.videos}x{cues}", run, self.args.videos, "videos")
+
+    def progress_parser(self):
+        env = dict(os.environ, FAKE_YT_DLP_VIDEOS=str(self.args.videos))
+        cmd = self.downloader.build_download_cmd("https://www.youtube.com/playlist?list=PLbench", None, None)
+        lines = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout.splitlines()
+        parse = self.ytd.DownloadProgress.from_line
+
+        def run():
+            for line in lines:
+                parse(line.strip())
+
+        self.add("progress_parser", f"{self.args.videos} videos", run, len(lines), "lines")
+
+    def endpoint_failover(self):
+        """
+        Dos servidores locales con fallos inyectados: el principal caído (solo
+        429) o lento (50 ms más). El traductor debería dejar de enviarle
+        peticiones en cuanto se abre su circuito o se mide su latencia.
+        """
+        cues = min(self.args.sizes)
+        path = self.corpus(cues, "en", "utf-8")
+        latency = self.args.latency_ms / 1000
+        for case, primary_latency, primary_errors in (("principal caído", latency, 1.0),
+                                                      ("principal lento", latency + 0.05, 0.0)):
+            primary, primary_url = start_stub_server(primary_latency, primary_errors)
+            fallback, fallback_url = start_stub_server(latency, 0.0, path="/translate_a/t")
+            try:
+                translator = self.ytd.Translator(rate=self.args.rate, backoff=0.01,
+                                                 base_url=primary_url, fallback_url=fallback_url)
+                self.downloader.translator = translator
+                self.add("endpoint_failover", f"{case}/{cues}",
+                         lambda: self.downloader.translate_subs(path, "es"), cues, "cues")
+                hits = len(primary.RequestHandlerClass.hits), len(fallback.RequestHandlerClass.hits)
+                self.results[-1].update(primary_requests=hits[0], fallback_requests=hits[1],
+                                        endpoints=translator.health_report())
+                print(f"{'':<24} {'':<28} peticiones: {hits[0]} al principal, {hits[1]} al alternativo",
+                      file=sys.stderr)
+            finally:
+                primary.shutdown()
+                fallback.shutdown()
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {(r["name"], r["case"]): r for r in json.load(file)["results"]}
+    print(f"\nComparación con {baseline_path} (tiempo: <1 es más rápido)", file=sys.stderr)
+    for result in results:
+        old = baseline.get((result["name"], result["case"]))
+        if old and old["seconds"]:
+            ratio = result["seconds"] / old["seconds"]
+            memory = result["peak_kib"] / old["peak_kib"] if old["peak_kib"] else float("nan")
+            print(f"{result['name']:<24} {result['case']:<28} tiempo x{ratio:.2f}  memoria x{memory:.2f}",
+                  file=sys.stderr)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT.parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,20000,200000",
+                        help="Número de bloques de cada corpus, separados por comas")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--videos", type=int, default=20, help="Videos de la carpeta y de la salida de yt-dlp")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia del servidor de traducción")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas HTTP 429")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Peticiones por segundo del traductor")
+    parser.add_argument("--only", help="Casos a ejecutar, separados por comas: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--output", help="Guardar el JSON en este archivo")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    selected = args.only.split(",") if args.only else BENCHMARKS
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Casos desconocidos: {', '.join(sorted(unknown))}")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        install_fake_tools(workdir / "bin")
+        server, stub_url = start_stub_server(args.latency_ms / 1000, args.error_rate)
+        try:
+            with silenced():
+                ytd = load_module(workdir)
+                suite = Suite(ytd, workdir, stub_url, args)
+            for name in selected:
+                getattr(suite, name)()
+        finally:
+            server.shutdown()
+            os.chdir(cwd)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: getattr(args, key) for key in ("sizes", "runs", "videos", "latency_ms", "error_rate", "rate")},
+        "results": suite.results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.compare:
+        compare(suite.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Mide el arranque en frío de yt-downloader.py: importar el módulo y crear
+YouTubeDownloader en un intérprete nuevo, sin red ni programas externos.
+
+Uso:
+    python3 benchmarks/bench_startup.py [--runs 10] [--max-ms 250]
+
+Imprime un JSON con la mediana y termina con código 1 si se supera --max-ms
+o si alguno de los módulos pesados se carga durante el arranque.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "yt-downloader.py"
+HEAVY_MODULES = ["requests", "chardet", "tqdm", "langdetect", "deep_translator"]
+
+PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("yt_downloader", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+module.YouTubeDownloader()
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "init_ms": (created - imported) * 1000,
+    "heavy_loaded": [name for name in sys.argv[2:] if name in sys.modules],
+}))
+"""
+
+
+def measure(runs):
+    samples = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {"HOME": workdir, "XDG_CACHE_HOME": str(Path(workdir) / "cache"), "PATH": ""}
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-c", PROBE, str(SCRIPT), *HEAVY_MODULES],
+                cwd=workdir, env=env, capture_output=True, text=True, check=True,
+            )
+            total = (time.perf_counter() - start) * 1000
+            sample = json.loads(result.stdout.strip().splitlines()[-1])
+            sample["process_ms"] = total
+            samples.append(sample)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, help="Límite para la mediana de import_ms + init_ms")
+    args = parser.parse_args()
+
+    samples = measure(args.runs)
+    report = {
+        key: round(statistics.median(sample[key] for sample in samples), 2)
+        for key in ("import_ms", "init_ms", "process_ms")
+    }
+    report["runs"] = args.runs
+    report["heavy_loaded"] = sorted({name for sample in samples for name in sample["heavy_loaded"]})
+    print(json.dumps(report, indent=2))
+
+    failed = bool(report["heavy_loaded"])
+    if args.max_ms is not None and report["import_ms"] + report["init_ms"] > args.max_ms:
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Piezas comunes de las pruebas: el módulo cargado desde yt-downloader.py (con
+caché y carpetas en un directorio temporal) y servidores de traducción locales
+en los que se inyectan fallos.
+"""
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "yt-downloader.py"
+
+
+@pytest.fixture(scope="session")
+def ytd(tmp_path_factory):
+    """Importa yt-downloader.py con la caché y las carpetas de trabajo en un directorio temporal."""
+    workdir = tmp_path_factory.mktemp("work")
+    os.environ["XDG_CACHE_HOME"] = str(workdir / "cache")
+    os.chdir(workdir)  # TEMP_DIR y FINAL_DIR se calculan al importar
+    spec = importlib.util.spec_from_file_location("yt_downloader", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["yt_downloader"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Imita los dos endpoints (translate_a/single y, en rutas que acaban en /t, el
+    alternativo) devolviendo el texto en mayúsculas. `mode` inyecta fallos:
+    'ok', 'error' (HTTP 500) o 'throttle' (429 con Retry-After); un texto que
+    contiene `reject` recibe un 400. Las primeras peticiones (tantas como
+    elementos tenga `failures`) reciben un 500 aunque el modo sea 'ok', y
+    `delay` añade una espera aleatoria de hasta esos segundos a cada respuesta.
+    """
+
+    mode = "ok"
+    retry_after = "30"
+    reject = None
+    delay = 0
+    hits = None
+    failures = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        self.hits.append(1)
+        if self.delay:
+            time.sleep(random.uniform(0, self.delay))
+        try:
+            self.failures.pop()
+            failed = True
+        except IndexError:
+            failed = False
+        if failed or self.mode == "error":
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.mode == "throttle":
+            self.send_response(429)
+            self.send_header("Retry-After", self.retry_after)
+            self.end_headers()
+            return
+        text = parse_qs(body).get("q", [""])[0]
+        if self.reject and self.reject in text:
+            self.send_response(400)
+            self.end_headers()
+            return
+        if urlparse(self.path).path.endswith("/t"):
+            data = json.dumps([[text.upper(), "en"]]).encode()
+        else:
+            lines = text.split("\n")
+            segments = [[line.upper() + ("\n" if i < len(lines) - 1 else ""), line, None, None]
+                        for i, line in enumerate(lines)]
+            data = json.dumps([segments, None, "en"]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class Stub:
+    """Servidor de traducción local en un hilo."""
+
+    def __init__(self, path):
+        self.handler = type("Handler", (StubHandler,), {"hits": [], "failures": []})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}{path}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def hits(self):
+        return len(self.handler.hits)
+
+    def set_mode(self, mode, retry_after="30", reject=None, delay=0):
+        self.handler.mode = mode
+        self.handler.retry_after = retry_after
+        self.handler.reject = reject
+        self.handler.delay = delay
+
+    def fail_next(self, count):
+        """Las próximas `count` peticiones reciben un 500."""
+        self.handler.failures[:] = [None] * count
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    primary, fallback = Stub("/translate_a/single"), Stub("/translate_a/t")
+    yield primary, fallback
+    for stub in (primary, fallback):
+        with contextlib.suppress(OSError):
+            stub.stop()
+
+
+@pytest.fixture
+def translator(ytd, stubs):
+    """Traductor contra los dos servidores locales, sin esperas entre reintentos."""
+    primary, fallback = stubs
+    translator = ytd.Translator(base_url=primary.url, fallback_url=fallback.url,
+                                retries=1, backoff=0, rate=1000)
+    translator.EXPLORE = 0  # Orden determinista: sin peticiones de exploración
+    return translator
@@ -0,0 +1,90 @@
+"""
+Subtítulos automáticos que se desplazan: cada frase se traduce una vez y
+resegment() la reparte de nuevo sobre los tiempos originales.
+"""
+import pytest
+
+WORDS = ("so today we are going to look at how the cache works. it keeps every "
+         "translation on disk and the next run reads it back instead of asking "
+         "the service again, which saves a lot of time. then we will see the batches.").split()
+
+
+def rolling_cues(ytd, chunks):
+    """Como YouTube: cada bloque repite la línea anterior y añade una nueva."""
+    cues, previous = [], None
+    for i, chunk in enumerate(chunks):
+        start, end = i * 2000, i * 2000 + 2500
+        text = f"{previous}\n{chunk}" if previous else chunk
+        cues.append(ytd.SubtitleCue(str(i + 1), f"{ytd._format_ms(start)} --> {ytd._format_ms(end)}", text))
+        previous = chunk
+    return cues
+
+
+@pytest.fixture
+def chunks():
+    return [' '.join(WORDS[i:i + 4]) for i in range(0, len(WORDS), 4)]
+
+
+def test_units_translate_each_phrase_once(ytd, chunks):
+    captions = ytd.CaptionUnits.from_cues(rolling_cues(ytd, chunks))
+
+    assert captions is not None
+    assert ' '.join(unit.text for unit in captions.units).split() == WORDS
+    assert captions.saved_chars > 0
+    assert len(captions.units) < len(chunks)
+
+
+def test_fragments_keep_original_timing(ytd, chunks):
+    cues = rolling_cues(ytd, chunks)
+    captions = ytd.CaptionUnits.from_cues(cues)
+
+    resegmented = captions.resegment(captions.units)
+
+    assert [cue.text for cue in resegmented] == chunks
+    assert [cue.start for cue in resegmented] == [cue.start for cue in cues]
+    for cue, following in zip(resegmented, resegmented[1:]):
+        assert ytd._timing_ms(cue.end) <= ytd._timing_ms(following.start)  # Sin solaparse
+    assert resegmented[-1].end == cues[-1].end
+    assert [cue.index for cue in resegmented] == [str(i) for i in range(1, len(chunks) + 1)]
+
+
+def test_translation_is_spread_without_loss_or_duplication(ytd, chunks):
+    captions = ytd.CaptionUnits.from_cues(rolling_cues(ytd, chunks))
+    translated = [ytd.SubtitleCue(unit.index, unit.timing, f"{unit.text.upper()} extra words here")
+                  for unit in captions.units]
+
+    resegmented = captions.resegment(translated)
+
+    assert ' '.join(cue.text for cue in resegmented).split() == ' '.join(u.text for u in translated).split()
+    starts = {cue.start for cue in rolling_cues(ytd, chunks)}
+    assert all(cue.start in starts for cue in resegmented)
+
+
+def test_shorter_translation_extends_previous_cue(ytd, chunks):
+    captions = ytd.CaptionUnits.from_cues(rolling_cues(ytd, chunks))
+    first, last = captions.spans[0]
+    assert last - first > 1
+    short = [ytd.SubtitleCue(unit.index, unit.timing, "hola") for unit in captions.units]
+
+    resegmented = captions.resegment(short)
+
+    assert [cue.text for cue in resegmented] == ["hola"] * len(captions.units)
+    assert resegmented[0].start == captions.units[0].start
+    assert resegmented[0].end == ytd._format_ms(captions.fragments[last - 1][1])
+
+
+def test_normal_subtitles_are_left_alone(ytd):
+    cues = [ytd.SubtitleCue(str(i), f"{ytd._format_ms(i * 3000)} --> {ytd._format_ms(i * 3000 + 2000)}",
+                            f"line number {i}\nsecond row {i}") for i in range(1, 21)]
+    assert ytd.CaptionUnits.from_cues(cues) is None
+
+    # Algunas repeticiones sueltas no bastan para tratarlo como automático
+    threshold = int(ytd.ROLLING_MIN_RATIO * len(cues))
+    for i in range(1, threshold):
+        cues[i * 2] = ytd.SubtitleCue(cues[i * 2].index, cues[i * 2].timing,
+                                      f"second row {i * 2}\nline number {i * 2 + 1}")
+    assert ytd.CaptionUnits.from_cues(cues) is None
+
+    k = threshold * 2
+    cues[k] = ytd.SubtitleCue(cues[k].index, cues[k].timing, f"second row {k}\nline number {k + 1}")
+    assert ytd.CaptionUnits.from_cues(cues) is not None  # Con la proporción mínima ya lo es
@@ -0,0 +1,101 @@
+"""
+translate_subs de punta a punta con el motor 'fake' (sin red ni modelos):
+tiempos intactos, límites de lote del motor, varios idiomas y memoria de
+traducción separada por motor.
+"""
+import re
+
+import pytest
+
+
+@pytest.fixture
+def downloader(ytd, tmp_path):
+    downloader = ytd.YouTubeDownloader()
+    downloader.memory = ytd.TranslationMemory(tmp_path / "memory.db")
+    return downloader
+
+
+@pytest.fixture
+def fake(downloader):
+    """El motor 'fake' del programa, anotando el tamaño de cada lote que recibe."""
+    backend = downloader.get_backend("fake")
+    backend.batches = []
+    translate_batch = backend.translate_batch
+
+    def recording(texts, src='auto', dest='es'):
+        backend.batches.append(list(texts))
+        return translate_batch(texts, src, dest)
+
+    backend.translate_batch = recording
+    return backend
+
+
+TIMINGS = [
+    "00:00:01,000 --> 00:00:02,500",
+    "00:00:02,500 --> 00:00:04,120 X1:100 X2:500 Y1:20 Y2:80",
+    "00:01:00,007 --> 00:01:03,000",
+    "01:59:59,999 --> 02:00:00,000",
+]
+
+
+def write_srt(path, count):
+    blocks = []
+    for i in range(1, count + 1):
+        text = f"fake line {i}" if i % 3 else f"fake line {i}\nsecond row {i}"
+        blocks.append(f"{i}\n{TIMINGS[i % len(TIMINGS)]}\n{text}\n")
+    path.write_text("\n".join(blocks), encoding="utf-8")
+    return path
+
+
+def timing_lines(path):
+    return [line for line in path.read_text(encoding="utf-8").splitlines() if "-->" in line]
+
+
+def test_timings_are_byte_identical(downloader, fake, tmp_path):
+    sub_path = write_srt(tmp_path / "video.en.srt", 30)
+
+    translated = downloader.translate_subs(sub_path, ["es"], backend="fake")
+
+    assert timing_lines(translated["es"]) == timing_lines(sub_path)
+    texts = re.findall(r"^\[es\] ", translated["es"].read_text(encoding="utf-8"), re.M)
+    assert len(texts) == 30
+
+
+def test_batch_limits_are_respected(downloader, fake, tmp_path):
+    fake.max_batch_items = 4
+    fake.max_batch_chars = 60
+    sub_path = write_srt(tmp_path / "video.en.srt", 40)
+
+    downloader.translate_subs(sub_path, ["es"], backend="fake")
+
+    assert sum(map(len, fake.batches)) == 40
+    assert all(len(batch) <= 4 for batch in fake.batches)
+    assert all(sum(len(text) + 1 for text in batch) <= 60 for batch in fake.batches)
+
+
+def test_writes_every_language(downloader, fake, tmp_path):
+    sub_path = write_srt(tmp_path / "video.en.srt", 12)
+
+    translated = downloader.translate_subs(sub_path, ["es", "fr", "de"], backend="fake")
+
+    assert set(translated) == {"es", "fr", "de"}
+    for lang, path in translated.items():
+        assert path == tmp_path / f"video.en.{lang}.srt"
+        assert path.read_text(encoding="utf-8").count(f"[{lang}] ") == 12
+        assert timing_lines(path) == timing_lines(sub_path)
+
+
+def test_memory_is_namespaced_per_backend(ytd, downloader, fake, tmp_path):
+    downloader.memory.put("auto", "es", "fake line 1", "de Google")  # Entrada del motor de Google
+    sub_path = write_srt(tmp_path / "video.en.srt", 2)
+
+    translated = downloader.translate_subs(sub_path, ["es"], backend="fake")
+
+    assert "de Google" not in translated["es"].read_text(encoding="utf-8")
+    assert downloader.memory.get("fake:auto", "es", "fake line 1") == "[es] fake line 1"
+    assert downloader.memory.get("auto", "es", "fake line 1") == "de Google"
+
+    fake.batches.clear()
+    translated["es"].unlink()
+    downloader.translate_subs(sub_path, ["es"], backend="fake")
+    assert fake.batches == []  # Segunda vez: todo desde la memoria del motor 'fake'
@@ -0,0 +1,98 @@
+"""
+Comando de yt-dlp según el perfil de descarga: formato, transferencia, modo de
+subtítulos y rango, sin tocar la red.
+"""
+import pytest
+
+URL = "https://www.youtube.com/playlist?list=PL123"
+
+
+def command(ytd, policy, **kwargs):
+    return ytd.ytdlp_command(URL, policy, "/tmp/out/%(title)s [%(id)s].%(ext)s", **kwargs)
+
+
+def value(cmd, flag):
+    return cmd[cmd.index(flag) + 1]
+
+
+@pytest.mark.parametrize("name", ["default", "1080p", "720p", "mp4", "archive", "audio", "original-subs"])
+def test_every_profile_builds_a_command(ytd, name):
+    policy = ytd.FORMAT_PROFILES[name]
+    cmd = command(ytd, policy, archive_path="/tmp/archive.txt")
+
+    assert cmd[0] == "yt-dlp"
+    assert cmd[-2:] == ["--", URL]
+    assert value(cmd, "--download-archive") == "/tmp/archive.txt"
+    assert value(cmd, "--print").startswith(f"after_move:{ytd.DONE_MARKER}")
+    if policy.audio_only:
+        assert value(cmd, "-f") == "ba/b" and "-x" in cmd
+        assert "--merge-output-format" not in cmd
+    else:
+        assert value(cmd, "--merge-output-format") == policy.container
+
+
+def test_height_limit_and_container_preferences(ytd):
+    cmd = command(ytd, ytd.FORMAT_PROFILES["mp4"])
+    assert value(cmd, "-f") == "bv*[height<=1080]+ba/b[height<=1080]/bv*+ba/b"
+    assert value(cmd, "-S") == "res:1080,ext:mp4:m4a"
+
+    cmd = command(ytd, ytd.FORMAT_PROFILES["default"])
+    assert value(cmd, "-f") == "bv*+ba/b"
+    assert "-S" not in cmd
+
+
+def test_transfer_options(ytd):
+    cmd = command(ytd, ytd.FORMAT_PROFILES["archive"])
+    assert value(cmd, "--concurrent-fragments") == "8"
+    assert value(cmd, "--downloader") == "aria2c"
+    assert value(cmd, "--downloader-args") == "aria2c:-x 8 -s 8 -k 1M"
+
+    cmd = command(ytd, ytd.FormatPolicy(fragments=1, rate_limit="5M"))
+    assert "--concurrent-fragments" not in cmd
+    assert value(cmd, "--limit-rate") == "5M"
+
+
+@pytest.mark.parametrize("mode, writes, embeds", [("mux", True, False), ("embed", True, True), ("none", False, False)])
+def test_subtitle_modes(ytd, mode, writes, embeds):
+    policy = ytd.FormatPolicy(subtitles=mode)
+    cmd = command(ytd, policy, sub_langs=ytd.subtitle_langs(["es"], policy))
+
+    assert ("--write-subs" in cmd) is writes
+    assert ("--embed-subs" in cmd) is embeds
+    if writes:
+        # Solo se traduce en 'mux': el inglés hace falta como origen
+        assert value(cmd, "--sub-langs") == ("es.*,en.*" if mode == "mux" else "es.*")
+
+
+def test_audio_only_never_asks_for_subtitles(ytd):
+    policy = ytd.FormatPolicy(audio_only=True, subtitles="embed")
+    cmd = command(ytd, policy)
+
+    assert policy.subtitles == "none"
+    assert "--write-subs" not in cmd and "--embed-subs" not in cmd
+    assert value(cmd, "--audio-format") == "best"
+
+
+def test_leaving_audio_only_restores_the_profile_subtitles(ytd):
+    audio = ytd.FORMAT_PROFILES["audio"]
+    assert audio.with_changes(audio_only=False).subtitles == "mux"
+    assert audio.with_changes(audio_only=False, subtitles="embed").subtitles == "embed"
+
+    embedded = ytd.FormatPolicy(subtitles="embed", audio_only=True)
+    assert embedded.with_changes(audio_only=False).subtitles == "embed"
+    assert embedded.with_changes(max_height=720).subtitles == "none"
+    assert ytd.FORMAT_PROFILES["original-subs"].with_changes(audio_only=True).subtitles == "none"
+
+
+def test_range_and_items(ytd):
+    policy = ytd.FORMAT_PROFILES["default"]
+    cmd = command(ytd, policy, start=3, end=None)
+    assert (value(cmd, "--playlist-start"), value(cmd, "--playlist-end")) == ("3", "9999")
+
+    cmd = command(ytd, policy, start=3, end=7, items=[5, 2, 9])
+    assert value(cmd, "--playlist-items") == "5,2,9"
+    assert "--playlist-start" not in cmd
+
+    cmd = command(ytd, policy, small_output="/tmp/small/%(id)s.%(ext)s")
+    assert "subtitle:/tmp/small/%(id)s.%(ext)s" in cmd
+    assert "infojson:/tmp/small/%(id)s.%(ext)s" in cmd
@@ -0,0 +1,17 @@
+"""Registro JSON de métricas: no crece sin límite y recent_rate sigue funcionando."""
+import json
+
+
+def test_log_is_trimmed_to_its_tail(ytd, tmp_path):
+    metrics = ytd.Metrics(tmp_path / "metrics.jsonl", tmp_path / "metrics.prom",
+                          log_max=2 * ytd.METRICS_LOG_KEEP)
+    for i in range(20000):
+        metrics.observe('download', 1.0, bytes_per_second=1000 + i % 7, video=f"video {i}")
+
+    size = (tmp_path / "metrics.jsonl").stat().st_size
+    assert size <= 2 * ytd.METRICS_LOG_KEEP + 200
+    lines = (tmp_path / "metrics.jsonl").read_text(encoding="utf-8").splitlines()
+    assert all(json.loads(line)['stage'] == 'download' for line in lines)
+    assert json.loads(lines[-1])['video'] == "video 19999"
+    assert 1000 <= metrics.recent_rate('download', 'bytes_per_second') <= 1006
+    assert metrics.totals[('runs', 'download')] == 20000
@@ -0,0 +1,66 @@
+"""
+Índice de subtítulos de una carpeta: a qué video pertenece cada .srt y cuál
+se elige cuando hay varios.
+"""
+
+
+def touch(folder, *names):
+    for name in names:
+        (folder / name).write_bytes(b"")
+
+
+def test_longest_stem_wins(ytd, tmp_path):
+    touch(tmp_path, "ep1.mkv", "ep10.mkv", "ep1.en.srt", "ep10.en.srt", "ep10.es.srt")
+    index = ytd.SubtitleIndex(tmp_path)
+
+    assert sorted(path.name for _, path in index.candidates["ep1"]) == ["ep1.en.srt"]
+    assert sorted(path.name for _, path in index.candidates["ep10"]) == ["ep10.en.srt", "ep10.es.srt"]
+    assert index.best_subtitle(tmp_path / "ep1.mkv").name == "ep1.en.srt"
+
+
+def test_dotted_video_names_keep_their_tags(ytd, tmp_path):
+    touch(tmp_path, "Show v1.2 [abc].mp4", "Show v1.2 [abc].fr.srt")
+    index = ytd.SubtitleIndex(tmp_path)
+
+    assert index.candidates["Show v1.2 [abc]"] == [(["fr"], tmp_path / "Show v1.2 [abc].fr.srt")]
+
+
+def test_ranking_order(ytd, tmp_path):
+    touch(tmp_path, "ep.mkv", "ep.fr.srt", "ep.en.srt", "ep.srt", "ep.es.srt")
+    index = ytd.SubtitleIndex(tmp_path)
+    remaining = ["ep.es.srt", "ep.srt", "ep.en.srt", "ep.fr.srt"]
+
+    # Destino, sin idioma, inglés, otros: se quita el mejor y se repite
+    for expected in remaining:
+        assert index.best_subtitle(tmp_path / "ep.mkv", "es").name == expected
+        (tmp_path / expected).unlink()
+        index = ytd.SubtitleIndex(tmp_path)
+    assert index.best_subtitle(tmp_path / "ep.mkv", "es") is None
+
+
+def test_preferred_language_follows_target(ytd, tmp_path):
+    touch(tmp_path, "ep.mkv", "ep.es.srt", "ep.pt-BR.srt")
+    index = ytd.SubtitleIndex(tmp_path)
+
+    assert index.best_subtitle(tmp_path / "ep.mkv", "pt").name == "ep.pt-BR.srt"
+    assert index.best_subtitle(tmp_path / "ep.mkv", "es").name == "ep.es.srt"
+
+
+def test_utf8_copy_wins_within_a_language(ytd, tmp_path):
+    touch(tmp_path, "ep.mkv", "ep.en.srt", "ep.en.utf8.srt", "ep.utf8.srt", "ep.srt")
+    index = ytd.SubtitleIndex(tmp_path)
+
+    assert index.best_subtitle(tmp_path / "ep.mkv", "es").name == "ep.utf8.srt"
+    (tmp_path / "ep.utf8.srt").unlink()
+    (tmp_path / "ep.srt").unlink()
+    index = ytd.SubtitleIndex(tmp_path)
+    assert index.best_subtitle(tmp_path / "ep.mkv", "es").name == "ep.en.utf8.srt"
+
+
+def test_ignores_subtitles_without_video(ytd, tmp_path):
+    touch(tmp_path, "ep.mkv", "other.en.srt", "notes.txt")
+    (tmp_path / "sub.srt").mkdir()
+    index = ytd.SubtitleIndex(tmp_path)
+
+    assert index.video_files() == [tmp_path / "ep.mkv"]
+    assert index.best_subtitle(tmp_path / "ep.mkv") is None
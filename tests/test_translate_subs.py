@@ -0,0 +1,71 @@
+"""
+translate_subs ante fallos del servicio: un bloque que el motor rechaza se
+queda con su texto original sin tirar el idioma entero, y un servicio caído o
+limitando (o un motor local sin modelo) detiene el idioma con el diario
+guardado para seguir después.
+"""
+import pytest
+
+
+@pytest.fixture
+def downloader(ytd):
+    return ytd.YouTubeDownloader()
+
+
+def write_srt(path, texts):
+    blocks = [f"{i}\n00:00:{i:02},000 --> 00:00:{i:02},900\n{text}\n" for i, text in enumerate(texts, 1)]
+    path.write_text("\n".join(blocks), encoding="utf-8")
+    return path
+
+
+def read_texts(ytd, path):
+    return [cue.text for cue in ytd.parse_srt(path.read_text(encoding="utf-8"))]
+
+
+def test_rejected_cue_keeps_original_text(ytd, stubs, translator, downloader, tmp_path):
+    primary, fallback = stubs
+    for stub in (primary, fallback):
+        stub.set_mode("ok", reject="BAD")
+    texts = [f"rejected case line {i}" for i in range(20)]
+    texts[7] = "a BAD line the service refuses"
+    sub_path = write_srt(tmp_path / "video.en.srt", texts)
+
+    translated = downloader.translate_subs(sub_path, ["es"], backend=translator)
+
+    assert set(translated) == {"es"}
+    expected = [text.upper() for text in texts]
+    expected[7] = texts[7]
+    assert read_texts(ytd, translated["es"]) == expected
+    assert all(health.state == ytd.EndpointHealth.CLOSED for health in translator.endpoints)
+
+
+def test_service_unavailable_keeps_journal_and_resumes(ytd, stubs, translator, downloader, tmp_path):
+    primary, fallback = stubs
+    for stub in (primary, fallback):
+        stub.set_mode("throttle", retry_after="0")
+    texts = [f"throttled case line {i}" for i in range(20)]
+    sub_path = write_srt(tmp_path / "video.en.srt", texts)
+
+    assert downloader.translate_subs(sub_path, ["es"], backend=translator) == {}
+    assert not (tmp_path / "video.en.es.srt").exists()
+
+    for stub in (primary, fallback):
+        stub.set_mode("ok")
+    retry = ytd.Translator(base_url=primary.url, fallback_url=fallback.url, retries=1, backoff=0, rate=1000)
+    translated = downloader.translate_subs(sub_path, ["es"], backend=retry)
+
+    assert read_texts(ytd, translated["es"]) == [text.upper() for text in texts]
+
+
+def test_missing_local_model_leaves_no_file(ytd, downloader, tmp_path):
+    sub_path = write_srt(tmp_path / "video.en.srt", ["this is an english sentence"] * 3)
+    backend = ytd.LocalBackend(models_dir=tmp_path / "models")
+
+    assert downloader.translate_subs(sub_path, ["es"], backend=backend) == {}
+    assert not (tmp_path / "video.en.es.srt").exists()
+
+
+def test_translate_folder_rejects_missing_folder(downloader, tmp_path, capsys):
+    assert downloader.translate_folder(tmp_path / "missing", ["es"], backend="fake") == []
+    assert "no es una carpeta válida" in capsys.readouterr().out
+    assert not (tmp_path / "missing").exists()
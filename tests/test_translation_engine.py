@@ -0,0 +1,81 @@
+"""
+Motor de traducción de subtítulos contra los servidores locales: lotes en
+paralelo sin perder el orden, reintentos con espera, bloques que no se pueden
+traducir y la cubeta de fichas que limita el ritmo.
+"""
+import time
+
+
+def cues_for(ytd, texts):
+    return [ytd.SubtitleCue(str(i), f"00:00:{i:02d},000 --> 00:00:{i:02d},500", text)
+            for i, text in enumerate(texts, start=1)]
+
+
+def single_endpoint(ytd, stub, retries):
+    """Traductor con un solo endpoint: los fallos se reintentan en vez de pasar al alternativo."""
+    translator = ytd.Translator(base_url=stub.url, fallback_url=stub.url,
+                                retries=retries, backoff=0.01, rate=1000)
+    translator.EXPLORE = 0
+    return translator
+
+
+def test_order_is_kept_under_concurrency(ytd, stubs, translator):
+    primary, fallback = stubs
+    for stub in stubs:
+        stub.set_mode("ok", delay=0.05)  # Los lotes terminan desordenados
+    texts = [f"line {i}" for i in range(60)]
+    cues = cues_for(ytd, texts)
+
+    ytd.translate_cues(cues, translator.translate_batch, concurrency=8, max_items=3)
+
+    assert [cue.text for cue in cues] == [text.upper() for text in texts]
+    assert [cue.index for cue in cues] == [str(i) for i in range(1, 61)]
+    assert primary.hits + fallback.hits == 20
+
+
+def test_retries_until_success(ytd, stubs):
+    primary, _ = stubs
+    primary.fail_next(2)
+    translator = single_endpoint(ytd, primary, retries=2)
+
+    assert translator.translate_text("hello") == "HELLO"
+    assert primary.hits == 3
+
+
+def test_exhausted_retries_keep_original_text(ytd, stubs):
+    primary, _ = stubs
+    primary.fail_next(2)
+    translator = single_endpoint(ytd, primary, retries=1)
+    cues = cues_for(ytd, ["hello"])
+
+    ytd.translate_cues(cues, translator.translate_batch)
+
+    assert cues[0].text == "hello"
+    assert primary.hits == 2
+
+
+def test_batch_is_split_until_it_fits(ytd):
+    sent = []
+
+    def translate_fn(texts):
+        sent.append(len(texts))
+        if len(texts) > 2:
+            return texts[:-1]  # El motor pierde una línea
+        return [text.upper() for text in texts]
+
+    cues = cues_for(ytd, [f"line {i}" for i in range(8)])
+    translated = ytd.translate_cue_batch(cues, translate_fn)
+
+    assert [cue.text for cue in cues] == [f"LINE {i}" for i in range(8)]
+    assert translated == [(f"line {i}", f"LINE {i}") for i in range(8)]
+    assert sent == [8, 4, 2, 2, 4, 2, 2]
+
+
+def test_rate_limiter_spaces_requests(ytd):
+    limiter = ytd.RateLimiter(rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(10):
+        limiter.acquire()
+
+    # Las dos primeras salen de la ráfaga; las otras ocho, una cada 50 ms
+    assert 0.35 < time.monotonic() - started < 1.0
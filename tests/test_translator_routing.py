@@ -0,0 +1,85 @@
+"""
+Reparto del traductor entre dos endpoints con servidores locales que fallan a
+propósito: cortacircuitos, prueba en semiabierto, 429 con Retry-After y paso
+al endpoint alternativo cuando el principal cae.
+"""
+import time
+
+
+def health(translator, stub):
+    return next(h for h in translator.endpoints if h.url == stub.url)
+
+
+def test_breaker_opens_after_repeated_failures(ytd, stubs, translator):
+    primary, fallback = stubs
+    primary.set_mode("error")
+
+    for i in range(ytd.BREAKER_FAILURES + 5):
+        assert translator.translate_text(f"hello {i}") == f"HELLO {i}"
+
+    assert health(translator, primary).state == ytd.EndpointHealth.OPEN
+    assert primary.hits == ytd.BREAKER_FAILURES  # Abierto: ya no recibe nada
+    assert fallback.hits == ytd.BREAKER_FAILURES + 5
+
+
+def test_half_open_probe_recovers_endpoint(ytd, stubs, translator):
+    primary, fallback = stubs
+    primary_health = health(translator, primary)
+    primary_health.base_cooldown = primary_health.cooldown = 0.2
+    primary.set_mode("error")
+    for i in range(ytd.BREAKER_FAILURES):
+        translator.translate_text(f"hello {i}")
+    assert primary_health.state == ytd.EndpointHealth.OPEN
+
+    primary.set_mode("ok")
+    time.sleep(0.3)
+    hits = primary.hits
+    assert translator.translate_text("again") == "AGAIN"
+
+    assert primary.hits == hits + 1  # La petición de prueba
+    assert primary_health.state == ytd.EndpointHealth.CLOSED
+    assert not primary_health.probing
+
+
+def test_retry_after_is_honoured(ytd, stubs, translator):
+    primary, fallback = stubs
+    primary.set_mode("throttle", retry_after="30")
+
+    assert translator.translate_text("hello") == "HELLO"
+
+    primary_health = health(translator, primary)
+    assert primary_health.state == ytd.EndpointHealth.OPEN  # Un solo 429 basta
+    assert primary_health.retry_in() > 25
+    for i in range(5):
+        translator.translate_text(f"more {i}")
+    assert primary.hits == 1
+
+
+def test_fails_over_when_primary_dies(ytd, stubs, translator):
+    primary, fallback = stubs
+    for i in range(5):
+        translator.translate_text(f"hello {i}")  # Los dos quedan medidos
+
+    primary.stop()
+    hits = fallback.hits
+    for i in range(ytd.BREAKER_FAILURES + 5):
+        assert translator.translate_text(f"after {i}") == f"AFTER {i}"
+    assert fallback.hits == hits + ytd.BREAKER_FAILURES + 5  # Todas respondidas por el alternativo
+
+
+def test_unused_half_open_endpoint_keeps_its_probe(ytd, stubs, translator):
+    """Un endpoint semiabierto al que no se llega no debe quedarse con la prueba reservada."""
+    primary, fallback = stubs
+    fallback_health = health(translator, fallback)
+    fallback_health.latency = 1.0  # Más lento: el principal va delante
+    fallback_health.base_cooldown = fallback_health.cooldown = 0.0
+    fallback_health._open()
+
+    for i in range(50):
+        translator.translate_text(f"hello {i}")
+    assert fallback.hits == 0
+    assert not fallback_health.probing
+
+    primary.stop()
+    assert translator.translate_text("rescue") == "RESCUE"
+    assert fallback_health.state == ytd.EndpointHealth.CLOSED
@@ -2,71 +2,2667 @@
 import shutil
 import time
 import json
-import requests
+import argparse
+import codecs
+import glob
+import hashlib
+import importlib.machinery
+import itertools
+import multiprocessing
 import os
+import random
 import re
+import select
+import signal
 import subprocess
+import sqlite3
+import struct
 import sys
-import tempfile
-import json
-import requests
-import chardet
-from itertools import chain
-from deep_translator import GoogleTranslator
+import threading
+import uuid
+from collections import OrderedDict, deque
+import contextlib
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from tqdm import tqdm
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
 from colorama import Fore, Back, Style, init
-from langdetect import detect, DetectorFactory
-from langdetect.lang_detect_exception import LangDetectException
+
+# requests, chardet, tqdm y langdetect se importan solo en las funciones que los usan:
+# el arranque no paga su carga en los caminos del menú que no los necesitan.
 
 # Inicializar colores
 init(autoreset=True)
 
 # Configuración
-TEMP_DIR = Path(os.getcwd()) / "tmp"  # Usar una carpeta "tmp" en el directorio de ejecución
-TEMP_DIR.mkdir(exist_ok=True)  # Crear la carpeta si no existe
+TEMP_DIR = Path(os.getcwd()) / "tmp"  # Usar una carpeta "tmp" en el directorio de ejecución (la crea setup_dirs)
+# Subtítulos e info JSON: archivos pequeños que pueden ir a un tmpfs (--small-temp-dir)
+SMALL_TEMP_DIR = TEMP_DIR
+TEMP_SUBDIR = "yt-downloader"  # Subcarpeta propia dentro de --temp-dir y --small-temp-dir: la carpeta dada no se toca
+MIN_FREE_SPACE = 5 * 1024 ** 3  # Por debajo de este espacio libre en TEMP_DIR se pausan las descargas
+RESUME_FREE_SPACE = 8 * 1024 ** 3  # Se reanudan al recuperar este espacio (margen para no oscilar)
+DISK_CHECK_INTERVAL = 5  # Segundos entre comprobaciones del espacio libre
 FINAL_DIR = Path.cwd() / "Descargas_YT"
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "yt-downloader"
+SUBS_BATCH_CHARS = 4500  # Límite de caracteres por petición de traducción
+TRANSLATE_WINDOW = 500  # Bloques que se leen, traducen y guardan en el diario de una vez (memoria acotada)
+FOLDER_JOURNAL = ".translate-journal.jsonl"  # Archivos ya traducidos de una carpeta, uno por línea
+ROLLING_MIN_RATIO = 0.3  # Fracción de bloques que repiten el anterior a partir de la cual es un subtítulo automático
+CAPTION_UNIT_CHARS = 200  # Longitud máxima de una frase reconstruida de un subtítulo automático
+CAPTION_GAP_MS = 2000  # Un silencio más largo cierra la frase aunque no haya puntuación
+SENTENCE_END = ('.', '?', '!', '…', '。', '？', '！')
+TRANSLATE_CONCURRENCY = 4  # Peticiones de traducción simultáneas
+TRANSLATE_RATE = 5.0  # Peticiones por segundo permitidas hacia el servicio de traducción
+TRANSLATE_RETRIES = 3  # Reintentos con espera exponencial ante fallos
+TRANSLATE_TIMEOUT = 10  # Segundos máximos por petición; con latencias conocidas se usa menos
+HEALTH_WINDOW = 20  # Peticiones recientes por endpoint que cuentan para la latencia y la tasa de error
+BREAKER_FAILURES = 5  # Fallos seguidos que abren el circuito de un endpoint
+BREAKER_ERROR_RATE = 0.5  # Tasa de error en la ventana que también lo abre (con la ventana llena a medias)
+BREAKER_COOLDOWN = 30  # Segundos sin enviar a un endpoint abierto antes de probarlo (se dobla si la prueba falla)
+BREAKER_MAX_COOLDOWN = 300
+SUBS_WORKERS = 2  # Videos procesando subtítulos (búsqueda y traducción) a la vez
+MUX_WORKERS = 1  # Videos mezclándose con sus subtítulos a la vez (limitado por disco)
+DONE_MARKER = "YTDL_DONE:"  # Prefijo que imprime yt-dlp cuando un video está terminado
+DAEMON_PORT = 8765  # Puerto local (solo 127.0.0.1) del modo daemon
+DAEMON_WORKERS = 2  # Trabajos que el daemon ejecuta a la vez
+DAEMON_KEEP_JOBS = 200  # Trabajos terminados que el daemon recuerda (GET /jobs)
+DAEMON_JOB_TTL = 24 * 3600  # Segundos que se guarda un trabajo terminado
+WATCH_STATE = ".watch-state.json"  # Índice de una carpeta vigilada: huellas de los pares ya procesados
+WATCH_DEBOUNCE = 5  # Segundos sin cambiar de tamaño ni fecha para dar por terminado un archivo que llega
+WATCH_POLL_INTERVAL = 10  # Segundos entre pasadas de os.scandir cuando no hay inotify
+WATCH_WORKERS = 2  # Videos de una carpeta vigilada procesándose a la vez
+WATCH_HASH_SAMPLE = 1024 * 1024  # Bytes del principio, el medio y el final de un video que entran en su huella
+WATCH_PARTIAL = ('.part', '.tmp', '.crdownload', '.ytdl')  # Archivos que otro programa aún está escribiendo
+BATCH_WORKERS = 3  # Procesos yt-dlp simultáneos en modo lote
+BATCH_PER_HOST = 2  # Máximo de procesos yt-dlp simultáneos contra un mismo servidor
+BATCH_CHUNK = 10  # Videos de una lista que descarga cada turno antes de ceder a otra lista
+# El ID de YouTube entre corchetes identifica cada video aunque cambie su posición en la lista
+OUTPUT_TEMPLATE = '%(playlist_index)03d_%(title)s [%(id)s].%(ext)s'
+BATCH_OUTPUT_TEMPLATE = '%(title)s [%(id)s].%(ext)s'  # Varias listas comparten TEMP_DIR
+MANIFEST_PATH = FINAL_DIR / ".manifest.json"  # Etapas terminadas por video
+ARCHIVE_PATH = FINAL_DIR / ".download-archive.txt"  # Videos completos que yt-dlp no debe volver a bajar
+VIDEO_ID_PATTERN = re.compile(r'\[([\w-]{6,})\]$')
+SUBS_LANGS = 'en.*,es.*'  # Idiomas de subtítulos que se piden a yt-dlp
+TARGET_LANGUAGES = ['es']  # Idiomas a los que se traducen y se incrustan los subtítulos (--langs)
+LANGUAGE_NAMES = {'es': 'Español', 'en': 'English', 'fr': 'Français', 'de': 'Deutsch', 'it': 'Italiano',
+                  'pt': 'Português', 'ja': '日本語', 'ko': '한국어', 'zh': '中文', 'ru': 'Русский'}
+SUBS_BATCH_DIR = ".subs-batch"  # Subcarpeta de TEMP_DIR para la descarga de subtítulos por lotes
+# Códigos ISO 639-2 que yt-dlp escribe en las pistas incrustadas → nombres de archivo '.es.srt'
+ISO639_2 = {'spa': 'es', 'eng': 'en', 'fre': 'fr', 'fra': 'fr', 'ger': 'de', 'deu': 'de',
+            'ita': 'it', 'por': 'pt', 'jpn': 'ja', 'kor': 'ko', 'chi': 'zh', 'zho': 'zh', 'rus': 'ru'}
+# 'es' → 'spa' para las etiquetas de ffmpeg (se queda el primer código de cada idioma)
+ISO639_1 = {lang: code for code, lang in reversed(ISO639_2.items())}
+METRICS_LOG = CACHE_DIR / "metrics.jsonl"  # Un evento JSON por etapa terminada
+METRICS_LOG_MAX = 8 * 1024 * 1024  # Al superarlo, METRICS_LOG se recorta a sus últimos METRICS_LOG_KEEP bytes
+METRICS_LOG_KEEP = 256 * 1024  # Lo que lee recent_rate
+METRICS_PROM = CACHE_DIR / "yt_downloader.prom"  # Totales para el textfile collector de Prometheus
+LOCAL_MODELS_DIR = CACHE_DIR / "models"  # Modelos CTranslate2 del motor local, uno por par: models/en-es/
+DEPENDENCY_CACHE_PATH = CACHE_DIR / "dependencies.json"  # Versiones por ruta y fecha del binario
+METADATA_CACHE_PATH = CACHE_DIR / "video-metadata.json"  # Duración, tamaño y subtítulos por ID de video
+METADATA_TTL = 24 * 3600  # Segundos que vale un metadato en caché antes de volver a pedirlo
+PLAN_WORKERS = 4  # Procesos yt-dlp que piden metadatos a la vez al planificar una lista
+PLAN_CHUNK = 25  # Videos por proceso yt-dlp al pedir metadatos
+ESTIMATED_BITRATE = 4_000_000  # Bits por segundo de video supuestos cuando yt-dlp no da el tamaño
+ESTIMATED_AUDIO_BITRATE = 160_000  # Lo mismo en el modo solo audio
+DEPENDENCIES = {
+    'yt-dlp': ['--version'],
+    'mkvmerge': ['-V'],
+    'ffmpeg': ['-version'],
+}
+ENCODING_CHUNK = 64 * 1024  # Bloque de lectura al detectar y recodificar subtítulos
+ENCODING_SAMPLE_MAX = 1024 * 1024  # Bytes máximos que se pasan a chardet
+ENCODING_WORKERS = os.cpu_count() or 2  # Procesos para recodificar carpetas completas
+VIDEO_EXTENSIONS = ('.mkv', '.mp4', '.avi', '.mov')
+AUDIO_EXTENSIONS = ('.m4a', '.opus', '.ogg', '.mp3', '.flac', '.wav', '.aac')
+INTERMEDIATE_PATTERN = re.compile(r'\.f\d+(-\d+)?\.\w+$')  # Pistas sueltas antes de fusionar ('.f303.webm')
+LANG_TAG_PATTERN = re.compile(r'^[a-z]{2,3}(?:-[A-Za-z0-9]+)*$')  # es, en, es-419, en-orig...
+DETECT_SAMPLE_CUES = 40  # Bloques repartidos por el archivo que se usan para detectar el idioma
+MARKUP_PATTERN = re.compile(r'<[^>]+>|\{[^}]*\}')  # Etiquetas <i>, <font> y {\an8} de los SRT
+
+# Progreso de yt-dlp en JSON, una línea por actualización (--progress-template)
+PROGRESS_MARKER = "YTDL_PROGRESS:"
+PROGRESS_TEMPLATE = 'download:' + PROGRESS_MARKER + '{"id":%(info.id)j,"title":%(info.title)j,"progress":%(progress)j}'
+
+# Línea de tiempos SRT: "00:00:01,000 --> 00:00:04,000" (con posibles ajustes de posición detrás)
+TIMING_PATTERN = re.compile(r'^\s*(\d+:\d{2}:\d{2}[,.]\d{1,3})\s*-->\s*(\d+:\d{2}:\d{2}[,.]\d{1,3})')
+
+
+class SubtitleCue:
+    """Bloque de un archivo SRT: índice, tiempos y texto."""
+
+    __slots__ = ('index', 'start', 'end', 'timing', 'text')
+
+    def __init__(self, index, timing, text):
+        self.index = index
+        self.timing = timing  # Línea original de tiempos, se reescribe sin cambios
+        match = TIMING_PATTERN.match(timing)
+        self.start, self.end = match.groups() if match else (None, None)
+        self.text = text
+
+    def __repr__(self):
+        return f"SubtitleCue({self.index!r}, {self.start!r}, {self.end!r}, {self.text!r})"
+
+
+def parse_srt(content):
+    """
+    Convierte el contenido de un archivo SRT en una lista de SubtitleCue.
+
+    :param content: Texto completo del archivo.
+    :return: Lista de bloques en el orden del archivo.
+    """
+    content = content.lstrip('\ufeff').replace('\r\n', '\n').replace('\r', '\n')
+    cues = []
+    for block in re.split(r'\n[ \t]*\n', content.strip('\n')):
+        lines = block.split('\n')
+        timing_idx = next((i for i, line in enumerate(lines[:2]) if TIMING_PATTERN.match(line)), None)
+        if timing_idx is None:
+            # Texto con una línea en blanco en medio: pertenece al bloque anterior
+            if cues and block.strip():
+                cues[-1].text += '\n\n' + block
+            continue
+        index = lines[0].strip() if timing_idx == 1 else str(len(cues) + 1)
+        cues.append(SubtitleCue(index, lines[timing_idx], '\n'.join(lines[timing_idx + 1:])))
+    return cues
+
+
+def iter_srt(file):
+    """
+    Lee un SRT bloque a bloque desde un archivo abierto en modo texto, con las
+    mismas reglas que parse_srt pero sin cargarlo entero en memoria.
+    """
+    cue, block, count = None, [], 0
+    for number, line in enumerate(itertools.chain(file, ['\n'])):
+        line = line.rstrip('\r\n')
+        if number == 0:
+            line = line.lstrip('\ufeff')
+        if line.strip(' \t'):
+            block.append(line)
+            continue
+        if not block:
+            continue
+        timing_idx = next((i for i, text in enumerate(block[:2]) if TIMING_PATTERN.match(text)), None)
+        if timing_idx is None:
+            # Texto con una línea en blanco en medio: pertenece al bloque anterior
+            if cue:
+                cue.text += '\n\n' + '\n'.join(block)
+        else:
+            if cue:
+                yield cue
+            count += 1
+            index = block[0].strip() if timing_idx == 1 else str(count)
+            cue = SubtitleCue(index, block[timing_idx], '\n'.join(block[timing_idx + 1:]))
+        block = []
+    if cue:
+        yield cue
+
+
+def compose_srt(cues):
+    """Genera el texto SRT a partir de una lista de SubtitleCue."""
+    return ''.join(
+        f"{cue.index}\n{cue.timing}\n" + (f"{cue.text}\n" if cue.text else '') + "\n"
+        for cue in cues
+    )
+
+
+def batch_cues(cues, max_chars=SUBS_BATCH_CHARS, max_items=None):
+    """
+    Agrupa los bloques con texto en lotes que no superen max_chars (ni max_items bloques).
+
+    :return: Lista de lotes (listas de SubtitleCue) listos para traducir.
+    """
+    batches, current, size = [], [], 0
+    for cue in cues:
+        if not cue.text.strip():
+            continue  # Nada que traducir
+        length = len(cue.text) + 1  # +1 por el separador de línea
+        if current and (size + length > max_chars or len(current) == max_items):
+            batches.append(current)
+            current, size = [], 0
+        current.append(cue)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _rewrap(text, line_count):
+    """Reparte un texto traducido en el mismo número de líneas que el original."""
+    words = text.split()
+    if line_count <= 1 or len(words) < line_count:
+        return text
+    target = len(text) / line_count
+    lines, current = [], []
+    for word in words:
+        remaining = line_count - len(lines) - 1
+        current_len = len(' '.join(current))
+        if current and remaining and abs(current_len - target) < abs(current_len + 1 + len(word) - target):
+            lines.append(' '.join(current))
+            current = []
+        current.append(word)
+    lines.append(' '.join(current))
+    return '\n'.join(lines)
+
+
+def _timing_ms(value):
+    """'00:01:02,345' → 62345."""
+    hours, minutes, rest = value.replace('.', ',').split(':')
+    seconds, _, millis = rest.partition(',')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, '0'))
+
+
+def _format_ms(ms):
+    return f"{ms // 3600000:02}:{ms // 60000 % 60:02}:{ms // 1000 % 60:02},{ms % 1000:03}"
+
+
+def _split_by_weight(text, weights):
+    """Divide un texto en len(weights) trozos de palabras completas, proporcionales a weights."""
+    words = text.split()
+    ends, offset = [], 0  # Posición del final de cada palabra
+    for word in words:
+        offset += len(word) + 1
+        ends.append(offset)
+    total = sum(weights) or 1
+    pieces, used, acc = [], 0, 0
+    for i, weight in enumerate(weights):
+        acc += weight
+        target = acc / total * offset
+        # Corte en la palabra cuyo final queda más cerca de la proporción acumulada
+        cut = len(words) if i == len(weights) - 1 else min(
+            range(len(words) + 1), key=lambda n: abs((ends[n - 1] if n else 0) - target))
+        cut = min(len(words), max(cut, used + 1))  # Al menos una palabra mientras queden
+        pieces.append(' '.join(words[used:cut]))
+        used = cut
+    return pieces
+
+
+class CaptionUnits:
+    """
+    Subtítulo automático de YouTube reducido a frases para traducirlo una sola vez.
+
+    Los subtítulos automáticos se desplazan: cada bloque repite la línea del
+    anterior y añade una nueva. Aquí cada bloque se queda solo con su texto nuevo
+    (fragmento), los fragmentos se unen en frases (unidades) que son lo que se
+    traduce, y resegment() reparte cada traducción sobre los tiempos originales.
+    """
+
+    def __init__(self, fragments, spans, source_chars):
+        self.fragments = fragments  # [inicio ms, fin ms, texto nuevo]
+        self.spans = spans  # (primer fragmento, último + 1) de cada unidad
+        self.source_chars = source_chars
+        self.units = [
+            SubtitleCue(str(n), f"{_format_ms(fragments[first][0])} --> {_format_ms(fragments[last - 1][1])}",
+                        ' '.join(text for _, _, text in fragments[first:last]))
+            for n, (first, last) in enumerate(spans, start=1)
+        ]
+
+    @property
+    def saved_chars(self):
+        """Caracteres que ya no se envían a traducir."""
+        return self.source_chars - sum(len(unit.text) for unit in self.units)
+
+    @classmethod
+    def from_cues(cls, cues, max_chars=CAPTION_UNIT_CHARS, min_ratio=ROLLING_MIN_RATIO):
+        """:return: CaptionUnits, o None si el subtítulo no se desplaza (no hace falta normalizarlo)."""
+        timed = [cue for cue in cues if cue.start and cue.text.strip()]
+        fragments, previous, repeated = [], [], 0
+        for cue in timed:
+            lines = [' '.join(MARKUP_PATTERN.sub('', line).split()) for line in cue.text.split('\n')]
+            lines = [line for line in lines if line]
+            # Líneas iniciales que ya estaban al final del bloque anterior
+            overlap = next((k for k in range(min(len(lines), len(previous)), 0, -1)
+                            if lines[:k] == previous[-k:]), 0)
+            repeated += bool(overlap)
+            previous = lines
+            start, end = _timing_ms(cue.start), _timing_ms(cue.end)
+            if overlap < len(lines):
+                fragments.append([start, end, ' '.join(lines[overlap:])])
+            elif fragments:
+                fragments[-1][1] = max(fragments[-1][1], end)  # Repetición: el fragmento sigue en pantalla
+        if len(timed) < 2 or repeated < min_ratio * len(timed):
+            return None
+
+        spans, first, length = [], 0, 0
+        for i, fragment in enumerate(fragments):
+            if i + 1 < len(fragments):
+                fragment[1] = min(fragment[1], fragments[i + 1][0])  # Sin solaparse con el siguiente
+            if i > first and (length + len(fragment[2]) > max_chars or fragment[0] - fragments[i - 1][1] > CAPTION_GAP_MS):
+                spans.append((first, i))
+                first, length = i, 0
+            length += len(fragment[2]) + 1
+            if fragment[2].endswith(SENTENCE_END):
+                spans.append((first, i + 1))
+                first, length = i + 1, 0
+        if first < len(fragments):
+            spans.append((first, len(fragments)))
+        return cls(fragments, spans, sum(len(cue.text) for cue in timed))
+
+    def resegment(self, units):
+        """
+        Reparte el texto (traducido) de cada unidad entre sus fragmentos según su
+        longitud original y devuelve los bloques con los tiempos de los fragmentos.
+        """
+        cues = []
+        for unit, (first, last) in zip(units, self.spans):
+            group = self.fragments[first:last]
+            pieces = _split_by_weight(unit.text, [len(text) for _, _, text in group])
+            for (start, end, _), piece in zip(group, pieces):
+                if piece:
+                    cues.append(SubtitleCue(str(len(cues) + 1), f"{_format_ms(start)} --> {_format_ms(end)}", piece))
+                elif cues:
+                    # Traducción más corta: el bloque anterior se queda también este tiempo
+                    cues[-1] = SubtitleCue(cues[-1].index, f"{cues[-1].start} --> {_format_ms(end)}", cues[-1].text)
+        return cues
+
+
+def translate_cue_batch(cues, translate_fn):
+    """
+    Traduce un lote de bloques con una sola llamada al motor: un texto por bloque.
+
+    Si la respuesta no conserva el número de textos o el motor rechaza el lote,
+    este se divide en dos y se reintenta; un bloque que no se puede traducir
+    conserva su texto original. ServiceUnavailable (todo el servicio caído o
+    limitando) no se reparte: se propaga para que el diario guarde solo lo
+    traducido de verdad.
+
+    :param cues: Lista de SubtitleCue a traducir (se modifican en el sitio).
+    :param translate_fn: Función que recibe una lista de textos y devuelve sus traducciones.
+    :return: Lista de tuplas (texto original, traducción) de los bloques traducidos.
+    """
+    sources = [' '.join(cue.text.split()) for cue in cues]
+    try:
+        lines = [' '.join(line.split()) for line in translate_fn(sources)]
+        if len(lines) == len(cues):
+            for cue, line in zip(cues, lines):
+                cue.text = _rewrap(line, cue.text.count('\n') + 1)
+            return list(zip(sources, lines))
+        error = f"se esperaban {len(cues)} líneas y se recibieron {len(lines)}"
+    except ServiceUnavailable:
+        raise
+    except Exception as e:
+        error = e
+
+    if len(cues) == 1:
+        print(f"\n⚠ Error al traducir bloque {cues[0].index}: {cues[0].text[:50]}... | {error}")
+        return []
+    middle = len(cues) // 2
+    return translate_cue_batch(cues[:middle], translate_fn) + translate_cue_batch(cues[middle:], translate_fn)
+
+
+def translate_cues(cues, translate_fn, memory=None, src='auto', dest='es', concurrency=1, executor=None,
+                   max_chars=SUBS_BATCH_CHARS, max_items=None):
+    """
+    Traduce los bloques de un subtítulo consultando primero la memoria de traducción.
+
+    Los lotes se envían en paralelo (como máximo `concurrency` a la vez); cada
+    lote escribe en sus propios bloques, por lo que el orden se conserva.
+
+    :param cues: Lista de SubtitleCue (se modifican en el sitio).
+    :param translate_fn: Función que recibe una lista de textos y devuelve sus traducciones.
+    :param memory: TranslationMemory opcional; los aciertos no tocan la red.
+    :param concurrency: Número máximo de lotes en curso.
+    :param executor: Grupo de hilos compartido (varios idiomas a la vez); si se da, se ignora concurrency.
+    :param max_chars: Caracteres por lote; max_items: bloques por lote (límites del motor).
+    """
+    pending, reused = [], 0
+    for cue in cues:
+        if not cue.text.strip():
+            continue
+        cached = memory.get(src, dest, cue.text) if memory else None
+        if cached is None:
+            pending.append(cue)
+        else:
+            cue.text = _rewrap(cached, cue.text.count('\n') + 1)
+            reused += 1
+
+    if reused:
+        print(f"💾 {reused} bloques recuperados de la memoria de traducción")
+
+    batches = batch_cues(pending, max_chars, max_items)
+    with contextlib.ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, concurrency)))
+        futures = [executor.submit(translate_cue_batch, batch, translate_fn) for batch in batches]
+        for idx, future in enumerate(as_completed(futures), start=1):
+            print(f"Traduciendo lote {idx}/{len(batches)} ({dest})...", end="\r")
+            translated = future.result()
+            if memory and translated:
+                memory.put_many(src, dest, translated)
+
+
+class TranslationJournal:
+    """
+    Traducción en curso de un subtítulo a un idioma. Los bloques traducidos se
+    añaden a '.<destino>.part' a medida que terminan y, tras cada tramo, un
+    punto de control ('.<destino>.journal') guarda cuántos bloques del original
+    están hechos y hasta qué byte llega la parte válida. Otra ejecución con las
+    mismas entradas sigue desde ahí; al terminar, commit() renombra la parte al
+    destino de forma atómica.
+    """
+
+    def __init__(self, dest_path, inputs):
+        self.dest_path = Path(dest_path)
+        self.part_path = self.dest_path.with_name(f".{self.dest_path.name}.part")
+        self.checkpoint_path = self.dest_path.with_name(f".{self.dest_path.name}.journal")
+        self.inputs = inputs
+        self.source_done = 0  # Bloques del original ya traducidos
+        self.written = 0  # Bloques escritos en la parte (difieren si se reagrupan subtítulos automáticos)
+        offset = 0
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as file:
+                checkpoint = json.load(file)
+            if checkpoint["inputs"] == inputs and self.part_path.stat().st_size >= checkpoint["offset"]:
+                self.source_done, self.written, offset = \
+                    checkpoint["source_done"], checkpoint["written"], checkpoint["offset"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self.file = open(self.part_path, "r+b" if offset else "wb")
+        self.file.truncate(offset)  # Lo escrito después del último punto de control no cuenta
+        self.file.seek(offset)
+
+    @property
+    def resumed(self):
+        return self.source_done > 0
+
+    def append(self, cues, source_count, renumber=False):
+        """Añade los bloques traducidos de un tramo y guarda el punto de control."""
+        for cue in cues:
+            self.written += 1
+            if renumber:
+                cue.index = str(self.written)
+        self.file.write(compose_srt(cues).encode("utf-8"))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.source_done += source_count
+        checkpoint = {"inputs": self.inputs, "source_done": self.source_done,
+                      "written": self.written, "offset": self.file.tell()}
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(checkpoint, file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def commit(self):
+        """Publica la traducción completa con un rename atómico y borra el diario."""
+        self.file.close()
+        os.replace(self.part_path, self.dest_path)
+        self.checkpoint_path.unlink(missing_ok=True)
+        return self.dest_path
+
+    def close(self):
+        """Deja la parte y el punto de control para reanudar más tarde."""
+        self.file.close()
+
+class TranslationMemory:
+    """
+    Memoria de traducción persistente en SQLite con una caché en proceso delante.
+
+    Las entradas se identifican por (idioma origen, idioma destino, texto normalizado)
+    y se desalojan por antigüedad de uso cuando se supera max_entries.
+    """
+
+    def __init__(self, db_path, max_entries=200_000, front_size=10_000):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.front_size = front_size
+        self.front = OrderedDict()
+        self.touched = set()  # Claves servidas desde la caché en proceso, pendientes de marcar en disco
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        except (OSError, sqlite3.Error) as e:
+            print(Fore.YELLOW + f"⚠ Memoria de traducción no disponible en disco ({e}), usando memoria temporal")
+            self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                src TEXT, dest TEXT, text TEXT, translation TEXT, last_used REAL,
+                PRIMARY KEY (src, dest, text)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON translations (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.split())
+
+    def get(self, src, dest, text):
+        """Devuelve la traducción guardada o None si no existe."""
+        key = (src, dest, self.normalize(text))
+        with self.lock:
+            if key in self.front:
+                self.front.move_to_end(key)
+                self.touched.add(key)
+                self.hits += 1
+                return self.front[key]
+            row = self.conn.execute(
+                "SELECT translation FROM translations WHERE src=? AND dest=? AND text=?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                "UPDATE translations SET last_used=? WHERE src=? AND dest=? AND text=?", (time.time(), *key)
+            )
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, src, dest, text, translation):
+        self.put_many(src, dest, [(text, translation)])
+
+    def put_many(self, src, dest, pairs):
+        """Guarda varias traducciones en una sola transacción."""
+        now = time.time()
+        rows = [(src, dest, self.normalize(text), translation, now) for text, translation in pairs]
+        with self.lock:
+            for row in rows:
+                self._remember(row[:3], row[3])
+            self.conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)", rows)
+            self._flush_touched(now)
+            self._evict()
+            self.conn.commit()
+
+    def _remember(self, key, translation):
+        self.front[key] = translation
+        self.front.move_to_end(key)
+        while len(self.front) > self.front_size:
+            self.front.popitem(last=False)
+
+    def _flush_touched(self, now):
+        if self.touched:
+            self.conn.executemany(
+                "UPDATE translations SET last_used=? WHERE src=? AND dest=? AND text=?",
+                [(now, *key) for key in self.touched]
+            )
+            self.touched.clear()
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'front_entries': len(self.front)}
+
+    def close(self):
+        with self.lock:
+            self._flush_touched(time.time())
+            self.conn.commit()
+            self.conn.close()
+
+
+def probe_dependencies(cache_path=DEPENDENCY_CACHE_PATH):
+    """
+    Localiza los programas externos con shutil.which y obtiene su versión.
+
+    La versión se guarda en disco por ruta y fecha de modificación del binario,
+    así que solo se ejecuta `--version` cuando el programa cambia.
+
+    :return: Diccionario {nombre: versión} (None si el programa no está instalado).
+    """
+    cache_path = Path(cache_path)
+    try:
+        with open(cache_path, encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        cache = {}
+
+    versions, changed = {}, False
+    for name, version_args in DEPENDENCIES.items():
+        binary = shutil.which(name)
+        if not binary:
+            versions[name] = None
+            continue
+        mtime = os.stat(binary).st_mtime_ns
+        cached = cache.get(binary)
+        if not cached or cached.get("mtime") != mtime:
+            try:
+                result = subprocess.run([binary, *version_args], capture_output=True, text=True, timeout=30)
+                output = (result.stdout or result.stderr).strip()
+            except (OSError, subprocess.SubprocessError):
+                output = ""
+            cached = {"mtime": mtime, "version": output.splitlines()[0] if output else "?"}
+            cache[binary] = cached
+            changed = True
+        versions[name] = cached["version"]
+
+    if changed:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(cache, file, indent=1)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # Sin caché: la próxima vez se vuelve a preguntar la versión
+    return versions
+
+
+class Metrics:
+    """
+    Métricas de rendimiento por etapa (download, subs, translate, translate_request,
+    encoding, mux). Cada medición se añade como línea JSON a METRICS_LOG y los
+    totales se vuelcan en formato Prometheus a METRICS_PROM. Cuando el registro
+    pasa de log_max bytes se queda solo con su final, lo que consulta recent_rate.
+    """
+
+    PROM_INTERVAL = 5.0  # Segundos mínimos entre escrituras del archivo Prometheus
+
+    def __init__(self, log_path=METRICS_LOG, prom_path=METRICS_PROM, log_max=METRICS_LOG_MAX):
+        self.log_path = Path(log_path)
+        self.prom_path = Path(prom_path)
+        self.log_max = log_max
+        self.lock = threading.Lock()
+        self.totals = {}  # (métrica, etapa) → valor acumulado
+        self.gauges = {}  # (métrica, etiquetas) → último valor
+        self.last_prom = 0.0
+        self.log_file = None
+
+    def observe(self, stage, seconds, **fields):
+        """
+        Registra una medición. Los campos numéricos (bytes, cues, chars...) se
+        acumulan en los totales; las tasas (*_per_second) y el resto solo aparecen
+        en el registro JSON, porque sumarlas no tiene sentido.
+        """
+        event = {'ts': time.time(), 'stage': stage, 'seconds': round(seconds, 6), **fields}
+        with self.lock:
+            self._add('duration_seconds', stage, seconds)
+            self._add('runs', stage, 1)
+            for name, value in fields.items():
+                if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                        and not name.endswith('_per_second')):
+                    self._add(name, stage, value)
+            try:
+                if self.log_file is None:
+                    self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                    self.log_file = open(self.log_path, "a", encoding="utf-8", buffering=1)
+                self.log_file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+                if self.log_file.tell() > self.log_max:
+                    self._trim_log()
+            except OSError:
+                pass  # Las métricas nunca deben interrumpir el trabajo
+            if time.monotonic() - self.last_prom >= self.PROM_INTERVAL:
+                self._write_prom()
+
+    @contextmanager
+    def timer(self, stage, **fields):
+        """Mide un bloque; el bloque puede añadir campos al diccionario que recibe."""
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.observe(stage, time.perf_counter() - start, **fields)
+
+    def gauge(self, name, value, **labels):
+        """Valor instantáneo (estado de un endpoint, latencia...) para el archivo Prometheus."""
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def flush(self):
+        with self.lock:
+            self._write_prom()
+
+    def recent_rate(self, stage, field, samples=50, tail_bytes=METRICS_LOG_KEEP):
+        """
+        Mediana de un campo (p. ej. bytes_per_second) en las últimas mediciones
+        de una etapa guardadas en METRICS_LOG, o None si no hay historial.
+        """
+        try:
+            with open(self.log_path, "rb") as file:
+                file.seek(max(0, file.seek(0, os.SEEK_END) - tail_bytes))
+                lines = file.read().decode("utf-8", errors="replace").splitlines()[1:]
+        except OSError:
+            return None
+        values = []
+        for line in reversed(lines):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get('stage') == stage and isinstance(event.get(field), (int, float)) and event[field] > 0:
+                values.append(event[field])
+                if len(values) >= samples:
+                    break
+        return sorted(values)[len(values) // 2] if values else None
+
+    def _trim_log(self):
+        """Deja en el registro sus últimos METRICS_LOG_KEEP bytes (líneas completas)."""
+        self.log_file.close()
+        self.log_file = None  # Se reabre en la próxima medición
+        with open(self.log_path, "rb") as file:
+            file.seek(max(0, file.seek(0, os.SEEK_END) - METRICS_LOG_KEEP))
+            tail = file.read()
+        tail = tail[tail.find(b"\n") + 1:]  # La primera línea queda cortada
+        tmp_path = self.log_path.with_suffix(".tmp")
+        tmp_path.write_bytes(tail)
+        os.replace(tmp_path, self.log_path)
+
+    def _add(self, name, stage, value):
+        key = (name, stage)
+        self.totals[key] = self.totals.get(key, 0) + value
+
+    def _write_prom(self):
+        self.last_prom = time.monotonic()
+        lines = []
+        for name in sorted({name for name, _ in self.totals}):
+            metric = f"ytd_stage_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (other, stage), value in sorted(self.totals.items()):
+                if other == name:
+                    lines.append(f'{metric}{{stage="{stage}"}} {round(value, 6)}')
+        for name in sorted({name for name, _ in self.gauges}):
+            metric = f"ytd_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for (other, labels), value in sorted(self.gauges.items()):
+                if other == name:
+                    label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                    lines.append(f'{metric}{{{label_text}}} {round(value, 6)}')
+        try:
+            self.prom_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.prom_path.with_suffix(".tmp")
+            tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            os.replace(tmp_path, self.prom_path)  # El collector nunca lee un archivo a medias
+        except OSError:
+            pass
+
+
+METRICS = Metrics()
+
+
+class DownloadProgress:
+    """Evento de progreso de yt-dlp leído de una línea PROGRESS_TEMPLATE."""
+
+    __slots__ = ('video_id', 'title', 'status', 'filename', 'downloaded_bytes',
+                 'total_bytes', 'speed', 'eta', 'elapsed')
+
+    def __init__(self, video_id, title, progress):
+        self.video_id = video_id
+        self.title = title or video_id or ''
+        self.status = progress.get('status')
+        self.filename = progress.get('filename')
+        self.downloaded_bytes = progress.get('downloaded_bytes') or 0
+        self.total_bytes = progress.get('total_bytes') or progress.get('total_bytes_estimate')
+        self.speed = progress.get('speed')
+        self.eta = progress.get('eta')
+        self.elapsed = progress.get('elapsed')
+
+    @property
+    def percent(self):
+        if self.status == 'finished':
+            return 100.0
+        return 100.0 * self.downloaded_bytes / self.total_bytes if self.total_bytes else 0.0
+
+    @classmethod
+    def from_line(cls, line):
+        """Devuelve el evento o None si la línea no es de progreso."""
+        if not line.startswith(PROGRESS_MARKER):
+            return None
+        try:
+            data = json.loads(line[len(PROGRESS_MARKER):])
+            return cls(data.get('id'), data.get('title'), data.get('progress') or {})
+        except (ValueError, AttributeError):
+            return None
+
+    def record(self):
+        """Anota en las métricas un archivo terminado (video o audio por separado)."""
+        if self.status == 'finished' and self.elapsed:
+            size = self.total_bytes or self.downloaded_bytes
+            METRICS.observe('download', self.elapsed, bytes=size,
+                            bytes_per_second=round(size / self.elapsed), video=self.video_id)
+
+
+class TranslationError(Exception):
+    """No se pudo obtener una traducción de ningún endpoint."""
+
+
+class ServiceUnavailable(TranslationError):
+    """
+    Falla el servicio entero, no un texto: todos los endpoints con el circuito
+    abierto o limitando con 429, o un motor local sin modelo para el par de
+    idiomas. Repetir bloque a bloque no sirve; se detiene el idioma y el diario
+    lo retoma en la próxima ejecución.
+    """
+
+
+class RateLimiter:
+    """Cubeta de fichas: permite `rate` peticiones por segundo con ráfagas de hasta `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class EndpointHealth:
+    """
+    Salud de un endpoint de traducción: latencia media móvil, tasa de error de
+    las últimas HEALTH_WINDOW peticiones y un cortacircuitos.
+
+    Cerrado: recibe peticiones. Abierto (tras BREAKER_FAILURES fallos seguidos
+    o una tasa de error de BREAKER_ERROR_RATE): no recibe nada durante el
+    enfriamiento. Semiabierto: pasa una sola petición de prueba; si sale bien se
+    cierra y si no, vuelve a abrirse con el doble de enfriamiento.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}  # Para la métrica endpoint_state
+
+    def __init__(self, url, window=HEALTH_WINDOW, failures=BREAKER_FAILURES, error_rate=BREAKER_ERROR_RATE,
+                 cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.url = url
+        self.results = deque(maxlen=window)  # True/False de las últimas peticiones
+        self.latency = None  # Media móvil exponencial de las respuestas correctas, en segundos
+        self.failures = failures
+        self.error_limit = error_rate
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def error_rate(self):
+        return self.results.count(False) / len(self.results) if self.results else 0.0
+
+    def acquire(self):
+        """
+        Indica si se le puede enviar una petición ahora. En estado semiabierto
+        solo la primera llamada recibe True: es la petición de prueba.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def available(self):
+        """Como acquire() pero sin reservar la petición de prueba: sirve para ordenar y descartar."""
+        with self.lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return self.state == self.CLOSED or not self.probing
+
+    def retry_in(self):
+        """Segundos hasta que el endpoint vuelva a admitir una petición (0 si ya la admite)."""
+        with self.lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def timeout(self):
+        """Límite de la petición: holgado respecto a la latencia habitual, nunca más de TRANSLATE_TIMEOUT."""
+        with self.lock:
+            return TRANSLATE_TIMEOUT if self.latency is None else min(TRANSLATE_TIMEOUT, max(3.0, 5 * self.latency))
+
+    def record(self, ok, seconds, retry_after=None):
+        """Anota el resultado de una petición y abre o cierra el circuito."""
+        with self.lock:
+            self.results.append(ok)
+            if ok:
+                self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+                self.consecutive_failures = 0
+                if self.state != self.CLOSED:
+                    self.cooldown = self.base_cooldown
+                    self._set_state(self.CLOSED)
+            else:
+                self.consecutive_failures += 1
+                if self.state == self.HALF_OPEN:
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                    self._open(retry_after)
+                elif self.state == self.CLOSED and (
+                        retry_after or self.consecutive_failures >= self.failures
+                        or (len(self.results) >= self.results.maxlen // 2 and self.error_rate >= self.error_limit)):
+                    self._open(retry_after)
+            self.probing = False
+            self._publish()
+
+    def _open(self, retry_after=None):
+        if retry_after:
+            self.cooldown = min(self.max_cooldown, max(self.cooldown, retry_after))  # 429 con Retry-After
+        self.opened_at = time.monotonic()
+        self._set_state(self.OPEN)
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        METRICS.observe(f'endpoint_{state}', 0, endpoint=self.url)
+        self._publish()
+
+    def _publish(self):
+        METRICS.gauge('endpoint_state', self.STATE_VALUES[self.state], endpoint=self.url)
+        METRICS.gauge('endpoint_error_rate', self.error_rate, endpoint=self.url)
+        if self.latency is not None:
+            METRICS.gauge('endpoint_latency_seconds', self.latency, endpoint=self.url)
+
+def _retry_after(value):
+    """Segundos de una cabecera Retry-After numérica (la forma con fecha se ignora)."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class TranslationBackend:
+    """
+    Interfaz de los motores de traducción.
+
+    Un motor traduce listas de textos (uno por bloque de subtítulo) y declara sus
+    límites; translate_subs forma los lotes y decide cuántos envía a la vez con ellos.
+    """
+
+    name = None
+    max_batch_chars = SUBS_BATCH_CHARS  # Caracteres por lote
+    max_batch_items = None  # Textos por lote (None: sin límite)
+    concurrency = 1  # Lotes simultáneos
+    detect_lock = threading.Lock()  # La fábrica de langdetect no es segura entre hilos
+
+    def translate_batch(self, texts, src='auto', dest='es'):
+        """
+        :return: Lista de traducciones en el mismo orden que texts.
+        :raises TranslationError: Si el motor no puede traducir el lote.
+        """
+        raise NotImplementedError
+
+    def detect(self, text):
+        """Código del idioma de un texto; por defecto con langdetect, sin red."""
+        with self.detect_lock:
+            from langdetect import detect, DetectorFactory
+
+            DetectorFactory.seed = 0
+            return detect(text)
+
+    def memory_src(self, src):
+        """Idioma de origen con el que se guarda en la memoria de traducción: cada motor tiene sus entradas."""
+        return f"{self.name}:{src}"
+
+
+class Translator(TranslationBackend):
+    """
+    Motor de Google: dos endpoints web gratuitos, reintentos y límite de peticiones.
+
+    Cada petición va al endpoint sano más rápido según su EndpointHealth; los que
+    fallan seguido dejan de recibir peticiones hasta que una prueba sale bien.
+    """
+
+    name = 'google'
+    EXPLORE = 0.05  # Fracción de peticiones que van a otro endpoint sano para seguir midiendo su latencia
+
+    def __init__(self, concurrency=TRANSLATE_CONCURRENCY, rate=TRANSLATE_RATE,
+                 retries=TRANSLATE_RETRIES, backoff=0.5,
+                 base_url="https://translate.googleapis.com/translate_a/single",
+                 fallback_url="https://clients5.google.com/translate_a/t"):
+        self._session = None
+        self.session_lock = threading.Lock()
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, burst=concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.base_url = base_url
+        self.fallback_url = fallback_url
+        self.endpoints = [EndpointHealth(url) for url in dict.fromkeys((base_url, fallback_url))]
+
+    def route(self):
+        """
+        Endpoints a probar en orden: los sanos de menor a mayor latencia (los no
+        medidos primero, para medirlos) y, de vez en cuando, otro en cabeza.
+        No reserva nada: translate_text llama a acquire() justo antes de enviar
+        a cada uno, así la prueba de un endpoint semiabierto no se queda tomada
+        por uno al que nunca se llega.
+        """
+        ranked = sorted(self.endpoints, key=lambda health: health.latency or 0.0)
+        if len(ranked) > 1 and random.random() < self.EXPLORE:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return [health for health in ranked if health.available()]
+
+    @property
+    def session(self):
+        """Sesión HTTP creada en el primer uso (requests tarda en importarse)."""
+        if self._session is None:
+            with self.session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    # Una conexión reutilizable por cada petición simultánea
+                    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.concurrency)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def memory_src(self, src):
+        return src  # Mantiene las entradas guardadas antes de que hubiera varios motores
+
+    def translate_batch(self, texts, src='auto', dest='es'):
+        """Una sola petición con un texto por línea."""
+        return (self.translate_text('\n'.join(texts), src, dest) or '').strip().split('\n')
+
+    def translate_text(self, text, src='en', dest='es'):
+        """
+        Traduce un texto (puede tener varias líneas) sin pasar por la memoria.
+
+        Prueba los endpoints en el orden de route(); si todos fallan (o tienen el
+        circuito abierto), reintenta con espera exponencial. Un 4xx distinto de
+        429 es un problema del texto, no del endpoint: no cuenta como fallo para
+        el cortacircuitos ni se reintenta.
+
+        :raises ServiceUnavailable: Si al agotar los reintentos todos los circuitos
+            están abiertos o el servidor limita con 429.
+        :raises TranslationError: Si el texto no se pudo traducir por otra causa.
+        """
+        from requests import RequestException
 
-class Translator:
-    def __init__(self):
-        self.session = requests.Session()
-        self.base_url = "https://translate.googleapis.com/translate_a/single"
-        self.fallback_url = "https://clients5.google.com/translate_a/t"
-        
-    def translate(self, text, src='en', dest='es'):
         params = {
             'client': 'gtx',
             'sl': src,
             'tl': dest,
             'dt': 't',
-            'q': text
         }
-        
+        error, throttled = None, False
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1) + random.uniform(0, self.backoff))
+            endpoints = self.route()
+            if not endpoints:
+                # Todos abiertos: esperar a la primera prueba en vez de gastar el intento
+                time.sleep(min(health.retry_in() for health in self.endpoints))
+                endpoints = self.route()
+                error = error or "todos los endpoints tienen el circuito abierto"
+            sent = rejected = 0
+            for health in endpoints:
+                if not health.acquire():
+                    continue  # Otra petición se llevó la prueba o el circuito se abrió entre tanto
+                sent += 1
+                url = health.url
+                self.limiter.acquire()
+                started = time.perf_counter()
+                retry_after, throttled = None, False
+                try:
+                    # El texto va en el cuerpo para no superar la longitud máxima de URL
+                    response = self.session.post(url, params=params, data={'q': text}, timeout=health.timeout())
+                    if response.status_code == 200:
+                        translated = self._parse(url, response.json())
+                        elapsed = time.perf_counter() - started
+                        health.record(True, elapsed)
+                        METRICS.observe('translate_request', elapsed, chars=len(text), endpoint=url)
+                        return translated
+                    error = f"HTTP {response.status_code} en {url}"
+                    if response.status_code == 429:
+                        throttled = True
+                        retry_after = _retry_after(response.headers.get('Retry-After'))
+                    elif 400 <= response.status_code < 500:
+                        # El endpoint responde bien; lo que no admite es este texto
+                        elapsed = time.perf_counter() - started
+                        health.record(True, elapsed)
+                        METRICS.observe('translate_request', elapsed, errors=1, endpoint=url)
+                        rejected += 1
+                        continue
+                except (RequestException, ValueError, IndexError, TypeError) as e:
+                    error = e
+                elapsed = time.perf_counter() - started
+                health.record(False, elapsed, retry_after)
+                METRICS.observe('translate_request', elapsed, errors=1, endpoint=url)
+            if sent and rejected == sent:
+                break  # Todos rechazaron el texto: reintentar daría lo mismo
+        if throttled or not any(health.available() for health in self.endpoints):
+            raise ServiceUnavailable(str(error))
+        raise TranslationError(str(error))
+
+    def health_report(self):
+        """Estado de cada endpoint: {url: {state, latency, error_rate}}."""
+        return {health.url: {'state': health.state, 'latency': health.latency, 'error_rate': health.error_rate}
+                for health in self.endpoints}
+
+    def _parse(self, url, data):
+        if url == self.base_url:
+            # [[["traducción", "original", ...], ...], ...]: una entrada por frase
+            return ''.join(segment[0] for segment in data[0] if segment and segment[0])
+        first = data[0]
+        return first[0] if isinstance(first, list) else first
+
+
+class LocalBackend(TranslationBackend):
+    """
+    Motor local en CPU, sin red: modelos CTranslate2 (p. ej. OPUS-MT convertidos
+    con ct2-transformers-converter) en LOCAL_MODELS_DIR/<origen>-<destino>/ con
+    sus tokenizadores source.spm y target.spm. Cada lote se traduce en una sola
+    llamada al modelo, que reparte el trabajo entre los núcleos.
+    """
+
+    name = 'local'
+    max_batch_chars = 20000
+    max_batch_items = 64
+    concurrency = 1  # El modelo ya usa todos los núcleos en cada lote
+
+    def __init__(self, models_dir=LOCAL_MODELS_DIR, threads=None, beam_size=2):
+        self.models_dir = Path(models_dir)
+        self.threads = threads or os.cpu_count() or 1
+        self.beam_size = beam_size
+        self.models = {}
+        self.lock = threading.Lock()
+
+    def _load(self, src, dest):
+        """Modelo y tokenizadores de un par de idiomas, cargados en el primer uso."""
+        key = f"{src}-{dest}"
+        with self.lock:
+            if key not in self.models:
+                model_dir = self.models_dir / key
+                if not model_dir.is_dir():
+                    raise ServiceUnavailable(f"No hay modelo local para {key} en {model_dir}")
+                try:
+                    import ctranslate2
+                    import sentencepiece
+                except ImportError:
+                    raise ServiceUnavailable("El motor local necesita: pip install ctranslate2 sentencepiece")
+                self.models[key] = (
+                    ctranslate2.Translator(str(model_dir), device="cpu", intra_threads=self.threads),
+                    sentencepiece.SentencePieceProcessor(model_file=str(model_dir / "source.spm")),
+                    sentencepiece.SentencePieceProcessor(model_file=str(model_dir / "target.spm")),
+                )
+            return self.models[key]
+
+    def translate_batch(self, texts, src='auto', dest='es'):
+        if src == 'auto':
+            src = self.detect(' '.join(texts))
+        if src == dest:
+            return list(texts)
+        model, source_sp, target_sp = self._load(src, dest)
+        tokens = [source_sp.encode(text, out_type=str) for text in texts]
+        started = time.perf_counter()
+        results = model.translate_batch(tokens, max_batch_size=self.max_batch_items, beam_size=self.beam_size)
+        METRICS.observe('translate_request', time.perf_counter() - started,
+                        chars=sum(map(len, texts)), endpoint=f"local:{src}-{dest}")
+        return [target_sp.decode(result.hypotheses[0]) for result in results]
+
+
+class FakeBackend(TranslationBackend):
+    """Motor determinista para pruebas: devuelve '[es] texto' sin red ni modelos."""
+
+    name = 'fake'
+    concurrency = TRANSLATE_CONCURRENCY
+
+    def __init__(self, latency=0.0):
+        self.latency = latency  # Segundos por lote, para simular un motor lento
+
+    def translate_batch(self, texts, src='auto', dest='es'):
+        time.sleep(self.latency)
+        return [f"[{dest}] {text}" for text in texts]
+
+    def detect(self, text):
+        return 'es' if re.search(r'[áéíóúñ¿¡]', text.lower()) else 'en'
+
+
+TRANSLATION_BACKENDS = {'google': Translator, 'local': LocalBackend, 'fake': FakeBackend}
+
+def video_id_from_path(path):
+    """Extrae el ID de YouTube del nombre del archivo ('... [ID].mkv') o None."""
+    match = VIDEO_ID_PATTERN.search(Path(path).stem)
+    return match.group(1) if match else None
+
+
+def language_name(lang):
+    """Nombre de pista para un código de idioma ('es' → 'Español')."""
+    return LANGUAGE_NAMES.get(lang, lang)
+
+
+def file_fingerprint(path, full_hash=True):
+    """
+    Huella de un archivo para detectar cambios entre ejecuciones.
+
+    Los subtítulos se resumen con SHA-256; para videos de varios GB basta
+    con tamaño y fecha de modificación (full_hash=False).
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    if not full_hash:
+        stat = path.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sample_fingerprint(path, sample=WATCH_HASH_SAMPLE):
+    """
+    Huella de contenido barata para videos grandes: SHA-256 del tamaño y de tres
+    trozos (principio, medio y final). Distingue un video reemplazado de uno que
+    solo cambió de fecha sin leer varios GB.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as file:
+        for offset in sorted({0, max(0, size // 2 - sample // 2), max(0, size - sample)}):
+            file.seek(offset)
+            digest.update(file.read(sample))
+    return digest.hexdigest()
+
+
+# Marcas de orden de bytes; UTF-32 va antes porque su BOM LE empieza como el de UTF-16 LE
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def detect_encoding(path, chunk_size=ENCODING_CHUNK):
+    """Detecta la codificación de un archivo (ver _detect_encoding) y mide cuánto tarda."""
+    with METRICS.timer('encoding') as fields:
+        fields['encoding'] = encoding = _detect_encoding(path, chunk_size)
+    return encoding
+
+
+def _sniff_encoding(file, chunk_size=ENCODING_CHUNK):
+    """
+    Codificaciones que se deciden sin chardet: BOM al inicio, UTF-16 sin BOM o
+    UTF-8 (y ASCII) validado con un decodificador incremental.
+
+    :param file: Archivo abierto en binario, al principio.
+    :return: Nombre del códec o None si hace falta chardet.
+    """
+    head = file.read(chunk_size)
+    for bom, name in BOMS:
+        if head.startswith(bom):
+            return name
+
+    # UTF-16 sin BOM: texto latino con bytes nulos alternos
+    if b'\x00' in head:
+        return 'utf-16-le' if head[1::2].count(0) > head[0::2].count(0) else 'utf-16-be'
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        chunk = head
+        while chunk:
+            decoder.decode(chunk)
+            chunk = file.read(chunk_size)
+        decoder.decode(b'', final=True)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return None
+
+
+def _detect_encoding(path, chunk_size=ENCODING_CHUNK):
+    """
+    Detecta la codificación de un archivo leyéndolo por bloques.
+
+    1. BOM, UTF-16 sin BOM o UTF-8 válido (_sniff_encoding).
+    2. Resto: se alimenta a chardet hasta que está seguro o se alcanza
+       ENCODING_SAMPLE_MAX.
+
+    :return: Nombre del códec en minúsculas (ejemplo: 'utf-8', 'windows-1252').
+    """
+    with open(path, "rb") as file:
+        encoding = _sniff_encoding(file, chunk_size)
+        if encoding:
+            return encoding
+
+        import chardet
+
+        file.seek(0)
+        detector = chardet.UniversalDetector()
+        read = 0
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            detector.feed(chunk)
+            read += len(chunk)
+            if detector.done or read >= ENCODING_SAMPLE_MAX:
+                break
+        detector.close()
+    return (detector.result.get('encoding') or 'latin-1').lower()
+
+
+def transcode_to_utf8(src, dest, encoding, chunk_size=ENCODING_CHUNK):
+    """Recodifica src a UTF-8 en dest en una sola pasada y con memoria acotada."""
+    dest = Path(dest)
+    tmp_path = dest.with_name(f".{dest.name}.part")
+    try:
+        with open(src, "r", encoding=encoding, newline='') as source, \
+                open(tmp_path, "w", encoding="utf-8", newline='') as target:
+            shutil.copyfileobj(source, target, chunk_size)
+        os.replace(tmp_path, dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return dest
+
+
+def convert_srt_file(srt_path):
+    """
+    Deja un .srt en UTF-8: lo devuelve tal cual si ya lo está o crea un .utf8.srt.
+
+    :return: Tupla (ruta en UTF-8, codificación detectada).
+    """
+    srt_path = Path(srt_path)
+    encoding = detect_encoding(srt_path)
+    if encoding == 'utf-8':
+        return srt_path, encoding
+    return transcode_to_utf8(srt_path, srt_path.with_suffix(".utf8.srt"), encoding), encoding
+
+
+def _convert_srt_worker(srt_path):
+    """
+    Versión para ProcessPoolExecutor: devuelve el error en lugar de lanzarlo y
+    no toca METRICS (su bloqueo no es de este proceso); el tiempo de detección
+    vuelve en la tupla para registrarlo en el proceso principal.
+    """
+    try:
+        start = time.perf_counter()
+        encoding = _detect_encoding(srt_path)
+        seconds = time.perf_counter() - start
+        if encoding == 'utf-8':
+            return srt_path, srt_path, encoding, None, seconds
+        return srt_path, transcode_to_utf8(srt_path, srt_path.with_suffix(".utf8.srt"), encoding), encoding, None, seconds
+    except Exception as e:
+        return srt_path, None, None, str(e), None
+
+
+def convert_srt_batch(srt_paths, workers=ENCODING_WORKERS):
+    """
+    Recodifica muchos subtítulos a UTF-8 repartiéndolos entre procesos.
+
+    Los procesos se arrancan con 'spawn': un fork copiaría los bloqueos que
+    otros hilos (daemon, vigilancia, pipeline) tuvieran tomados en ese momento.
+    Solo si el módulo se cargó desde su ruta con otro nombre (las pruebas de
+    rendimiento) se usa 'fork', porque un proceso nuevo no podría importarlo.
+
+    :return: Lista de tuplas (original, ruta UTF-8 o None, codificación, error) en el orden de entrada.
+    """
+    srt_paths = [Path(path) for path in srt_paths]
+    if workers <= 1 or len(srt_paths) < 2 * workers:
+        results = [_convert_srt_worker(path) for path in srt_paths]  # No compensa arrancar procesos
+    else:
+        importable = __name__ == "__main__" or importlib.machinery.PathFinder.find_spec(__name__) is not None
+        context = multiprocessing.get_context("spawn" if importable or os.name == "nt" else "fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = list(executor.map(_convert_srt_worker, srt_paths, chunksize=32))
+    for _, _, encoding, _, seconds in results:
+        if seconds is not None:
+            METRICS.observe('encoding', seconds, encoding=encoding)
+    return [result[:4] for result in results]
+
+
+class LanguageDetector:
+    """
+    Detección local del idioma de un subtítulo a partir del texto de sus bloques.
+
+    Los perfiles de langdetect se cargan una vez con semilla fija (resultados
+    reproducibles) y cada resultado se guarda por hash del contenido del archivo.
+    """
+
+    def __init__(self, cache_path, sample_cues=DETECT_SAMPLE_CUES):
+        self.sample_cues = sample_cues
+        self.lock = threading.Lock()
+        self.cache = {}
+        self._detect = None
         try:
-            # Intentar con el endpoint principal
-            response = self.session.get(self.base_url, params=params, timeout=10)
-            if response.status_code == 200:
-                translated = json.loads(response.text)[0][0][0]
-                return translated
-                
-            # Fallback a endpoint alternativo
-            response = self.session.get(self.fallback_url, params=params, timeout=10)
-            if response.status_code == 200:
-                return response.json()[0]
-                
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(cache_path), check_same_thread=False)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS languages (hash TEXT PRIMARY KEY, lang TEXT)")
+            self.conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(Fore.YELLOW + f"⚠ Caché de idiomas no disponible ({e})")
+            self.conn = None
+
+    def sample_text(self, content):
+        """Texto de hasta sample_cues bloques repartidos uniformemente, sin índices, tiempos ni etiquetas."""
+        texts = [cue.text for cue in parse_srt(content) if cue.text.strip()]
+        if len(texts) > self.sample_cues:
+            step = len(texts) / self.sample_cues
+            texts = [texts[int(i * step)] for i in range(self.sample_cues)]
+        return MARKUP_PATTERN.sub('', ' '.join(' '.join(texts).split()))
+
+    def detect_file(self, sub_path):
+        """
+        :return: Código del idioma (ejemplo: 'es', 'en').
+        :raises LangDetectException: Si el archivo no tiene texto reconocible.
+        """
+        with open(sub_path, "rb") as file:
+            raw_data = file.read()
+        key = hashlib.sha256(raw_data).hexdigest()
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+            if self.conn:
+                row = self.conn.execute("SELECT lang FROM languages WHERE hash=?", (key,)).fetchone()
+                if row:
+                    self.cache[key] = row[0]
+                    return row[0]
+
+        encoding = detect_encoding(sub_path)
+        text = self.sample_text(raw_data.decode(encoding, errors="replace"))
+        with self.lock:  # La fábrica de langdetect no es segura entre hilos
+            if self._detect is None:
+                from langdetect import detect, DetectorFactory
+
+                DetectorFactory.seed = 0
+                self._detect = detect
+            lang = self._detect(text)
+            self.cache[key] = lang
+            if self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO languages VALUES (?, ?)", (key, lang))
+                self.conn.commit()
+        return lang
+
+
+class SubtitleIndex:
+    """
+    Índice de una carpeta construido con una sola pasada de os.scandir:
+    cada video (por nombre base) con sus subtítulos candidatos y las etiquetas
+    que siguen al nombre ('ep1.en.utf8.srt' → ['en', 'utf8']).
+    """
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.videos = {}  # Nombre base → ruta del video
+        self.subtitles = []
+        self.candidates = {}  # Nombre base del video → [(etiquetas, ruta del subtítulo)]
+        self._scan()
+
+    def _scan(self):
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stem, ext = os.path.splitext(entry.name)
+                ext = ext.lower()
+                if ext in VIDEO_EXTENSIONS:
+                    self.videos[stem] = Path(entry.path)
+                elif ext == '.srt':
+                    self.subtitles.append(Path(entry.path))
+
+        for sub_path in self.subtitles:
+            # El nombre base más largo que coincide con un video: 'ep10.en' no es de 'ep1'
+            parts = sub_path.name[:-4].split('.')
+            for cut in range(len(parts), 0, -1):
+                base = '.'.join(parts[:cut])
+                if base in self.videos:
+                    self.candidates.setdefault(base, []).append((parts[cut:], sub_path))
+                    break
+
+    @staticmethod
+    def rank(tags, preferred_lang='es'):
+        """
+        Orden de preferencia: idioma destino, sin idioma, inglés, otros;
+        dentro de cada idioma, primero la copia ya convertida (.utf8).
+        """
+        langs = [tag for tag in tags if LANG_TAG_PATTERN.match(tag)]
+        lang = langs[-1].split('-')[0] if langs else None
+        if lang == preferred_lang:
+            order = 0
+        elif lang is None:
+            order = 1
+        elif lang == 'en':
+            order = 2
+        else:
+            order = 3
+        return order, 'utf8' not in tags, len(tags)
+
+    def video_files(self):
+        return [self.videos[stem] for stem in sorted(self.videos)]
+
+    def best_subtitle(self, video_path, preferred_lang='es'):
+        """Subtítulo más adecuado para un video o None si no tiene."""
+        candidates = self.candidates.get(Path(video_path).stem)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: (self.rank(c[0], preferred_lang), c[1].name))[1]
+
+
+class Manifest:
+    """
+    Registro persistente, por ID de video, de las etapas terminadas
+    (download, subs, translation, mux), las huellas de sus entradas y su salida.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.archive_lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                self.videos = json.load(file)
+        except FileNotFoundError:
+            self.videos = {}
+        except (OSError, ValueError) as e:
+            print(Fore.YELLOW + f"⚠ Manifiesto ilegible ({e}), se empieza uno nuevo")
+            self.videos = {}
+
+    def stage_output(self, video_id, stage, inputs):
+        """
+        Devuelve la salida de una etapa ya terminada con las mismas entradas,
+        o None si hay que (re)hacerla.
+        """
+        if not video_id:
+            return None
+        with self.lock:
+            record = self.videos.get(video_id, {}).get("stages", {}).get(stage)
+        if not record or record["inputs"] != inputs:
+            return None
+        output = record.get("output")
+        if output and not Path(output).exists():
+            return None
+        return Path(output) if output else None
+
+    def record(self, video_id, stage, inputs, output=None):
+        """Marca una etapa como terminada y guarda el manifiesto."""
+        if not video_id:
+            return
+        with self.lock:
+            entry = self.videos.setdefault(video_id, {"stages": {}})
+            entry["stages"][stage] = {
+                "inputs": inputs,
+                "output": str(output) if output else None,
+                "at": time.time(),
+            }
+            if stage == "mux" and output:
+                entry["final_path"] = str(output)
+            self._save()
+
+    def completed_ids(self):
+        """IDs cuyo archivo final existe."""
+        with self.lock:
+            return [
+                video_id for video_id, entry in self.videos.items()
+                if entry.get("final_path") and Path(entry["final_path"]).exists()
+            ]
+
+    def write_archive(self, archive_path=ARCHIVE_PATH):
+        """
+        Reescribe el archivo --download-archive de yt-dlp con los videos completos,
+        de modo que los que fallaron en etapas posteriores se vuelvan a descargar.
+
+        El archivo nuevo se escribe aparte y se renombra encima: otra descarga
+        en curso (el daemon ejecuta varias) nunca lo ve vacío ni a medias.
+        """
+        archive_path = Path(archive_path)
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = archive_path.with_suffix(".tmp")
+        with self.archive_lock:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.writelines(f"youtube {video_id}\n" for video_id in self.completed_ids())
+            os.replace(tmp_path, archive_path)
+        return archive_path
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.videos, file, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def _reflink(src, dest):
+    """Clona src en dest sin copiar datos (btrfs/XFS); lanza OSError si no se puede."""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflink no disponible en esta plataforma")
+    FICLONE = 0x40049409
+    try:
+        with open(src, "rb") as source, open(dest, "wb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+    except OSError:
+        Path(dest).unlink(missing_ok=True)
+        raise
+
+
+def commit_file(src, dest, keep_source=False):
+    """
+    Lleva un archivo terminado a su destino escribiendo lo mínimo posible:
+    renombrado (o enlace duro si se conserva el origen), reflink y, como
+    último recurso, copia. Todo pasa por un nombre temporal y un rename atómico.
+
+    :return: Método usado ('rename', 'hardlink', 'reflink' o 'copy').
+    """
+    src, dest = Path(src), Path(dest)
+    try:
+        if keep_source:
+            dest.unlink(missing_ok=True)
+            os.link(src, dest)
+            return "hardlink"
+        os.replace(src, dest)
+        return "rename"
+    except OSError:
+        pass  # Distinto sistema de archivos
+
+    tmp_path = dest.with_name(f".{dest.name}.part")
+    try:
+        _reflink(src, tmp_path)
+        method = "reflink"
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+        method = "copy"
+    os.replace(tmp_path, dest)
+    if not keep_source:
+        src.unlink()
+    return method
+
+
+def workspace_dir(root, video_id):
+    """Carpeta temporal propia de un video: root/<id>/. Se borra entera al terminarlo."""
+    return Path(root) / video_id
+
+
+def is_workspace(folder):
+    """
+    True si folder es un espacio de trabajo de workspace_dir: su nombre es un
+    ID de video y todo lo que contiene lleva ese ID ('Título [ID].mkv',
+    '.Título [ID].es.srt.part'). Solo esas carpetas se borran enteras.
+    """
+    folder = Path(folder)
+    if not folder.is_dir() or not re.fullmatch(r'[\w-]{6,}', folder.name):
+        return False
+    tag = f"[{folder.name}]"
+    with os.scandir(folder) as entries:
+        return all(tag in entry.name for entry in entries)
+
+
+def small_files_dir(video_path):
+    """
+    Carpeta con los subtítulos y el info JSON de un video: la de su espacio de
+    trabajo en SMALL_TEMP_DIR. Los videos sueltos (fuera de TEMP_DIR o
+    descargados antes de usar espacios de trabajo) los tienen a su lado.
+    """
+    video_path = Path(video_path)
+    try:
+        return SMALL_TEMP_DIR / video_path.parent.relative_to(TEMP_DIR)
+    except ValueError:
+        return video_path.parent
+
+
+def temp_downloads(policy):
+    """Videos terminados en TEMP_DIR, sueltos o dentro de su espacio de trabajo."""
+    candidates = list(TEMP_DIR.glob('*')) + list(TEMP_DIR.glob('*/*'))
+    return sorted((path for path in candidates if path.is_file() and policy.is_output(path)), key=os.path.getmtime)
+
+
+def parse_size(text):
+    """Convierte '500M', '5G' o '1.5T' en bytes."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Tamaño inválido: {text!r}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** ' KMGT'.index(unit.upper() or ' '))
+
+
+def format_duration(seconds):
+    """'1:05:09'; las horas no se reinician cada día como con time.strftime."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+class DiskGuard:
+    """
+    Pausa los procesos yt-dlp (SIGSTOP) cuando el espacio libre en TEMP_DIR baja
+    de min_free y los reanuda (SIGCONT) al volver a resume_free. El espacio se
+    recupera solo: el pipeline sigue terminando videos y borrando sus carpetas
+    mientras la descarga está parada.
+
+    Solo se pausa si algún pipeline tiene videos terminándose (busy); si deja de
+    tenerlos sin que haya espacio, se reanuda: nada más lo va a liberar y una
+    pausa sin fin dejaría la descarga colgada. Las señales llegan también a los
+    hijos de yt-dlp (aria2c, ffmpeg), que son los que escriben en disco.
+    """
+
+    def __init__(self, path, min_free=MIN_FREE_SPACE, resume_free=RESUME_FREE_SPACE, interval=DISK_CHECK_INTERVAL):
+        self.path = Path(path)
+        self.min_free = min_free
+        self.resume_free = max(resume_free, min_free)
+        self.interval = interval
+        self.processes = {}  # Proceso yt-dlp → función que dice si su pipeline está liberando espacio
+        self.paused = False
+        self.warned = False
+        self.lock = threading.Lock()
+        self.thread = None
+        self.supported = hasattr(signal, 'SIGSTOP')  # Windows no puede pausar procesos así
+
+    def free_bytes(self):
+        return shutil.disk_usage(self.path).free
+
+    @contextmanager
+    def watch(self, process, busy=None):
+        """
+        Vigila el espacio mientras dure la descarga de process.
+
+        :param busy: Función que devuelve True mientras haya videos de esta descarga terminándose.
+        """
+        if not self.supported or not self.min_free:
+            yield
+            return
+        with self.lock:
+            self.processes[process] = busy
+            if self.paused:
+                self._signal(process, signal.SIGSTOP)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="disk-guard", daemon=True)
+                self.thread.start()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.processes.pop(process, None)
+                if process.poll() is None:
+                    self._signal(process, signal.SIGCONT)  # Nunca dejar un proceso parado
+
+    def _loop(self):
+        while True:
+            with self.lock:
+                if not self.processes:
+                    self.thread = None
+                    self.paused = False
+                    self.warned = False
+                    return
+                self.check()
+            time.sleep(self.interval)
+
+    def check(self):
+        """Pausa o reanuda según el espacio libre. Se llama con el bloqueo tomado."""
+        try:
+            free = self.free_bytes()
+        except OSError:
+            return
+        recovering = any(busy() for busy in self.processes.values() if busy)
+        if free >= self.min_free:
+            self.warned = False
+        if not self.paused and free < self.min_free and not recovering:
+            if not self.warned:
+                self.warned = True
+                print(Fore.YELLOW + f"\n⚠ Quedan {format_size(free)} libres en {self.path} y ningún video se está "
+                                    f"terminando que los libere: la descarga sigue sin pausa")
+            return
+        if not self.paused and free < self.min_free:
+            self.paused = True
+            print(Fore.YELLOW + f"\n⏸ Quedan {format_size(free)} libres en {self.path}: "
+                                f"descargas en pausa hasta tener {format_size(self.resume_free)}")
+            signum = signal.SIGSTOP
+        elif self.paused and free >= self.resume_free:
+            self.paused = False
+            print(Fore.GREEN + f"\n▶ {format_size(free)} libres: se reanudan las descargas")
+            signum = signal.SIGCONT
+        elif self.paused and not recovering:
+            self.paused = False
+            self.warned = True
+            print(Fore.YELLOW + f"\n⚠ Ya no queda ningún video terminándose y siguen {format_size(free)} libres: "
+                                f"se reanudan las descargas para no dejarlas paradas")
+            signum = signal.SIGCONT
+        else:
+            return
+        METRICS.observe('disk_pause' if signum == signal.SIGSTOP else 'disk_resume', 0, free_bytes=free)
+        for process in self.processes:
+            self._signal(process, signum)
+
+    @staticmethod
+    def _descendants(pid):
+        """PIDs de los hijos de pid y de los hijos de estos, leyendo /proc (vacío fuera de Linux)."""
+        children = {}
+        try:
+            entries = os.listdir('/proc')
+        except OSError:
+            return []
+        for entry in entries:
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'rb') as file:
+                    stat = file.read()
+                ppid = int(stat[stat.rindex(b')') + 2:].split()[1])  # 'pid (nombre) estado ppid ...'
+            except (OSError, ValueError, IndexError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+        found, queue = [], [pid]
+        while queue:
+            for child in children.get(queue.pop(), []):
+                found.append(child)
+                queue.append(child)
+        return found
+
+    @classmethod
+    def _signal(cls, process, signum):
+        """Envía signum a yt-dlp y sus hijos: al parar, el padre primero (no lanza más); al seguir, al revés."""
+        if process.poll() is not None:
+            return  # Ya terminó
+        pids = [process.pid, *cls._descendants(process.pid)]
+        if signum == signal.SIGCONT:
+            pids.reverse()
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                pass  # Terminó entre tanto
+
+def subtitle_tracks(video_path):
+    """
+    Lista las pistas de subtítulos de texto de un video con mkvmerge -J (o ffprobe).
+
+    :return: Lista de tuplas (id de pista, idioma de dos letras, es_srt).
+    """
+    tracks = []
+    if shutil.which('mkvmerge'):
+        result = subprocess.run(['mkvmerge', '-J', str(video_path)], capture_output=True, text=True)
+        for track in json.loads(result.stdout or '{}').get('tracks', []):
+            props = track.get('properties', {})
+            codec = props.get('codec_id', '')
+            if track.get('type') == 'subtitles' and codec.startswith('S_TEXT/'):
+                lang = props.get('language_ietf') or props.get('language') or 'und'
+                tracks.append((track['id'], lang, codec == 'S_TEXT/UTF8'))
+    elif shutil.which('ffprobe'):
+        result = subprocess.run([
+            'ffprobe', '-v', 'error', '-select_streams', 's', '-of', 'json',
+            '-show_entries', 'stream=index,codec_name:stream_tags=language', str(video_path)
+        ], capture_output=True, text=True)
+        for stream in json.loads(result.stdout or '{}').get('streams', []):
+            codec = stream.get('codec_name')
+            if codec in ('subrip', 'webvtt', 'ass', 'ssa', 'mov_text', 'text'):
+                lang = stream.get('tags', {}).get('language', 'und')
+                tracks.append((stream['index'], lang, codec == 'subrip'))
+    # 'spa' → 'es', 'en-US' → 'en'
+    return [(track_id, ISO639_2.get(lang.split('-')[0], lang.split('-')[0]), is_srt)
+            for track_id, lang, is_srt in tracks]
+
+
+def extract_embedded_subs(video_path, dest_dir):
+    """
+    Extrae a dest_dir las pistas de subtítulos de texto incrustadas en el video,
+    como '<nombre>.<idioma>.srt' (o '<nombre>.<idioma>.<pista>.srt' si se repite el idioma).
+
+    Las pistas SubRip se copian con mkvextract en una sola llamada; el resto
+    (WebVTT, ASS...) o todas si falta mkvextract, las convierte ffmpeg.
+
+    :return: Lista de subtítulos extraídos.
+    """
+    try:
+        tracks = subtitle_tracks(video_path)
+    except (OSError, ValueError) as e:
+        print(Fore.YELLOW + f"⚠ No se pudieron leer las pistas de {video_path.name}: {e}")
+        return []
+
+    targets, used = [], set()
+    for track_id, lang, is_srt in tracks:
+        name = f"{video_path.stem}.{lang}.srt" if lang not in used else f"{video_path.stem}.{lang}.{track_id}.srt"
+        used.add(lang)
+        target = Path(dest_dir) / name
+        if not target.exists():
+            targets.append((track_id, is_srt, target))
+    if not targets:
+        return []
+
+    use_mkvextract = bool(shutil.which('mkvextract'))
+    copied = [(track_id, target) for track_id, is_srt, target in targets if is_srt and use_mkvextract]
+    converted = [(track_id, target) for track_id, is_srt, target in targets if not (is_srt and use_mkvextract)]
+    extracted = []
+    try:
+        if copied:
+            subprocess.run(['mkvextract', str(video_path), 'tracks',
+                            *[f"{track_id}:{target}" for track_id, target in copied]],
+                           check=True, capture_output=True)
+            extracted += [target for _, target in copied]
+        if converted:
+            cmd = ['ffmpeg', '-v', 'error', '-y', '-i', str(video_path)]
+            for track_id, target in converted:
+                cmd += ['-map', f'0:{track_id}', '-c:s', 'srt', str(target)]
+            subprocess.run(cmd, check=True, capture_output=True)
+            extracted += [target for _, target in converted]
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(Fore.YELLOW + f"⚠ No se pudieron extraer los subtítulos de {video_path.name}: {e}")
+    return [path for path in extracted if path.exists()]
+
+
+def embedded_track_edits(video_path, subs):
+    """
+    Comprueba si las pistas de subtítulos que se quieren ya están incrustadas en
+    el MKV y, en ese caso, qué propiedades de cabecera hay que cambiar para que
+    queden como las dejaría la mezcla: idioma, nombre y solo la primera como
+    predeterminada. mkvpropedit cambia esas propiedades en el sitio, sin
+    reescribir el video; el resto de pistas de subtítulos se conservan sin marca.
+
+    :param subs: Lista de tuplas (ruta, idioma); la primera será la predeterminada.
+    :return: Argumentos de mkvpropedit ([] si ya está todo como debe), o None si
+        falta alguna pista (o no se puede inspeccionar el archivo) y hay que mezclar.
+    """
+    if Path(video_path).suffix.lower() not in ('.mkv', '.mka', '.webm'):
+        return None
+    if not (shutil.which('mkvmerge') and shutil.which('mkvpropedit')):
+        return None
+    try:
+        result = subprocess.run(['mkvmerge', '-J', str(video_path)], capture_output=True, text=True, check=True)
+        tracks = [track for track in json.loads(result.stdout).get('tracks', []) if track.get('type') == 'subtitles']
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+    by_lang = {}
+    for track in tracks:
+        props = track.get('properties', {})
+        lang = (props.get('language_ietf') or props.get('language') or 'und').split('-')[0]
+        by_lang.setdefault(ISO639_2.get(lang, lang), track)  # La primera pista de cada idioma
+
+    positions = {}
+    for position, (_, lang) in enumerate(subs):
+        track = by_lang.get(lang)
+        if track is None or 'number' not in track.get('properties', {}):
+            return None  # Pista nueva: solo se puede añadir mezclando
+        positions.setdefault(track['id'], position)
+
+    edits = []
+    for track in tracks:
+        props = track.get('properties', {})
+        position = positions.get(track['id'])
+        wanted = {'flag-default': '1' if position == 0 else '0'}
+        current = {'flag-default': '1' if props.get('default_track') else '0'}
+        if position is not None:
+            lang = subs[position][1]
+            wanted.update({'language': ISO639_1.get(lang, lang), 'name': language_name(lang)})
+            current.update({'language': props.get('language'), 'name': props.get('track_name')})
+        changes = [f'{key}={value}' for key, value in wanted.items() if current.get(key) != value]
+        if changes:
+            if 'number' not in props:
+                return None
+            edits += ['--edit', f"track:@{props['number']}"]
+            for change in changes:
+                edits += ['--set', change]
+    return edits
+
+class VideoPipeline:
+    """
+    Procesa cada video en cuanto termina su descarga, en dos etapas con sus
+    propios hilos: subtítulos (búsqueda/traducción) y mezcla final. Sin
+    subs_workers/mux_workers, se usan los del downloader (--subs-workers/--mux-workers).
+    """
+
+    def __init__(self, downloader, subs_workers=None, mux_workers=None, backend=None):
+        subs_workers = subs_workers or downloader.subs_workers
+        mux_workers = mux_workers or downloader.mux_workers
+        self.downloader = downloader
+        self.backend = backend  # Motor de traducción de este trabajo (None: el predeterminado)
+        self.subs_pool = ThreadPoolExecutor(max_workers=subs_workers, thread_name_prefix="subs")
+        self.mux_pool = ThreadPoolExecutor(max_workers=mux_workers, thread_name_prefix="mux")
+        self.subs_workers = subs_workers
+        self.submitted = set()
+        self.missing = []  # (video, idx) sin subtítulos locales: se piden juntos en join()
+        self.results = []  # Archivos finales, en el orden en que se terminan
+        self.active = 0  # Videos en subtítulos o mezcla que liberarán su espacio al terminar
+        self.lock = threading.Lock()
+
+    def submit(self, video_path):
+        """Encola un video terminado; los repetidos se ignoran."""
+        video_path = Path(video_path)
+        with self.lock:
+            if video_path in self.submitted:
+                return
+            self.submitted.add(video_path)
+            self.active += 1
+            idx = len(self.submitted)
+        print(Fore.MAGENTA + f"\n📦 Video {idx} listo para procesar: {video_path.name}")
+        self.downloader.manifest.record(
+            video_id_from_path(video_path), "download",
+            {"video": file_fingerprint(video_path, full_hash=False)}, video_path
+        )
+        if self.downloader.format_policy.subtitles == 'mux':
+            self._submit_subs(video_path, idx, defer=True)
+        else:
+            # yt-dlp ya incrustó los subtítulos (o no se quieren): solo queda guardar el archivo
+            self.mux_pool.submit(self._finalize, video_path, None, idx)
+
+    def _submit_subs(self, video_path, idx, defer):
+        future = self.subs_pool.submit(self._find_subs, video_path, defer)
+        future.add_done_callback(lambda f: self._submit_mux(video_path, f, idx, defer))
+
+    def _find_subs(self, video_path, extract):
+        with METRICS.timer('subs', video=video_id_from_path(video_path)):
+            return self.downloader.find_files(video_path, extract=extract, backend=self.backend)
+
+    def _submit_mux(self, video_path, future, idx, defer):
+        try:
+            subs_path = future.result()
         except Exception as e:
-            print(Fore.YELLOW + f"Error de traducción: {str(e)}")
-        
-        return text  # Fallback a texto original
+            print(Fore.RED + f"✘ Error procesando subtítulos de {video_path.name}: {e}")
+            subs_path = None
+        if subs_path is None and defer:
+            with self.lock:
+                self.missing.append((video_path, idx))
+                self.active -= 1  # Espera a join(): no libera nada mientras dure la descarga
+            return
+        self.mux_pool.submit(self._finalize, video_path, subs_path, idx)
+
+    def _finalize(self, video_path, subs_path, idx):
+        try:
+            final_path = self.downloader.finalize_video(video_path, subs_path, idx)
+            if final_path:
+                with self.lock:
+                    self.results.append(final_path)
+        except Exception as e:
+            print(Fore.RED + f"✘ Error finalizando {video_path.name}: {e}")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def busy(self):
+        """True mientras haya videos terminándose (para DiskGuard)."""
+        with self.lock:
+            return self.active > 0
+
+    def join(self):
+        """
+        Espera a que terminen todas las etapas. Los videos que siguen sin
+        subtítulos se resuelven aquí con una única llamada a yt-dlp para todos.
+        """
+        self.subs_pool.shutdown(wait=True)  # Incluye el encolado en la etapa de mezcla
+        if self.missing:
+            missing, self.missing = self.missing, []
+            self.downloader.fetch_missing_subs([video_path for video_path, _ in missing])
+            self.subs_pool = ThreadPoolExecutor(max_workers=self.subs_workers, thread_name_prefix="subs")
+            with self.lock:
+                self.active += len(missing)
+            for video_path, idx in missing:
+                self._submit_subs(video_path, idx, defer=False)
+            self.subs_pool.shutdown(wait=True)
+        self.mux_pool.shutdown(wait=True)
+
+
+class FormatPolicy:
+    """
+    Perfil de descarga que decide los argumentos de formato de yt-dlp.
+
+    Los códecs se eligen según el contenedor para que la fusión de video y audio
+    sea una copia de flujos, sin recodificar: MKV admite cualquier códec y MP4
+    pide H.264/AAC (ext:mp4:m4a). El modo de subtítulos decide quién escribe el
+    archivo final: 'mux' deja los .srt sueltos para traducirlos e incrustarlos
+    en una sola pasada; 'embed' los incrusta yt-dlp tal cual se descargan (sin
+    traducir) y el archivo solo se renombra; 'none' no pide subtítulos.
+    """
+
+    SUBTITLE_MODES = ('mux', 'embed', 'none')
+
+    def __init__(self, container='mkv', max_height=None, vcodec=None, acodec=None, fragments=4,
+                 downloader=None, downloader_args=None, rate_limit=None, audio_only=False,
+                 audio_format='best', subtitles='mux'):
+        if subtitles not in self.SUBTITLE_MODES:
+            raise ValueError(f"Modo de subtítulos desconocido: {subtitles!r}")
+        self.container = container
+        self.max_height = max_height  # Altura máxima del video (1080, 720...)
+        self.vcodec = vcodec  # Códec de video preferido en MKV ('av01', 'vp9', 'avc1')
+        self.acodec = acodec  # Códec de audio preferido en MKV ('opus', 'aac')
+        self.fragments = fragments  # Fragmentos DASH/HLS descargados a la vez (-N)
+        self.downloader = downloader  # Descargador externo ('aria2c') o None para el interno
+        self.downloader_args = downloader_args  # Argumentos del descargador externo
+        self.rate_limit = rate_limit  # Límite de velocidad ('5M') o None
+        self.audio_only = audio_only
+        self.audio_format = audio_format  # 'best' extrae el audio sin recodificar
+        self.requested_subtitles = subtitles  # El modo del perfil, aunque audio_only lo anule
+        self.subtitles = 'none' if audio_only else subtitles
+
+    def with_changes(self, **changes):
+        """
+        Copia del perfil con algunos valores cambiados (los None se ignoran).
+        Al dejar de ser solo audio vuelve el modo de subtítulos del perfil, salvo
+        que se cambie también.
+        """
+        values = dict(vars(self), subtitles=self.requested_subtitles)
+        del values['requested_subtitles']
+        values.update({key: value for key, value in changes.items() if value is not None})
+        return FormatPolicy(**values)
+
+    def format_args(self):
+        """Selección (-f), orden de preferencia (-S) y contenedor."""
+        if self.audio_only:
+            return ['-f', 'ba/b', '-x', '--audio-format', self.audio_format]
+        height = f'[height<={self.max_height}]' if self.max_height else ''
+        sort = [f'res:{self.max_height}'] if self.max_height else []
+        if self.container == 'mp4':
+            sort.append('ext:mp4:m4a')  # H.264 + AAC: fusionar en MP4 es copiar
+        elif self.container == 'webm':
+            sort.append('ext:webm:webm')  # VP9/AV1 + Opus
+        else:
+            sort += [f'vcodec:{self.vcodec}'] if self.vcodec else []
+            sort += [f'acodec:{self.acodec}'] if self.acodec else []
+        selector = f'bv*{height}+ba/b{height}/bv*+ba/b' if height else 'bv*+ba/b'  # Sin límite si no hay otra
+        args = ['-f', selector]
+        if sort:
+            args += ['-S', ','.join(sort)]
+        return args + ['--merge-output-format', self.container]
+
+    def transfer_args(self):
+        """Fragmentos simultáneos, descargador externo y límite de velocidad."""
+        args = ['--concurrent-fragments', str(self.fragments)] if self.fragments > 1 else []
+        if self.downloader:
+            args += ['--downloader', self.downloader]
+            if self.downloader_args:
+                args += ['--downloader-args', f'{self.downloader}:{self.downloader_args}']
+        if self.rate_limit:
+            args += ['--limit-rate', str(self.rate_limit)]
+        return args
+
+    def subtitle_args(self, sub_langs):
+        if self.subtitles == 'none':
+            return []
+        args = ['--write-subs', '--write-auto-subs', '--sub-langs', sub_langs, '--convert-subs', 'srt']
+        return args + (['--embed-subs'] if self.subtitles == 'embed' else [])
+
+    def is_output(self, path):
+        """Indica si un archivo de TEMP_DIR es un resultado terminado de este perfil."""
+        path = Path(path)
+        if INTERMEDIATE_PATTERN.search(path.name):
+            return False
+        if self.audio_only:
+            return path.suffix.lower() in AUDIO_EXTENSIONS
+        return path.suffix.lower() == f'.{self.container}'
+
+
+FORMAT_PROFILES = {
+    'default': FormatPolicy(),  # Mejor calidad en MKV
+    '1080p': FormatPolicy(max_height=1080),
+    '720p': FormatPolicy(max_height=720),
+    'mp4': FormatPolicy(container='mp4', max_height=1080),
+    'archive': FormatPolicy(fragments=8, downloader='aria2c', downloader_args='-x 8 -s 8 -k 1M'),
+    'audio': FormatPolicy(audio_only=True),
+    'original-subs': FormatPolicy(subtitles='embed'),  # Sin traducir: yt-dlp incrusta y listo
+}
+
+
+def subtitle_langs(target_languages, policy):
+    """Idiomas para --sub-langs: los de destino y, si se van a traducir, el inglés como origen."""
+    languages = list(target_languages)
+    if policy.subtitles == 'mux' and 'en' not in languages:
+        languages.append('en')
+    return ','.join(f'{lang}.*' for lang in languages)
+
+
+def ytdlp_command(url, policy, output, archive_path=None, start=None, end=None, sub_langs=SUBS_LANGS,
+                  small_output=None, items=None):
+    """
+    Construye el comando yt-dlp para una URL sin tocar la red ni el disco.
+
+    :param policy: FormatPolicy con el formato, la transferencia y los subtítulos.
+    :param output: Plantilla de salida de yt-dlp (ruta incluida).
+    :param small_output: Plantilla para los subtítulos y el info JSON (por defecto, output).
+    :param archive_path: Archivo --download-archive o None.
+    :param start: Primer video de la lista; end: último (None: hasta el final).
+    :param items: Posiciones de la lista a descargar, en orden (sustituye a start/end).
+    """
+    cmd = [
+        'yt-dlp',
+        '--newline',  # Crucial para el procesamiento de líneas
+        '--progress-template', PROGRESS_TEMPLATE,  # Progreso en JSON, sin expresiones regulares
+        '--cookies-from-browser', 'chrome',
+        *policy.format_args(),
+        *policy.transfer_args(),
+        *policy.subtitle_args(sub_langs),
+        '--write-info-json',  # ID y URL para pedir después los subtítulos que falten
+        '--no-write-playlist-metafiles',
+        '--ignore-errors',
+        '--yes-playlist',
+    ]
+    if archive_path:
+        # Saltar los videos que ya completaron todas las etapas
+        cmd += ['--download-archive', str(archive_path)]
+    cmd += [
+        # Avisar de cada video terminado (tras fusionar e incrustar subtítulos)
+        '--print', f'after_move:{DONE_MARKER}%(filepath)s',
+        '--progress',  # --print silencia la salida; mantener el progreso
+        '-o', str(output),
+    ]
+    if small_output:
+        cmd += ['-o', f'subtitle:{small_output}', '-o', f'infojson:{small_output}']
+
+    # Agregar parámetros de rango
+    if items:
+        cmd += ['--playlist-items', ','.join(str(item) for item in items)]
+    elif start or end:
+        cmd += ['--playlist-start', str(start or 1), '--playlist-end', str(end) if end else '9999']
+    return cmd + ['--', url]
+
+
+def parse_playlist_range(range_input):
+    """
+    Interpreta un rango de lista ('1-5', '3', '7-', '-4').
+
+    :return: Tupla (start, end); (None, None) si no hay rango.
+    :raises ValueError: Si el formato no es válido.
+    """
+    if not range_input:
+        return None, None
+    if '-' in range_input:
+        parts = range_input.split('-')
+        start = int(parts[0]) if parts[0] else 1
+        end = int(parts[1]) if len(parts) > 1 and parts[1] else None
+        return start, end
+    return int(range_input), int(range_input)
+
+
+def is_playlist_url(url):
+    """Indica si la URL apunta a una lista o canal (y no a un video suelto)."""
+    parsed = urlparse(url)
+    return 'list=' in parsed.query or any(
+        part in parsed.path for part in ('/playlist', '/channel/', '/c/', '/user/', '/@')
+    )
+
+
+def is_flat_listing(entries):
+    """
+    Indica si las entradas de --flat-playlist son todas videos con ID. Un canal
+    con pestañas devuelve sublistas: su número de entradas no es el de videos.
+    """
+    return all(entry.get('_type') != 'playlist' and entry.get('id') for entry in entries)
+
+
+class MetadataCache:
+    """
+    Metadatos de videos por ID (título, duración, tamaño estimado y subtítulos
+    disponibles) en un JSON dentro de CACHE_DIR. Cada entrada caduca a los
+    ttl segundos: los subtítulos automáticos aparecen horas después de publicar.
+    """
+
+    def __init__(self, path=METADATA_CACHE_PATH, ttl=METADATA_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, video_id):
+        with self.lock:
+            entry = self.entries.get(video_id)
+        if entry and time.time() - entry.get('fetched_at', 0) < self.ttl:
+            return entry
+        return None
+
+    def put(self, video_id, **fields):
+        with self.lock:
+            self.entries[video_id] = dict(fields, fetched_at=time.time())
+
+    def save(self):
+        with self.lock:
+            now = time.time()
+            self.entries = {key: value for key, value in self.entries.items()
+                            if now - value.get('fetched_at', 0) < self.ttl}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    json.dump(self.entries, file)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # Sin caché: la próxima vez se vuelven a pedir
+
+
+class PlanEntry:
+    """Un video de la lista tal como lo ve el plan."""
+
+    def __init__(self, index, video_id, title, duration=None, size=None, subtitles=None, done=False):
+        self.index = index  # Posición en la lista (la que entiende --playlist-items)
+        self.video_id = video_id
+        self.title = title
+        self.duration = duration
+        self.size = size  # Bytes estimados del formato elegido, o None
+        self.subtitles = subtitles  # Idiomas disponibles (manuales y automáticos), o None si no se sabe
+        self.done = done  # Ya está en FINAL_DIR según el manifiesto
+
+    def missing_languages(self, target_languages):
+        """Idiomas de destino que habrá que traducir; None si no se sabe."""
+        if self.subtitles is None:
+            return None
+        available = {lang.split('-')[0] for lang in self.subtitles}
+        return [lang for lang in target_languages if lang not in available]
+
+    def can_translate(self, target_languages):
+        """Hay que traducir y existe un subtítulo del que partir."""
+        missing = self.missing_languages(target_languages)
+        return bool(missing) and bool(self.subtitles)
+
+
+class PlaylistPlan:
+    """
+    Plan de ejecución de una lista: qué videos faltan, en qué orden bajarlos,
+    cuántos bytes suman y cuánto tardarán.
+
+    El orden pone primero los videos que habrá que traducir, de menor a mayor
+    tamaño: el primero termina pronto y su traducción corre mientras se
+    descargan los demás. Los que ya traen subtítulos en los idiomas de destino
+    (o no traen ninguno) van después, en el orden de la lista.
+    """
+
+    def __init__(self, url, entries, target_languages, speed=None):
+        self.url = url
+        self.target_languages = list(target_languages)
+        self.finished = [entry for entry in entries if entry.done]
+        pending = [entry for entry in entries if not entry.done]
+        translate = sorted((entry for entry in pending if entry.can_translate(self.target_languages)),
+                           key=lambda entry: (entry.size or float('inf'), entry.index))
+        first = {entry.index for entry in translate}
+        self.entries = translate + [entry for entry in pending if entry.index not in first]
+        self.speed = speed  # Bytes por segundo esperados, o None
+
+    @property
+    def total_bytes(self):
+        return sum(entry.size or 0 for entry in self.entries)
+
+    @property
+    def eta(self):
+        """Segundos estimados de descarga, o None si no hay velocidad de referencia."""
+        return self.total_bytes / self.speed if self.speed else None
+
+    def items(self):
+        """Índices para --playlist-items en el orden del plan."""
+        return [entry.index for entry in self.entries]
+
+    def print_summary(self, detail=False):
+        translate = sum(1 for entry in self.entries if entry.can_translate(self.target_languages))
+        no_subs = sum(1 for entry in self.entries if entry.subtitles == [])
+        eta = (f", ~{format_duration(self.eta)} a {format_size(self.speed)}/s"
+               if self.eta is not None else "")
+        print(Fore.CYAN + f"📋 Plan: {len(self.entries)} videos por descargar "
+                          f"({len(self.finished)} ya terminados), {format_size(self.total_bytes)}{eta}")
+        if self.entries:
+            print(Fore.CYAN + f"   {translate} necesitan traducción (van primero), "
+                              f"{len(self.entries) - translate - no_subs} ya tienen subtítulos, {no_subs} sin ninguno")
+        if not detail:
+            return
+        for order, entry in enumerate(self.entries, 1):
+            missing = entry.missing_languages(self.target_languages)
+            subs = "?" if missing is None else ("traducir " + ",".join(missing)) if missing and entry.subtitles \
+                else ("sin subtítulos" if missing else "listos")
+            duration = format_duration(entry.duration) if entry.duration else "-:--:--"
+            size = format_size(entry.size) if entry.size else "?"
+            print(f"  {order:>4}. #{entry.index:<4} {duration}  {size:>10}  {subs:<22} {entry.title[:60]}")
+
+class BatchJob:
+    """Una URL del archivo de trabajos, descargada por tramos de BATCH_CHUNK videos."""
+
+    def __init__(self, url, start=None, end=None, priority=0, line_no=0):
+        self.url = url
+        self.start = start
+        self.end = end
+        self.priority = priority
+        self.line_no = line_no
+        self.host = (urlparse(url).hostname or '').removeprefix('www.').removeprefix('m.')
+        self.playlist = is_playlist_url(url)
+        self.next_start = start or 1
+        self.length = None  # Videos de la lista según --flat-playlist (None: desconocido)
+        self.seen = set()
+        self.running = False
+        self.done = False
+        self.turn = 0  # Último turno asignado, para alternar entre listas de igual prioridad
+
+    def next_chunk(self, size=BATCH_CHUNK):
+        """Devuelve el siguiente tramo (inicio, fin) o None para videos sueltos."""
+        if not self.playlist:
+            return None
+        chunk_end = self.next_start + size - 1
+        if self.end:
+            chunk_end = min(chunk_end, self.end)
+        if self.length is not None:
+            chunk_end = min(chunk_end, self.length)
+        return self.next_start, chunk_end
+
+    def finished_after(self, chunk, new_videos, errors):
+        """
+        True si no quedan tramos tras chunk. Con --download-archive un tramo ya
+        descargado no imprime nada, así que el final de la lista sale de su
+        longitud; solo si no se pudo listar se toma un tramo vacío como final.
+        """
+        if chunk is None or chunk[1] == self.end:
+            return True
+        if self.length is not None:
+            return chunk[1] >= self.length
+        return new_videos == 0 and not errors
+
+    def __str__(self):
+        return f"{self.url} (línea {self.line_no})"
+
+
+def parse_job_file(path):
+    """
+    Lee un archivo de trabajos: una URL por línea, con rango y prioridad opcionales.
+
+        https://www.youtube.com/playlist?list=XXXX 1-20 prioridad=5
+        https://www.youtube.com/watch?v=YYYY
+        # Las líneas que empiezan por '#' se ignoran
+
+    :return: Lista de BatchJob.
+    """
+    jobs = []
+    with open(path, encoding="utf-8") as file:
+        for line_no, line in enumerate(file, start=1):
+            tokens = line.split('#', 1)[0].split() if not line.lstrip().startswith('#') else []
+            if not tokens:
+                continue
+            url, start, end, priority = tokens[0], None, None, 0
+            try:
+                for token in tokens[1:]:
+                    if token.startswith('prioridad='):
+                        priority = int(token.split('=', 1)[1])
+                    else:
+                        start, end = parse_playlist_range(token)
+            except ValueError:
+                print(Fore.RED + f"✘ Línea {line_no} inválida, se omite: {line.strip()}")
+                continue
+            if not url.startswith(('http://', 'https://')):
+                print(Fore.RED + f"✘ URL inválida en la línea {line_no}: {url}")
+                continue
+            jobs.append(BatchJob(url, start, end, priority, line_no))
+    return jobs
+
+
+class BatchProgress:
+    """Una sola barra para todos los procesos yt-dlp del lote."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.workers = {}
+        from tqdm import tqdm
+
+        self.bar = tqdm(desc=f"{Fore.BLUE}📥 Lote", unit=" video", bar_format="{desc}: {n_fmt} videos [{elapsed}] {postfix}")
+
+    def update(self, worker, percent):
+        with self.lock:
+            self.workers[worker] = percent
+            self._refresh()
+
+    def finish_worker(self, worker):
+        with self.lock:
+            self.workers.pop(worker, None)
+            self._refresh()
+
+    def video_done(self):
+        with self.lock:
+            self.bar.update(1)
+
+    def _refresh(self):
+        self.bar.set_postfix_str(" | ".join(f"{w}: {p:3.0f}%" for w, p in sorted(self.workers.items())))
+
+    def close(self):
+        self.bar.close()
+
+
+class BatchScheduler:
+    """
+    Reparte los trabajos entre varios procesos yt-dlp con un límite global y otro
+    por servidor. Primero va la prioridad más alta; entre trabajos de igual
+    prioridad se alterna tramo a tramo para que ninguna lista acapare los procesos.
+    """
+
+    def __init__(self, downloader, jobs, workers=BATCH_WORKERS, per_host=BATCH_PER_HOST):
+        self.downloader = downloader
+        self.jobs = jobs
+        self.workers = workers
+        self.per_host = per_host
+        self.cond = threading.Condition()
+        self.running_hosts = {}
+        self.turns = 0
+
+    def _pick(self):
+        candidates = [
+            job for job in self.jobs
+            if not job.done and not job.running and self.running_hosts.get(job.host, 0) < self.per_host
+        ]
+        return min(candidates, key=lambda job: (-job.priority, job.turn, job.line_no), default=None)
+
+    def run(self):
+        pipeline = VideoPipeline(self.downloader)
+        progress = BatchProgress()
+        free_slots = list(range(1, self.workers + 1))
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="yt-dlp") as pool:
+            with self.cond:
+                while True:
+                    job = self._pick() if free_slots else None
+                    if job is None:
+                        if not any(j.running for j in self.jobs) and all(j.done for j in self.jobs):
+                            break
+                        self.cond.wait()
+                        continue
+                    self.turns += 1
+                    job.turn = self.turns
+                    job.running = True
+                    self.running_hosts[job.host] = self.running_hosts.get(job.host, 0) + 1
+                    pool.submit(self._run_chunk, job, free_slots.pop(0), pipeline, progress, free_slots)
+        progress.close()
+        print(Fore.GREEN + "\n✅ Descargas del lote completadas. Esperando el procesamiento pendiente...")
+        pipeline.join()
+
+    def _run_chunk(self, job, slot, pipeline, progress, free_slots):
+        chunk, done = None, True
+        try:
+            if job.playlist and job.length is None:
+                entries = self.downloader.list_playlist(job.url)
+                job.length = len(entries) if entries is not None and is_flat_listing(entries) else None
+            chunk = job.next_chunk()
+            if chunk and chunk[0] > chunk[1]:
+                chunk, new_videos, errors = None, 0, False  # El rango empieza después del final de la lista
+            else:
+                new_videos, errors = self._download_chunk(job, chunk, f"#{slot}", pipeline, progress)
+            # Video suelto, rango agotado o lista terminada
+            done = job.finished_after(chunk, new_videos, errors)
+        except Exception as e:
+            progress.bar.write(Fore.RED + f"✘ Error descargando {job}: {e}")
+        finally:
+            # Pase lo que pase, el trabajo, su servidor y el proceso quedan libres
+            with self.cond:
+                job.running = False
+                self.running_hosts[job.host] -= 1
+                free_slots.append(slot)
+                if done:
+                    job.done = True
+                else:
+                    job.next_start = chunk[1] + 1
+                self.cond.notify_all()
+
+    def _download_chunk(self, job, chunk, worker, pipeline, progress):
+        """Descarga un tramo con un proceso yt-dlp. Devuelve (videos nuevos, hubo errores)."""
+        new_videos, errors = 0, False
+        try:
+            cmd = self.downloader.build_download_cmd(
+                job.url, *(chunk or (None, None)), output_template=BATCH_OUTPUT_TEMPLATE
+            )
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+            with self.downloader.disk_guard.watch(process, busy=pipeline.busy):
+                for line in iter(process.stdout.readline, ''):
+                    line = line.strip()
+                    if line.startswith(DONE_MARKER):
+                        video_path = Path(line[len(DONE_MARKER):])
+                        if video_path not in job.seen:
+                            job.seen.add(video_path)
+                            new_videos += 1
+                            progress.video_done()
+                            pipeline.submit(video_path)
+                    elif line.startswith('ERROR'):
+                        errors = True
+                        progress.bar.write(Fore.RED + f"✘ {job}: {line}")
+                    else:
+                        event = DownloadProgress.from_line(line)
+                        if event:
+                            progress.update(worker, event.percent)
+                            event.record()
+                process.wait()
+        except Exception as e:
+            errors = True
+            progress.bar.write(Fore.RED + f"✘ Error descargando {job}: {e}")
+        finally:
+            progress.finish_worker(worker)
+        return new_videos, errors
+
 
 class YouTubeDownloader:
     def __init__(self):
         self.video_path = None
         self.subs_path = None
+        self.tool_versions = None  # Resultado de probe_dependencies, una vez por proceso
+        self.target_languages = list(TARGET_LANGUAGES)
+        self.format_policy = FORMAT_PROFILES['default']  # Perfil de descarga (--profile)
+        self.subs_workers = SUBS_WORKERS  # Hilos de cada etapa del pipeline (--subs-workers, --mux-workers)
+        self.mux_workers = MUX_WORKERS
         self.setup_dirs()
-        self.translator = Translator()
+        self.disk_guard = DiskGuard(TEMP_DIR, MIN_FREE_SPACE, RESUME_FREE_SPACE)
+        self.manifest = Manifest(MANIFEST_PATH)
+        self.memory = TranslationMemory(CACHE_DIR / "translations.sqlite3")
+        self.translator = Translator()  # Motor predeterminado (--backend); la memoria la consulta translate_cues
+        self.backends = {self.translator.name: self.translator}
+        self.backends_lock = threading.Lock()
+        self.language_detector = LanguageDetector(CACHE_DIR / "languages.sqlite3")
         self.print_ascii_art()
 
+    def get_backend(self, name=None):
+        """
+        Motor de traducción por nombre, creado en el primer uso y reutilizado después.
+
+        :param name: Clave de TRANSLATION_BACKENDS, un motor ya creado o None para el predeterminado.
+        :raises ValueError: Si el motor no existe.
+        """
+        if not name:
+            return self.translator
+        if isinstance(name, TranslationBackend):
+            return name
+        with self.backends_lock:
+            if name not in self.backends:
+                if name not in TRANSLATION_BACKENDS:
+                    raise ValueError(f"Motor de traducción desconocido: {name!r}")
+                self.backends[name] = TRANSLATION_BACKENDS[name]()
+            return self.backends[name]
+
     def print_ascii_art(self):
         print(Fore.CYAN + r"""
           __                .___.__          
@@ -79,6 +2675,7 @@ class YouTubeDownloader:
 
     def setup_dirs(self):
         TEMP_DIR.mkdir(parents=True, exist_ok=True)
+        SMALL_TEMP_DIR.mkdir(parents=True, exist_ok=True)
         FINAL_DIR.mkdir(parents=True, exist_ok=True)  # Crea directorio si no existe
         print(Fore.CYAN + f"\nDirectorio de salida: {FINAL_DIR.resolve()}")
 
@@ -111,178 +2708,397 @@ class YouTubeDownloader:
             print(Fore.RED + "✘ Formato de rango inválido. Usa un formato como '1-5' o '3'.")
             sys.exit(1)
 
-    def find_files(self, video_path):
+    def find_files(self, video_path, extract=True, backend=None):
+        """
+        Busca en la carpeta temporal del video los subtítulos en cada idioma de
+        target_languages. Los idiomas que falten se traducen todos a la vez desde
+        el inglés (o desde otro subtítulo encontrado). Con extract=True, si no hay
+        ninguno, extrae antes las pistas incrustadas en el propio video (--embed-subs).
+
+        :return: Lista de tuplas (ruta, idioma) en el orden de target_languages, o
+            None si no hay subtítulos; esos se descargan juntos con fetch_missing_subs.
+        """
         video_stem = video_path.stem
+        video_id = video_id_from_path(video_path)
         print(Fore.CYAN + f"🔍 Procesando subtítulos para: {video_stem}")
 
-        # Buscar subtítulos en español usando el nuevo método
-        sub_path = self.collect_spanish_subs(video_stem)
-        if sub_path:
-            return sub_path
-
-        # Si no hay subtítulos en español, buscar en inglés y traducir
-        en_subs = list(TEMP_DIR.glob(f'{video_stem}.en.srt')) + \
-                list(TEMP_DIR.glob(f'{video_stem}.en.*.srt'))
-
-        if en_subs:
-            print(Fore.YELLOW + "⚠ Subtítulos en español no encontrados, traduciendo desde inglés...")
-            return self.translate_subs(en_subs[0], target_language="es")
-
-        # Intentar descarga alternativa si no hay subtítulos
-        print(Fore.YELLOW + "⚠ No se encontraron subtítulos, intentando descarga alternativa...")
-        try:
-            subprocess.run([
-                'yt-dlp',
-                '--skip-download',
-                '--write-auto-sub',
-                '--sub-langs', 'en',
-                '-o', str(TEMP_DIR / f'{video_stem}.%(ext)s'),
-                '--', video_path.name.split('_', 1)[1]
-            ], check=True)
-            
-            new_subs = list(TEMP_DIR.glob(f'{video_stem}.en.*.srt'))
-            if new_subs:
-                return self.translate_subs(new_subs[0], target_language="es")
-        except subprocess.CalledProcessError as e:
-            print(Fore.RED + f"✘ Error en descarga alternativa: {str(e)}")
+        found = {}
+        for lang in self.target_languages:
+            sub_path = self.collect_subs(video_path, lang)
+            if sub_path:
+                found[lang] = sub_path
+        missing = [lang for lang in self.target_languages if lang not in found]
+
+        # Fuente para traducir lo que falta: inglés y, si no hay, cualquier subtítulo encontrado
+        pattern = glob.escape(video_stem)  # Los títulos pueden contener corchetes
+        subs_dir = small_files_dir(video_path)
+        sources = list(found.values())
+        if missing:
+            sources = list(subs_dir.glob(f'{pattern}.en.srt')) + \
+                list(subs_dir.glob(f'{pattern}.en.*.srt')) + sources
+
+        if not sources:
+            # Las pistas incrustadas en el MKV se extraen en local, sin red
+            if extract and video_path.exists():
+                extracted = extract_embedded_subs(video_path, subs_dir)
+                if extracted:
+                    print(Fore.GREEN + f"✔ {len(extracted)} pistas de subtítulos extraídas del video")
+                    return self.find_files(video_path, extract=False, backend=backend)
+            print(Fore.YELLOW + f"⚠ Sin subtítulos locales para: {video_stem}")
+            return None
+
+        self.manifest.record(video_id, "subs", {"subs": file_fingerprint(sources[0])}, sources[0])
+        if missing:
+            print(Fore.YELLOW + f"⚠ Sin subtítulos en {', '.join(missing)}, traduciendo desde {sources[0].name}...")
+            found.update(self.translate_video_subs(video_id, sources[0], missing, backend))
+        return [(found[lang], lang) for lang in self.target_languages if lang in found] or None
+
+    def fetch_missing_subs(self, video_paths):
+        """
+        Descarga con una sola llamada a yt-dlp los subtítulos de varios videos.
+        La URL sale del .info.json de cada video (--write-info-json) y, si no
+        está, del ID del nombre del archivo.
+        """
+        urls, videos = [], {}
+        for video_path in video_paths:
+            info_path = small_files_dir(video_path) / f"{video_path.stem}.info.json"
+            try:
+                with open(info_path, encoding="utf-8") as file:
+                    info = json.load(file)
+                video_id, url = info['id'], info.get('webpage_url')
+            except (OSError, ValueError, KeyError):
+                video_id, url = video_id_from_path(video_path), None
+            if not video_id:
+                print(Fore.RED + f"✘ Sin ID de video para buscar subtítulos: {video_path.name}")
+                continue
+            videos[video_id] = video_path
+            urls.append(url or f"https://www.youtube.com/watch?v={video_id}")
+        if not urls:
+            return
+
+        batch_dir = SMALL_TEMP_DIR / SUBS_BATCH_DIR
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        print(Fore.YELLOW + f"⚠ Descargando subtítulos de {len(urls)} videos en una sola llamada...")
+        result = subprocess.run([
+            'yt-dlp',
+            '--skip-download',
+            '--write-subs',
+            '--write-auto-subs',
+            '--sub-langs', subtitle_langs(self.target_languages, self.format_policy),
+            '--convert-subs', 'srt',
+            '--ignore-errors',
+            '--cookies-from-browser', 'chrome',
+            '-o', str(batch_dir / '%(id)s.%(ext)s'),
+            '--', *urls
+        ])
+        if result.returncode:
+            print(Fore.YELLOW + f"⚠ yt-dlp terminó con código {result.returncode}; se usan los subtítulos obtenidos")
+
+        # '<id>.en.srt' → '<nombre del video>.en.srt', donde los busca find_files
+        for sub_path in batch_dir.glob('*.srt'):
+            video_id, _, rest = sub_path.name.partition('.')
+            if video_id in videos:
+                video_path = videos[video_id]
+                subs_dir = small_files_dir(video_path)
+                subs_dir.mkdir(parents=True, exist_ok=True)
+                os.replace(sub_path, subs_dir / f"{video_path.stem}.{rest}")
+        shutil.rmtree(batch_dir, ignore_errors=True)
+
+    def process_videos(self):
+        """Procesa todos los videos descargados en TEMP_DIR a través del pipeline"""
+        video_files = temp_downloads(self.format_policy)  # Orden por fecha de descarga
+        pipeline = VideoPipeline(self)
+        for video_path in video_files:
+            pipeline.submit(video_path)
+        pipeline.join()
+
+    def translate_video_subs(self, video_id, sub_path, target_languages, backend=None):
+        """
+        Traduce los subtítulos de un video a los idiomas que el manifiesto aún no tenga
+        con ese mismo motor.
+
+        :return: Diccionario {idioma: ruta traducida}.
+        """
+        source = file_fingerprint(sub_path)
+        engine = self.get_backend(backend).name
+        translated, pending = {}, []
+        for lang in target_languages:
+            inputs = {"source": source, "lang": lang, "backend": engine}
+            done = self.manifest.stage_output(video_id, f"translation.{lang}", inputs)
+            if done:
+                print(Fore.GREEN + f"✔ Traducción ya hecha en una ejecución anterior: {done.name}")
+                translated[lang] = done
+            else:
+                pending.append(lang)
+        if pending:
+            for lang, translated_path in self.translate_subs(sub_path, pending, backend).items():
+                inputs = {"source": source, "lang": lang, "backend": engine}
+                self.manifest.record(video_id, f"translation.{lang}", inputs, translated_path)
+                translated[lang] = translated_path
+        return translated
+
+    def finalize_video(self, video_path, subs_path, idx):
+        """
+        Mezcla el video con sus subtítulos o lo mueve tal cual si no hay.
 
-        return None
+        :param subs_path: Lista de tuplas (ruta, idioma) de find_files, o None.
+        :return: Ruta del archivo final o None si ocurre un error.
+        """
+        video_id = video_id_from_path(video_path)
+        inputs = {
+            "video": file_fingerprint(video_path, full_hash=False),
+            "subs": [[lang, file_fingerprint(path)] for path, lang in subs_path] if subs_path else None,
+        }
+        done = self.manifest.stage_output(video_id, "mux", inputs)
+        if done:
+            print(Fore.GREEN + f"✔ {video_path.name} ya estaba finalizado: {done}")
+            self.release_temp_files(video_path)
+            return done
 
-    def process_videos(self):
-        """Nuevo método para manejar múltiples videos"""
-        video_files = sorted(TEMP_DIR.glob('*.mkv'), key=os.path.getmtime)  # Orden por fecha de descarga
-        
-        for idx, video_path in enumerate(video_files, 1):
-            print(Fore.MAGENTA + f"\nProcesando video {idx}/{len(video_files)}:")
-            print(Fore.WHITE + f"Archivo: {video_path.name}")
-            
-            self.video_path = video_path
-            subs_path = self.find_files(video_path)
-            
-            if subs_path:
-                # Traducir subtítulos antes de mezclarlos
-                translated_path = self.translate_subs(subs_path, target_language="es")
-                if translated_path:
-                    self.mux_subtitles(video_path, translated_path, idx)
-                else:
-                    print(f"✘ Traducción fallida para subtítulos de {video_path.name}")
-            else:
+        if subs_path:
+            final_path = self.mux_subtitles(video_path, subs_path, idx)
+        else:
+            # Si no hay subtítulos que mezclar, el video se mueve tal cual sin reescribirlo
+            final_path = FINAL_DIR / video_path.name
+            method = commit_file(video_path, final_path)
+            if self.format_policy.subtitles == 'mux':
                 print(f"✘ No se encontraron subtítulos para: {video_path.name}")
-                # Si no hay subtítulos, copiar el video directamente
-                final_path = FINAL_DIR / video_path.name
-                shutil.copy(video_path, final_path)
-                print(Fore.YELLOW + f"⚠ Video copiado sin subtítulos: {final_path.name}")
+                print(Fore.YELLOW + f"⚠ Video guardado sin subtítulos ({method}): {final_path.name}")
+            else:
+                print(Fore.GREEN + f"✔ Guardado sin mezclar ({method}): {final_path.name}")
+        if final_path:
+            self.manifest.record(video_id, "mux", inputs, final_path)
+            self.release_temp_files(video_path)
+        return final_path
+
+    def release_temp_files(self, video_path):
+        """
+        Borra el espacio de trabajo del video (sus carpetas en TEMP_DIR y
+        SMALL_TEMP_DIR) en cuanto se guarda el resultado, para que el disco se
+        libere video a video y no al final de la lista.
+        """
+        video_path = Path(video_path)
+        workspaces = {video_path.parent, small_files_dir(video_path)}
+        for folder in workspaces:
+            if folder.parent in (TEMP_DIR, SMALL_TEMP_DIR) and is_workspace(folder):
+                try:
+                    shutil.rmtree(folder)
+                except OSError as e:
+                    print(Fore.YELLOW + f"⚠ No se pudo borrar {folder.name}: {e}")
+                continue
+            # Archivos sueltos: solo los de este video
+            for path in folder.glob(f"{glob.escape(video_path.stem)}.*"):
+                try:
+                    path.unlink()
+                except OSError as e:
+                    print(Fore.YELLOW + f"⚠ No se pudo borrar {path.name}: {e}")
     
-    def translate_subs(self, sub_path, target_language="es"):
+    def translate_subs(self, sub_path, target_languages=None, backend=None):
         """
-        Traduce un archivo de subtítulos a otro idioma utilizando deep-translator.
+        Traduce un archivo de subtítulos a uno o varios idiomas con peticiones en paralelo.
+
+        El archivo se lee por tramos de TRANSLATE_WINDOW bloques, así que la
+        memoria no depende de su tamaño. Cada tramo se traduce a todos los
+        idiomas a la vez (el grupo de peticiones lo comparten y su tamaño lo fija
+        el motor) y se guarda en el diario de cada idioma (TranslationJournal):
+        si la traducción se interrumpe, la siguiente llamada sigue desde el
+        último tramo guardado.
 
         :param sub_path: Ruta al archivo de subtítulos.
-        :param target_language: Idioma objetivo para la traducción (por defecto: "es").
-        :return: Ruta del archivo traducido o None si ocurre un error.
+        :param target_languages: Idioma o lista de idiomas (por defecto: target_languages).
+        :param backend: Nombre del motor de traducción (por defecto: el del programa).
+        :return: Diccionario {idioma: ruta traducida} con los idiomas que se tradujeron.
         """
+        backend = self.get_backend(backend)
+        if isinstance(target_languages, str):
+            target_languages = [target_languages]
+        target_languages = list(target_languages or self.target_languages)
         try:
             # Detectar codificación del archivo
-            with open(sub_path, "rb") as file:
-                raw_data = file.read()
-                detected = chardet.detect(raw_data)
-                encoding = detected["encoding"]
-                print(f"📂 Codificación detectada para {sub_path.name}: {encoding}")
-
-            # Leer subtítulos con la codificación detectada
-            with open(sub_path, "r", encoding=encoding) as file:
-                subtitles = file.readlines()
-
-            # Configurar traductor
-            translator = GoogleTranslator(source="auto", target=target_language)
-
-            # Traducir subtítulos línea por línea
-            translated_subtitles = []
-            total_lines = len(subtitles)
-            for idx, line in enumerate(subtitles, start=1):
-                if line.strip():  # Traducir líneas no vacías
-                    try:
-                        # Mostrar progreso
-                        print(f"Traduciendo línea {idx}/{total_lines}...", end="\r")
-                        translated_line = translator.translate(line.strip())
-                        translated_subtitles.append(translated_line + "\n")
-                    except Exception as e:
-                        print(f"\n⚠ Error al traducir línea {idx}: {line.strip()[:50]}... | {e}")
-                        translated_subtitles.append(line)  # Mantener línea original en caso de error
-                else:
-                    translated_subtitles.append(line)
-
-            print("\n✔ Traducción completa.")
+            encoding = detect_encoding(sub_path)
+            print(f"📂 Codificación detectada para {sub_path.name}: {encoding}")
+            source = file_fingerprint(sub_path)
+            journals = {
+                lang: TranslationJournal(sub_path.with_suffix(f".{lang}.srt"),
+                                         {"source": source, "lang": lang, "backend": backend.name})
+                for lang in target_languages
+            }
+        except OSError as e:
+            print(f"✘ Error al leer {sub_path.name}: {e}")
+            return {}
+        for lang, journal in journals.items():
+            if journal.resumed:
+                print(Fore.CYAN + f"↻ Reanudando {journal.dest_path.name} desde el bloque {journal.source_done + 1}")
 
-            # Guardar subtítulos traducidos
-            translated_path = sub_path.with_suffix(f".{target_language}.srt")
-            with open(translated_path, "w", encoding="utf-8") as file:
-                file.writelines(translated_subtitles)
+        def translate_to(lang, cues, captions, executor):
+            cues = [SubtitleCue(cue.index, cue.timing, cue.text) for cue in (captions.units if captions else cues)]
+            # Traducir subtítulos por lotes de bloques, reutilizando la memoria de traducción
+            with METRICS.timer('translate', cues=len(cues), chars_saved=captions.saved_chars if captions else 0,
+                               lang=lang, backend=backend.name, video=sub_path.name):
+                translate_cues(
+                    cues,
+                    lambda texts: backend.translate_batch(texts, "auto", lang),
+                    memory=self.memory,
+                    src=backend.memory_src("auto"),
+                    dest=lang,
+                    executor=executor,
+                    max_chars=backend.max_batch_chars,
+                    max_items=backend.max_batch_items,
+                )
+            return captions.resegment(cues) if captions else cues
 
-            print(f"✔ Subtítulos traducidos guardados en: {translated_path}")
-            return translated_path
+        failed, total, saved, collapsed = set(), 0, 0, 0
+        try:
+            with open(sub_path, "r", encoding=encoding) as file, \
+                    ThreadPoolExecutor(max_workers=backend.concurrency) as executor, \
+                    ThreadPoolExecutor(max_workers=max(1, len(target_languages))) as languages:
+                cues = iter_srt(file)
+                while True:
+                    window = list(itertools.islice(cues, TRANSLATE_WINDOW))
+                    if not window:
+                        break
+                    futures = {}
+                    segments = {}  # Bloques ya hechos en este tramo → (bloques pendientes, frases)
+                    for lang, journal in journals.items():
+                        skip = journal.source_done - total
+                        if lang in failed or skip >= len(window):
+                            continue
+                        if skip not in segments:
+                            # Subtítulos automáticos: se traduce cada frase una vez, no cada repetición
+                            pending = window[max(0, skip):]
+                            segments[skip] = pending, CaptionUnits.from_cues(pending)
+                        pending, captions = segments[skip]
+                        futures[languages.submit(translate_to, lang, pending, captions, executor)] = lang
+                    for _, captions in segments.values():
+                        if captions:
+                            saved += captions.saved_chars
+                            collapsed += len(captions.units)
+                    for future in as_completed(futures):
+                        lang = futures[future]
+                        pending, captions = segments[journals[lang].source_done - total]
+                        try:
+                            journals[lang].append(future.result(), len(pending), renumber=bool(captions))
+                        except ServiceUnavailable as e:
+                            failed.add(lang)
+                            print(f"\n✘ Servicio de traducción no disponible para {sub_path.name} ({lang}): {e}. "
+                                  f"Lo traducido queda en el diario y se sigue en la próxima ejecución")
+                        except Exception as e:
+                            failed.add(lang)
+                            print(f"\n✘ Error inesperado al traducir subtítulos {sub_path.name} ({lang}): {e}")
+                    total += len(window)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"✘ Error al leer {sub_path.name}: {e}")
+            failed.update(target_languages)
+        except BaseException:
+            for journal in journals.values():
+                journal.close()  # Ctrl-C: lo guardado se reanuda en la próxima ejecución
+            raise
+        for lang in failed:
+            journals[lang].close()
 
-        except UnicodeDecodeError as e:
-            print(f"✘ Error de codificación en {sub_path.name}: {e}")
-            return None
-        except Exception as e:
-            print(f"✘ Error inesperado al traducir subtítulos {sub_path.name}: {e}")
-            return None
+        if saved:
+            print(f"\n♻ Subtítulo automático: {collapsed} frases, {saved} caracteres menos por idioma")
+        translated = {}
+        for lang, journal in journals.items():
+            if lang not in failed:
+                translated[lang] = journal.commit()
+                print(f"\n✔ Subtítulos traducidos ({lang}) guardados en: {translated[lang]}")
+        return translated
 
     def mux_subtitles(self, video_path, subs_path, idx):
         """
-        Combina el video con los subtítulos en un nuevo archivo.
+        Combina el video con todas sus pistas de subtítulos directamente en FINAL_DIR,
+        con una sola llamada a ffmpeg. La primera pista queda como predeterminada.
+
+        Si el MKV ya trae incrustadas todas esas pistas, solo se editan sus
+        cabeceras en el sitio (edit_embedded_tracks) y el archivo se mueve sin
+        reescribirlo. Si no, ffmpeg escribe en un nombre temporal dentro de
+        FINAL_DIR que se renombra al terminar, así nunca queda un archivo final a medias.
+
+        :param subs_path: Lista de tuplas (ruta, idioma).
+        :return: Ruta del archivo final o None si ocurre un error.
         """
         import subprocess
 
         print(f"🎞 Procesando archivo de video: {video_path.name}")
-        output_path = video_path.parent / f"{video_path.stem}_muxed{video_path.suffix}"
-
-        # Asegurarnos de que subs_list sea una lista de tuplas
-        if isinstance(subs_path, PosixPath):
-            # Convertir un único subtítulo en una lista de tuplas
-            subs_list = [(subs_path, "español")]
-        elif isinstance(subs_path, list):
-            # Validar que la lista esté en el formato correcto
-            subs_list = [(path, "español") for path in subs_path]
-        else:
-            raise ValueError(f"Formato de subs_path no reconocido: {subs_path}")
+        output_path = FINAL_DIR / video_path.name
+        edits = embedded_track_edits(video_path, subs_path)
+        if edits is not None and self.edit_embedded_tracks(video_path, edits, subs_path):
+            method = commit_file(video_path, output_path)
+            print(Fore.GREEN + f"✔ Archivo final sin remezclar ({method}): {output_path}")
+            return output_path
+        print(f"⟳ {video_path.name}: se añaden pistas nuevas, remezcla completa con ffmpeg")
+        tmp_path = FINAL_DIR / f".{video_path.stem}.part{video_path.suffix}"
 
-        # Construcción del comando ffmpeg
+        # Construcción del comando ffmpeg: una entrada por subtítulo y todas mapeadas
         cmd = ["ffmpeg", "-i", str(video_path)]
-        for i, (sub_path, label) in enumerate(subs_list):
+        for sub_path, _ in subs_path:
             cmd.extend(["-sub_charenc", "UTF-8", "-i", str(sub_path)])
-        cmd.extend(["-map", "0:v", "-map", "0:a", "-map", f"{i + 1}:s", "-c", "copy", str(output_path)])
+        cmd.extend(["-map", "0:v", "-map", "0:a"])
+        for i in range(len(subs_path)):
+            cmd.extend(["-map", f"{i + 1}:s"])
+        for i, (_, lang) in enumerate(subs_path):
+            cmd.extend([
+                f"-metadata:s:s:{i}", f"language={ISO639_1.get(lang, lang)}",
+                f"-metadata:s:s:{i}", f"title={language_name(lang)}",
+                f"-disposition:s:{i}", "default" if i == 0 else "0",
+            ])
+        cmd.extend(["-c", "copy"])
+        if video_path.suffix.lower() == '.mp4':
+            cmd.extend(["-c:s", "mov_text"])  # MP4 no admite SRT; el texto se convierte, el video no
+        cmd.extend(["-y", str(tmp_path)])
 
         try:
             print(f"▶ Ejecutando ffmpeg: {' '.join(cmd)}")
-            subprocess.run(cmd, check=True)
+            with METRICS.timer('mux', video=video_path.name, tracks=len(subs_path), method='remux'):
+                subprocess.run(cmd, check=True)
+            os.replace(tmp_path, output_path)
             print(f"✔ Archivo combinado creado: {output_path}")
-        except subprocess.CalledProcessError as e:
+            return output_path
+        except (subprocess.CalledProcessError, OSError) as e:
             print(f"❌ Error al combinar el video con subtítulos: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+
+    def edit_embedded_tracks(self, video_path, edits, subs_path):
+        """
+        Deja las pistas ya incrustadas como predeterminada, idioma y nombre con
+        mkvpropedit: reescribe unos bytes de la cabecera, no el video.
+
+        :param edits: Argumentos de embedded_track_edits.
+        :return: True si el archivo quedó listo; False si hay que remezclar.
+        """
+        langs = ', '.join(lang for _, lang in subs_path)
+        if not edits:
+            print(Fore.GREEN + f"✎ {video_path.name}: las pistas ({langs}) ya estaban incrustadas y marcadas")
+            METRICS.observe('mux', 0, video=video_path.name, tracks=len(subs_path), method='unchanged')
+            return True
+        try:
+            with METRICS.timer('mux', video=video_path.name, tracks=len(subs_path), method='propedit'):
+                subprocess.run(['mkvpropedit', str(video_path), *edits], check=True, capture_output=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(Fore.YELLOW + f"⚠ mkvpropedit falló en {video_path.name} ({e}); se remezcla el archivo")
+            return False
+        print(Fore.GREEN + f"✎ {video_path.name}: pistas ({langs}) ya incrustadas, "
+                           f"cabeceras editadas en el sitio con mkvpropedit")
+        return True
 
     def clean_up(self):
-        for f in TEMP_DIR.glob('*'):
-            try:
-                f.unlink()
-            except:
-                pass
+        """Borra los espacios de trabajo que quedan en las carpetas temporales; nada más."""
+        for root in {TEMP_DIR, SMALL_TEMP_DIR}:
+            if not root.is_dir():
+                continue
+            for folder in root.iterdir():
+                if folder.name == SUBS_BATCH_DIR or is_workspace(folder):
+                    shutil.rmtree(folder, ignore_errors=True)
 
     def check_dependencies(self):
-        deps = {
-            'yt-dlp': ['yt-dlp', '--version'],
-            'mkvmerge': ['mkvmerge', '-V'],
-            'ffmpeg': ['ffmpeg', '-version']
-        }
-        
-        missing = []
-        for name, cmd in deps.items():
-            try:
-                subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            except FileNotFoundError:
-                missing.append(name)
+        if self.tool_versions is None:
+            self.tool_versions = probe_dependencies()
+        missing = [name for name, version in self.tool_versions.items() if version is None]
                 
         if missing:
+            self.tool_versions = None  # Volver a comprobar tras instalarlas
             print(Fore.RED + "✘ Faltan dependencias:")
             for dep in missing:
                 print(f" - {dep}")
@@ -297,17 +3113,8 @@ class YouTubeDownloader:
 
     def handle_playlist_range(self, range_input):
         """Procesa el input de rango y devuelve (start, end)"""
-        if not range_input:
-            return None, None
-            
         try:
-            if '-' in range_input:
-                parts = range_input.split('-')
-                start = int(parts[0]) if parts[0] else 1
-                end = int(parts[1]) if len(parts) > 1 and parts[1] else None
-                return start, end
-            else:
-                return int(range_input), int(range_input)
+            return parse_playlist_range(range_input)
         except ValueError:
             print(Fore.RED + "✘ Formato de rango inválido")
             sys.exit(1)
@@ -322,6 +3129,123 @@ class YouTubeDownloader:
             print(Fore.YELLOW + f"⚠ Error extrayendo título: {str(e)}")
             return "Video_Desconocido"
 
+    def build_download_cmd(self, url, start=None, end=None, output_template=OUTPUT_TEMPLATE, items=None):
+        """Construye el comando yt-dlp para una URL y un rango (o unas posiciones) de la lista."""
+        # Cada video en su propia carpeta, que se borra en cuanto se guarda el resultado
+        output = workspace_dir(TEMP_DIR, '%(id)s') / output_template
+        small_output = workspace_dir(SMALL_TEMP_DIR, '%(id)s') / output_template
+        return ytdlp_command(
+            url, self.format_policy, output, ARCHIVE_PATH, start, end,
+            sub_langs=subtitle_langs(self.target_languages, self.format_policy),
+            small_output=small_output if SMALL_TEMP_DIR != TEMP_DIR else None, items=items,
+        )
+
+    def list_playlist(self, url):
+        """
+        Entradas de una lista sin metadatos de cada video (--flat-playlist).
+
+        :return: Lista de entradas, o None si no se pudo listar.
+        """
+        try:
+            result = subprocess.run(['yt-dlp', '--flat-playlist', '-J', '--cookies-from-browser', 'chrome',
+                                     '--', url], capture_output=True, text=True, timeout=600)
+            listing = json.loads(result.stdout or 'null') or {}
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            print(Fore.YELLOW + f"⚠ No se pudo listar {url}: {e}")
+            return None
+        if result.returncode and not listing:
+            return None
+        return listing.get('entries') or []
+
+    def plan_playlist(self, url, start=None, end=None):
+        """
+        Lista la lista una vez (--flat-playlist), aplica el rango y completa los
+        metadatos que falten en caché con llamadas a yt-dlp en paralelo.
+
+        :return: PlaylistPlan, o None si la URL no se puede planificar (canales
+            con pestañas, errores de red...): entonces se descarga sin plan.
+        """
+        with METRICS.timer('plan', url=url) as fields:
+            flat = self.list_playlist(url)
+            if not flat or not is_flat_listing(flat):
+                return None
+
+            finished = set(self.manifest.completed_ids())
+            entries = []
+            for index, item in enumerate(flat, 1):
+                if (start and index < start) or (end and index > end):
+                    continue
+                entries.append(PlanEntry(index, item['id'], item.get('title') or item['id'],
+                                         duration=item.get('duration'), done=item['id'] in finished))
+
+            cache = MetadataCache()
+            pending = [entry for entry in entries if not entry.done and not cache.get(entry.video_id)]
+            if pending:
+                print(Fore.CYAN + f"🔎 Consultando {len(pending)} videos ({len(entries) - len(pending)} en caché)...")
+                chunks = [pending[i:i + PLAN_CHUNK] for i in range(0, len(pending), PLAN_CHUNK)]
+                with ThreadPoolExecutor(max_workers=PLAN_WORKERS, thread_name_prefix="plan") as pool:
+                    list(pool.map(lambda chunk: self._fetch_metadata(chunk, cache), chunks))
+                cache.save()
+
+            bitrate = ESTIMATED_AUDIO_BITRATE if self.format_policy.audio_only else ESTIMATED_BITRATE
+            for entry in entries:
+                meta = cache.get(entry.video_id) or {}
+                entry.title = meta.get('title') or entry.title
+                entry.duration = meta.get('duration') or entry.duration
+                entry.subtitles = meta.get('subtitles')
+                entry.size = meta.get('size') or (int(entry.duration * bitrate / 8) if entry.duration else None)
+
+            plan = PlaylistPlan(url, entries, self.target_languages,
+                                speed=METRICS.recent_rate('download', 'bytes_per_second'))
+            fields.update(videos=len(plan.entries), bytes=plan.total_bytes, cached=len(entries) - len(pending))
+        return plan
+
+    def _fetch_metadata(self, entries, cache):
+        """Pide a yt-dlp los metadatos completos de varios videos en un solo proceso."""
+        urls = [f"https://www.youtube.com/watch?v={entry.video_id}" for entry in entries]
+        try:
+            result = subprocess.run([
+                'yt-dlp', '-j', '--skip-download', '--no-playlist', '--ignore-errors',
+                '--cookies-from-browser', 'chrome', *self.format_policy.format_args(), '--', *urls
+            ], capture_output=True, text=True, timeout=1800)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(Fore.YELLOW + f"⚠ No se pudieron consultar {len(urls)} videos: {e}")
+            return
+        for line in result.stdout.splitlines():
+            try:
+                info = json.loads(line)
+            except ValueError:
+                continue
+            formats = info.get('requested_formats') or [info]
+            sizes = [fmt.get('filesize') or fmt.get('filesize_approx') for fmt in formats]
+            cache.put(
+                info['id'],
+                title=info.get('title'),
+                duration=info.get('duration'),
+                size=sum(sizes) if all(sizes) else None,
+                subtitles=sorted(set(info.get('subtitles') or {}) | set(info.get('automatic_captions') or {})),
+            )
+
+    def run_batch(self, job_file, workers=BATCH_WORKERS, per_host=BATCH_PER_HOST):
+        """
+        Descarga todas las URLs de un archivo de trabajos sin intervención.
+
+        :param job_file: Ruta al archivo de trabajos (ver parse_job_file).
+        :param workers: Procesos yt-dlp simultáneos.
+        :param per_host: Procesos simultáneos contra un mismo servidor.
+        """
+        self.check_dependencies()
+        jobs = parse_job_file(job_file)
+        if not jobs:
+            print(Fore.RED + "✘ El archivo de trabajos no contiene URLs válidas.")
+            return
+        print(Fore.CYAN + f"📋 {len(jobs)} trabajos, {workers} procesos (máx. {per_host} por servidor)")
+        self.manifest.write_archive(ARCHIVE_PATH)
+        BatchScheduler(self, jobs, workers=workers, per_host=per_host).run()
+        self.clean_up()
+        METRICS.flush()
+        print(Fore.CYAN + "\n✨ Lote finalizado correctamente")
+
     def run(self):
         self.setup_dirs()
         self.check_dependencies()
@@ -333,30 +3257,37 @@ class YouTubeDownloader:
         range_input = input(Fore.WHITE + ">>> ").strip()
         start, end = self.handle_playlist_range(range_input)
 
-        try:
-            # Configurar comando yt-dlp
-            cmd = [
-                'yt-dlp',
-                '--newline',  # Crucial para el procesamiento de líneas
-                '--console-title',  # Mejora la salida de progreso
-                '--cookies-from-browser', 'chrome',
-                '-f', 'bestvideo+bestaudio',
-                '--merge-output-format', 'mkv',
-                '--write-subs',
-                '--write-auto-subs',
-                '--sub-langs', 'en.*,es.*',
-                '--convert-subs', 'srt',
-                '--embed-subs',
-                '--ignore-errors',
-                '--yes-playlist',
-                '-o', str(TEMP_DIR / '%(playlist_index)03d_%(title)s.%(ext)s'),
-                url
-            ]
+        self.download(url, start, end)
+        print(Fore.CYAN + "\n✨ Proceso finalizado correctamente")
+
+    def download(self, url, start=None, end=None, exclusive=True, backend=None):
+        """
+        Descarga una URL y procesa cada video en cuanto termina.
+
+        :param backend: Motor de traducción para los subtítulos de esta descarga.
+        :param exclusive: True si esta descarga es la única que usa TEMP_DIR: entonces
+            también se procesan los videos que yt-dlp no anunció y se vacían las
+            carpetas temporales al final. El daemon lo desactiva porque ejecuta varias descargas a la vez.
+        :return: Lista de archivos finales generados.
+        """
+        from tqdm import tqdm
 
-            # Agregar parámetros de rango
-            if start or end:
-                cmd += ['--playlist-start', str(start), '--playlist-end', str(end) if end else '9999']
+        # Las listas se planifican antes: el rango se aplica al plan y el orden lo decide él
+        items = None
+        if is_playlist_url(url):
+            plan = self.plan_playlist(url, start, end)
+            if plan:
+                plan.print_summary()
+                if not plan.entries:
+                    print(Fore.GREEN + "✔ Todos los videos del rango ya estaban terminados")
+                    return []
+                items = plan.items()
 
+        try:
+            self.manifest.write_archive(ARCHIVE_PATH)
+            cmd = self.build_download_cmd(url, start, end, items=items)
+
+            pipeline = VideoPipeline(self, backend=backend)
             try:
                 process = subprocess.Popen(
                     cmd,
@@ -367,41 +3298,40 @@ class YouTubeDownloader:
                     text=True  # Asegurar salida como texto
                 )
                 
-                # Captura números decimales o enteros
-                progress_pattern = re.compile(r'\[(?:download)\]\s+(\d{1,3}(?:\.\d+)?)%')  
-                current_pbar = None
-                video_count = 0
-                title = "Inicializando..."
+                bars = {}  # Archivo en descarga → barra de progreso
 
-                for line in iter(process.stdout.readline, ''):
-                    line = line.strip()
-                    #print(line)  # Debug: Verifica el contenido de la línea
-                    
-                    # Detectar nuevo video
-                    if '[download]' in line and 'of' in line and 'at' in line:
-                        video_count += 1
-                        current_pbar = tqdm(
-                            total=100,
-                            desc=f"{Fore.BLUE}📥 Video {video_count}: {title[:35]}",
-                            bar_format="{desc}: {percentage:3.0f}% |{bar:50}| {n_fmt}/{total_fmt}",
-                            leave=False
-                        )
-
-                    # Actualizar el progreso
-                    match = progress_pattern.search(line)
-                    if match and current_pbar:
-                        progress = float(match.group(1))
-                        current_pbar.n = progress
-                        current_pbar.refresh()
-
-                        # Si el progreso alcanza el 100%, cierra la barra
-                        if progress >= 100.0:
-                            current_pbar.close()
-                            current_pbar = None
-
-                # Cierra cualquier barra restante al final del proceso
-                if current_pbar:
-                    current_pbar.close()
+                with self.disk_guard.watch(process, busy=pipeline.busy):
+                    for line in iter(process.stdout.readline, ''):
+                        line = line.strip()
+
+                        # Video terminado: pasa al pipeline mientras sigue la descarga
+                        if line.startswith(DONE_MARKER):
+                            pipeline.submit(line[len(DONE_MARKER):])
+                            continue
+
+                        event = DownloadProgress.from_line(line)
+                        if not event:
+                            continue
+                        bar = bars.get(event.filename)
+                        if bar is None:
+                            bar = bars[event.filename] = tqdm(
+                                total=event.total_bytes,
+                                desc=f"{Fore.BLUE}📥 {event.title[:35]}",
+                                unit="B", unit_scale=True, unit_divisor=1024,
+                                leave=False
+                            )
+                        bar.total = event.total_bytes
+                        bar.n = event.total_bytes if event.status == 'finished' and event.total_bytes else event.downloaded_bytes
+                        bar.refresh()
+
+                        if event.status in ('finished', 'error'):
+                            event.record()
+                            bars.pop(event.filename).close()
+
+                    # Cierra cualquier barra restante al final del proceso
+                    for bar in bars.values():
+                        bar.close()
+                    process.wait()
 
             except Exception as e:
                 print(Fore.RED + f"Error: {str(e)}")
@@ -410,11 +3340,17 @@ class YouTubeDownloader:
             print(Fore.RED + f"\n✘ Error en descarga: {str(e)}")
             sys.exit(1)
 
-        # Procesar videos descargados
-        print(Fore.GREEN + "\n✅ Descarga completada. Procesando videos...")
-        self.process_videos()
-        self.clean_up()
-        print(Fore.CYAN + "\n✨ Proceso finalizado correctamente")
+        # Videos que yt-dlp no anunció (p. ej. versiones sin --print after_move)
+        if exclusive:
+            for video_path in temp_downloads(self.format_policy):
+                pipeline.submit(video_path)
+
+        print(Fore.GREEN + "\n✅ Descarga completada. Esperando el procesamiento pendiente...")
+        pipeline.join()
+        if exclusive:
+            self.clean_up()
+        METRICS.flush()
+        return pipeline.results
 
     def detect_language(self, sub_path):
         """
@@ -423,12 +3359,8 @@ class YouTubeDownloader:
         :return: Código del idioma detectado (ejemplo: 'es', 'en') o None si ocurre un error.
         """
         try:
-            with open(sub_path, "r", encoding="utf-8") as file:
-                content = file.read()
-
-            # Usa deep-translator para detectar el idioma (basado en el contenido)
-            translator = GoogleTranslator(source='auto', target='es')
-            detected_lang = translator.detect(content)
+            # Detección local sobre una muestra del texto, sin red
+            detected_lang = self.language_detector.detect_file(sub_path)
             print(f"🔍 Idioma detectado para {sub_path.name}: {detected_lang}")
             return detected_lang
 
@@ -436,7 +3368,82 @@ class YouTubeDownloader:
             print(f"✘ Error al detectar idioma en {sub_path.name}: {e}")
             return None
     
-    def process_existing_videos(self, folder_path):
+    def process_video(self, video_file, subtitle_file, translate=None, backend=None):
+        """
+        Detecta el idioma de un subtítulo ya en UTF-8, lo traduce a los idiomas
+        de destino que falten y deja las pistas dentro del video (editando sus
+        cabeceras si ya estaban incrustadas o con mkvmerge en translated_<nombre>).
+
+        :param translate: None para preguntar; True/False para decidir sin preguntar.
+        :return: Tupla (video resultante o None si falló, [(subtítulo, idioma)] usados).
+        """
+        from langdetect.lang_detect_exception import LangDetectException
+
+        video_file, subtitle_file = Path(video_file), Path(subtitle_file)
+        tracks = []
+        print(Fore.CYAN + f"✔ Procesando: {video_file.name} con {subtitle_file.name}")
+
+        # Detectar idioma del subtítulo
+        try:
+            print(f"🔍 Detectando idioma para {subtitle_file.name}...")
+            detected_language = self.language_detector.detect_file(subtitle_file)
+            print(f"🗣 Idioma detectado: {detected_language}")
+
+            # El subtítulo vale tal cual si ya está en un idioma de destino
+            if detected_language in self.target_languages:
+                print(f"✔ {subtitle_file.name} ya está en {detected_language}. Usando directamente.")
+                tracks.append((subtitle_file, detected_language))
+            missing = [lang for lang in self.target_languages if lang != detected_language]
+            if missing:
+                if translate is None:
+                    response = input(Fore.CYAN + "\n¿Deseas traducir el subtitulo? (s/n): ").strip().lower()
+                else:
+                    response = 's' if translate else 'n'
+                if response in ('s', 'si', 'sí'):
+                    # Traducir a todos los idiomas que faltan de una vez
+                    translated = self.translate_subs(subtitle_file, missing, backend)
+                    if not translated:
+                        print(Fore.RED + f"✘ Error al traducir subtítulos para: {video_file.name}")
+                        return None, tracks
+                    tracks += [(translated[lang], lang) for lang in missing if lang in translated]
+                elif not tracks:
+                    tracks.append((subtitle_file, detected_language))  # Usar el subtítulo existente
+
+        except LangDetectException as e:
+            print(Fore.RED + f"✘ Error al detectar idioma de {subtitle_file.name}: {e}")
+            return None, tracks
+        except Exception as e:
+            print(Fore.RED + f"✘ Error inesperado: {e}")
+            return None, tracks
+
+        # Pistas ya incrustadas: se editan las cabeceras del propio video, sin copiarlo
+        edits = embedded_track_edits(video_file, tracks)
+        if edits is not None and self.edit_embedded_tracks(video_file, edits, tracks):
+            return video_file, tracks
+
+        # Insertar todas las pistas en el video con una sola llamada a mkvmerge
+        print(f"⟳ {video_file.name}: se añaden pistas nuevas, remezcla completa con mkvmerge")
+        output_path = video_file.with_name(f"translated_{video_file.name}")
+        cmd = ['mkvmerge', '-o', str(output_path.resolve()), str(video_file.resolve())]
+        for i, (track_path, lang) in enumerate(tracks):
+            cmd += [
+                '--track-name', f'0:{language_name(lang)}',
+                '--language', f'0:{lang}',
+                '--default-track', f'0:{"true" if i == 0 else "false"}',
+                str(track_path.resolve())
+            ]
+
+        try:
+            with METRICS.timer('mux', video=video_file.name, tracks=len(tracks), method='remux'):
+                subprocess.run(cmd, check=True)
+            print(Fore.GREEN + f"✅ Subtítulo insertado en: {output_path.name}")
+            return output_path, tracks
+        except subprocess.CalledProcessError as e:
+            print(Fore.RED + f"✘ Error al insertar subtítulos en: {video_file.name}")
+            print(Fore.RED + str(e))
+            return None, tracks
+
+    def process_existing_videos(self, folder_path, translate=None, backend=None):
         """
         Procesa videos y subtítulos existentes en una carpeta:
         1. Detecta si los subtítulos están en español.
@@ -444,131 +3451,133 @@ class YouTubeDownloader:
         3. Inserta los subtítulos como predeterminados en los videos.
 
         :param folder_path: Ruta de la carpeta con los videos y subtítulos.
+        :param translate: None para preguntar por cada subtítulo; True/False para decidir sin preguntar.
+        :param backend: Motor de traducción (por defecto: el del programa).
+        :return: Lista de videos generados (o editados en el sitio si ya traían las pistas).
         """
         folder = Path(folder_path)
+        outputs = []
         if not folder.is_dir():
             print(Fore.RED + "✘ La ruta proporcionada no es una carpeta válida.")
-            return
+            return outputs
 
-        # Buscar archivos de video y subtítulos
-        video_files = sorted(chain(
-            folder.glob('*.mkv'),
-            folder.glob('*.mp4'),
-            folder.glob('*.avi'),
-            folder.glob('*.mov'),
-        ))
-        subtitle_files = sorted(folder.glob('*.srt'))
+        # Indexar videos y subtítulos de la carpeta en una sola pasada
+        index = SubtitleIndex(folder)
+        video_files = index.video_files()
 
-        if not video_files or not subtitle_files:
+        if not video_files or not index.subtitles:
             print(Fore.RED + "✘ No se encontraron videos o subtítulos en la carpeta.")
-            return
+            return outputs
 
         print(Fore.CYAN + f"📁 Procesando carpeta: {folder.resolve()}")
 
-        # Convertir subtítulos a UTF-8 o validar si ya están en UTF-8
-        utf8_subtitles = []
-        for subtitle_file in subtitle_files:
-            if self.is_utf8(subtitle_file):
-                # Si ya está en UTF-8, agregarlo directamente
-                print(Fore.GREEN + f"✔ {subtitle_file.name} ya está en UTF-8.")
-                utf8_subtitles.append(subtitle_file)
-            else:
-                # Intentar convertirlo a UTF-8
-                utf8_sub_path = self.convert_srt_to_utf8(subtitle_file)
-                if utf8_sub_path:
-                    utf8_subtitles.append(utf8_sub_path)
-                else:
-                    print(Fore.RED + f"✘ No se pudo convertir {subtitle_file.name} a UTF-8. Omitiendo.")
+        # Convertir a UTF-8 (o validar) solo el subtítulo elegido para cada video
+        matches = {video: index.best_subtitle(video, self.target_languages[0]) for video in video_files}
+        utf8_subtitles = self.convert_srt_folder([sub for sub in matches.values() if sub])
 
         for video_file in video_files:
-            # Encontrar subtítulo correspondiente (mismo nombre base) en la lista de UTF-8
-            base_name = video_file.stem
-            subtitle_file = next((s for s in utf8_subtitles if s.stem.startswith(base_name)), None)
+            subtitle_file = utf8_subtitles.get(matches[video_file])
 
             if not subtitle_file:
                 print(Fore.YELLOW + f"⚠ No se encontró subtítulo UTF-8 para: {video_file.name}")
                 continue
 
-            print(Fore.CYAN + f"✔ Procesando: {video_file.name} con {subtitle_file.name}")
+            output_path, _ = self.process_video(video_file, subtitle_file, translate, backend)
+            if output_path:
+                outputs.append(output_path)
 
-            # Detectar idioma del subtítulo
-            try:
-                print(f"🔍 Detectando idioma para {subtitle_file.name}...")
-                with open(subtitle_file, "r", encoding="utf-8") as file:
-                    sample_text = ''.join(file.readlines()[:10])  # Usar las primeras 10 líneas como muestra
-                detected_language = detect(sample_text)
-                print(f"🗣 Idioma detectado: {detected_language}")
-
-                if detected_language == "es":
-                    print(f"✔ {subtitle_file.name} ya está en español. Usando directamente.")
-                    translated_path = subtitle_file  # Usar el subtítulo existente
-                else:
-                    response = input(Fore.CYAN + "\n¿Deseas traducir el subtitulo? (s/n): ").strip().lower()
-                    if response in ('s', 'si', 'sí'):
-                        # Traducir subtítulos
-                        translated_path = self.translate_subs(subtitle_file, target_language="es")
-                        if not translated_path:
-                            print(Fore.RED + f"✘ Error al traducir subtítulos para: {video_file.name}")
-                            continue
-                    else:
-                        translated_path = subtitle_file  # Usar el subtítulo existente
+        print(Fore.GREEN + "\n✔ Todos los videos procesados.")
+        METRICS.flush()
+        return outputs
 
-            except LangDetectException as e:
-                print(Fore.RED + f"✘ Error al detectar idioma de {subtitle_file.name}: {e}")
-                continue
-            except Exception as e:
-                print(Fore.RED + f"✘ Error inesperado: {e}")
-                continue
+    def translate_folder(self, folder_path, target_languages=None, backend=None):
+        """
+        Traduce todos los .srt de una carpeta a cada idioma de destino.
 
-            # Insertar subtítulos en el video
-            output_path = folder / f"translated_{video_file.name}"
-            cmd = [
-                'mkvmerge',
-                '-o', str(output_path.resolve()),
-                str(video_file.resolve()),
-                '--track-name', '0:Español',
-                '--language', '0:es',
-                '--default-track', '0:true',
-                str(translated_path.resolve())
-            ]
+        Cada archivo terminado se anota en FOLDER_JOURNAL dentro de la carpeta;
+        al repetir la orden se saltan los ya traducidos (si no cambiaron) y sus
+        traducciones, y un archivo a medias sigue desde su propio diario.
 
-            try:
-                subprocess.run(cmd, check=True)
-                print(Fore.GREEN + f"✅ Subtítulo insertado en: {output_path.name}")
-            except subprocess.CalledProcessError as e:
-                print(Fore.RED + f"✘ Error al insertar subtítulos en: {video_file.name}")
-                print(Fore.RED + str(e))
-                continue
+        :return: Lista de subtítulos traducidos.
+        """
+        folder = Path(folder_path)
+        if not folder.is_dir():
+            print(Fore.RED + "✘ La ruta proporcionada no es una carpeta válida.")
+            return []
+        target_languages = list(target_languages or self.target_languages)
+        engine = self.get_backend(backend).name
+        journal_path = folder / FOLDER_JOURNAL
+        done = {}
+        try:
+            with open(journal_path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                        done[record["file"]] = record
+                    except (ValueError, KeyError):
+                        continue  # Línea cortada por una interrupción
+        except OSError:
+            pass
+        outputs = {name for record in done.values() for name in record.get("outputs", [])}
 
-        print(Fore.GREEN + "\n✔ Todos los videos procesados.")
+        try:
+            journal = open(journal_path, "a", encoding="utf-8")
+        except OSError as e:
+            print(Fore.RED + f"✘ No se puede escribir en {folder}: {e}")
+            return []
+        translated, skipped = [], 0
+        with journal:
+            for sub_file in sorted(folder.glob("*.srt")):
+                if sub_file.name in outputs:
+                    continue  # Traducción de una ejecución anterior
+                record = done.get(sub_file.name)
+                if (record and record.get("backend") == engine and set(target_languages) <= set(record["langs"])
+                        and all((folder / name).exists() for name in record["outputs"])
+                        and record["source"] == file_fingerprint(sub_file)):
+                    skipped += 1
+                    continue
+                translated_paths = self.translate_subs(sub_file, target_languages, backend)
+                if translated_paths:
+                    translated.extend(translated_paths.values())
+                    journal.write(json.dumps({
+                        "file": sub_file.name, "source": file_fingerprint(sub_file), "backend": engine,
+                        "langs": sorted(translated_paths), "outputs": [path.name for path in translated_paths.values()],
+                    }, ensure_ascii=False) + "\n")
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                else:
+                    print(f"✘ No se pudo traducir subtítulos: {sub_file.name}")
+        if skipped:
+            print(Fore.GREEN + f"✔ {skipped} archivos ya estaban traducidos de una ejecución anterior")
+        return translated
 
-    def collect_spanish_subs(self, video_path):
+    def collect_subs(self, video_path, language="es"):
         """
-        Busca y devuelve la ruta del archivo de subtítulos en español correspondiente al video.
+        Busca y devuelve la ruta del archivo de subtítulos en un idioma correspondiente al video.
         """
-        from pathlib import Path
-
         # Asegurarse de que video_path sea un objeto Path
         video_path = Path(video_path) if isinstance(video_path, str) else video_path
 
         # Construir la ruta esperada para los subtítulos
-        stem = video_path.stem  # Esto ahora funciona porque video_path es un Path
-        subs_file = TEMP_DIR / f"{stem}.es.srt"
+        subs_file = small_files_dir(video_path) / f"{video_path.stem}.{language}.srt"
 
         if subs_file.exists():
             print(f"✔ Subtítulos encontrados: {subs_file}")
             return subs_file
         else:
-            print(f"⚠ No se encontraron subtítulos para: {video_path.name}")
+            print(f"⚠ No se encontraron subtítulos ({language}) para: {video_path.name}")
             return None
 
     def cleanup_temp_files(self):
         """Elimina los archivos en la carpeta temporal si el usuario lo confirma."""
         response = input(Fore.CYAN + "\n¿Deseas eliminar los archivos temporales? (s/n): ").strip().lower()
         if response in ('s', 'si', 'sí'):
-            if TEMP_DIR.exists():
+            if TEMP_DIR.exists() or SMALL_TEMP_DIR.exists():
                 print("🧹 Limpiando archivos temporales...")
-                shutil.rmtree(TEMP_DIR)
+                self.clean_up()
+                for folder in {TEMP_DIR, SMALL_TEMP_DIR}:
+                    with contextlib.suppress(OSError):
+                        folder.rmdir()  # Solo si quedó vacía: lo ajeno se queda donde estaba
                 print("✔ Archivos temporales eliminados.")
             else:
                 print("No hay archivos temporales para limpiar.")
@@ -579,15 +3588,14 @@ class YouTubeDownloader:
         """
         Verifica si un archivo está codificado en UTF-8.
 
+        Basta con el BOM y la validación incremental: si no es UTF-8, da igual
+        qué codificación diría chardet.
+
         :param file_path: Ruta del archivo.
         :return: True si está en UTF-8, False en caso contrario.
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                file.read()  # Intentar leer el archivo completo
-            return True
-        except UnicodeDecodeError:
-            return False
+        with open(file_path, "rb") as file:
+            return _sniff_encoding(file) == 'utf-8'
 
     def convert_srt_to_utf8(self, srt_path):
         """
@@ -597,86 +3605,682 @@ class YouTubeDownloader:
         :return: Ruta al archivo convertido o None si ocurre un error.
         """
         try:
-            # Detectar la codificación del archivo
-            with open(srt_path, "rb") as file:
-                raw_data = file.read()
-                detected = chardet.detect(raw_data)
-                encoding = detected["encoding"]
-                print(f"📂 Codificación detectada para {srt_path.name}: {encoding}")
-
-            # Si ya está en UTF-8, no es necesario convertir
-            if encoding.lower() == "utf-8":
+            utf8_path, encoding = convert_srt_file(srt_path)
+            print(f"📂 Codificación detectada para {srt_path.name}: {encoding}")
+            if utf8_path == srt_path:
                 print(f"✔ {srt_path.name} ya está en UTF-8. No se necesita conversión.")
-                return srt_path
+            else:
+                print(f"✔ Archivo convertido a UTF-8: {utf8_path.name}")
+            return utf8_path
+
+        except Exception as e:
+            print(f"✘ Error al convertir {srt_path.name} a UTF-8: {e}")
+            return None
 
-            # Leer el archivo con la codificación detectada
-            with open(srt_path, "r", encoding=encoding) as file:
-                content = file.read()
+    def convert_srt_folder(self, srt_files):
+        """
+        Recodifica a UTF-8 una lista de subtítulos en paralelo.
 
-            # Guardar el archivo en UTF-8
-            utf8_path = srt_path.with_suffix(".utf8.srt")
-            with open(utf8_path, "w", encoding="utf-8") as file:
-                file.write(content)
+        :return: Diccionario {original: ruta en UTF-8} (se omiten las que fallaron).
+        """
+        utf8_files = {}
+        for srt_path, utf8_path, encoding, error in convert_srt_batch(srt_files):
+            if error:
+                print(Fore.RED + f"✘ No se pudo convertir {srt_path.name} a UTF-8: {error}")
+            elif utf8_path == srt_path:
+                print(Fore.GREEN + f"✔ {srt_path.name} ya está en UTF-8.")
+                utf8_files[srt_path] = utf8_path
+            else:
+                print(f"✔ {srt_path.name} ({encoding}) convertido a UTF-8: {utf8_path.name}")
+                utf8_files[srt_path] = utf8_path
+        return utf8_files
 
-            print(f"✔ Archivo convertido a UTF-8: {utf8_path.name}")
-            return utf8_path
+class JobDaemon:
+    """
+    Servidor local que recibe trabajos (las cuatro acciones del menú) y los
+    ejecuta en un grupo de hilos compartido. Un único YouTubeDownloader mantiene
+    calientes la sesión HTTP del traductor, el detector de idiomas y las cachés.
+
+    API (JSON sobre HTTP en 127.0.0.1):
+        POST /jobs        {"type": "download", "url": ..., "range": "1-5"}
+                          {"type": "folder" | "translate" | "recode", "path": ...}
+                          "backend" opcional en todos: motor de traducción del trabajo
+        GET  /jobs        Lista de trabajos
+        GET  /jobs/<id>   Estado y resultado de un trabajo
+
+    Los trabajos terminados se olvidan a las `job_ttl` segundos o cuando hay más
+    de `keep_jobs`, los más antiguos primero.
+    """
+
+    JOB_TYPES = ('download', 'folder', 'translate', 'recode')
+
+    def __init__(self, downloader, port=DAEMON_PORT, workers=DAEMON_WORKERS,
+                 keep_jobs=DAEMON_KEEP_JOBS, job_ttl=DAEMON_JOB_TTL):
+        self.downloader = downloader
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.jobs = {}
+        self.keep_jobs = keep_jobs
+        self.job_ttl = job_ttl
+        self.lock = threading.Lock()
 
+    def submit(self, params):
+        """
+        Valida y encola un trabajo; devuelve su registro.
+
+        :raises ValueError: Si los parámetros no son un objeto JSON válido para el tipo de trabajo.
+        """
+        if not isinstance(params, dict):
+            raise ValueError("El trabajo debe ser un objeto JSON")
+        for key in ('url', 'range', 'path', 'backend'):
+            if params.get(key) is not None and not isinstance(params[key], str):
+                raise ValueError(f"'{key}' debe ser un texto")
+        job_type = params.get('type')
+        if job_type not in self.JOB_TYPES:
+            raise ValueError(f"Tipo de trabajo desconocido: {job_type!r}")
+        if job_type == 'download':
+            if not str(params.get('url', '')).startswith(('http://', 'https://')):
+                raise ValueError("URL inválida")
+            parse_playlist_range(params.get('range'))
+        elif not Path(params.get('path', '')).is_dir():
+            raise ValueError("La ruta proporcionada no es una carpeta válida")
+        if params.get('backend') and params['backend'] not in TRANSLATION_BACKENDS:
+            raise ValueError(f"Motor de traducción desconocido: {params['backend']!r}")
+
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'type': job_type,
+            'params': params,
+            'status': 'queued',
+            'result': None,
+            'error': None,
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+        }
+        with self.lock:
+            self._prune()
+            self.jobs[job['id']] = job
+        self.executor.submit(self._run, job)
+        return job
+
+    def _prune(self):
+        """Olvida los trabajos terminados caducados y los que sobran (con self.lock tomado)."""
+        finished = sorted((job for job in self.jobs.values() if job['finished']), key=lambda job: job['finished'])
+        expired = time.time() - self.job_ttl
+        for index, job in enumerate(finished):
+            if job['finished'] < expired or len(finished) - index > self.keep_jobs:
+                del self.jobs[job['id']]
+
+    def get(self, job_id):
+        with self.lock:
+            self._prune()
+            return dict(self.jobs[job_id]) if job_id in self.jobs else None
+
+    def list(self):
+        with self.lock:
+            self._prune()
+            return [dict(job) for job in self.jobs.values()]
+
+    def _run(self, job):
+        job['status'], job['started'] = 'running', time.time()
+        params = job['params']
+        try:
+            if job['type'] == 'download':
+                start, end = parse_playlist_range(params.get('range'))
+                result = self.downloader.download(params['url'], start, end, exclusive=False,
+                                                  backend=params.get('backend'))
+            elif job['type'] == 'folder':
+                result = self.downloader.process_existing_videos(params['path'], translate=params.get('translate', True),
+                                                                 backend=params.get('backend'))
+            elif job['type'] == 'translate':
+                result = self.downloader.translate_folder(params['path'], backend=params.get('backend'))
+            else:
+                result = list(self.downloader.convert_srt_folder(sorted(Path(params['path']).glob("*.srt"))).values())
+            job['result'] = [str(path) for path in result]
+            job['status'] = 'done'
         except Exception as e:
-            print(f"✘ Error al convertir {srt_path.name} a UTF-8: {e}")
+            job['error'] = str(e)
+            job['status'] = 'error'
+        finally:
+            job['finished'] = time.time()
+
+    def serve_forever(self):
+        self.downloader.check_dependencies()
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Sin registro por petición en la consola
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                if parts == ['jobs']:
+                    self._reply(200, daemon.list())
+                elif len(parts) == 2 and parts[0] == 'jobs':
+                    job = daemon.get(parts[1])
+                    self._reply(200 if job else 404, job or {'error': 'Trabajo no encontrado'})
+                else:
+                    self._reply(404, {'error': 'Ruta no encontrada'})
+
+            def do_POST(self):
+                if self.path.rstrip('/') != '/jobs':
+                    self._reply(404, {'error': 'Ruta no encontrada'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    job = daemon.submit(json.loads(self.rfile.read(length) or b'{}'))
+                    self._reply(202, job)
+                except ValueError as e:
+                    self._reply(400, {'error': str(e)})
+
+        server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        print(Fore.GREEN + f"🛰  Daemon escuchando en http://127.0.0.1:{self.port}/jobs")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.executor.shutdown(wait=True)
+
+
+class InotifyWatch:
+    """
+    Eventos de inotify (Linux) de una carpeta mediante ctypes, sin dependencias.
+    events() devuelve los nombres que cambiaron o None si la cola del núcleo
+    se desbordó y hay que repasar la carpeta entera.
+    """
+
+    IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE = 0x2, 0x8, 0x80, 0x100
+    IN_Q_OVERFLOW = 0x4000
+    EVENT = struct.Struct('iIII')  # wd, mask, cookie, len; después, el nombre
+
+    def __init__(self, folder):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(folder)), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error))
+
+    def events(self, timeout):
+        names = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return names
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatch:
+    """Alternativa a inotify: compara tamaño y fecha de cada archivo entre pasadas de os.scandir."""
+
+    def __init__(self, folder, interval=WATCH_POLL_INTERVAL):
+        self.folder = folder
+        self.interval = interval
+        self.seen = self._listing()
+
+    def _listing(self):
+        listing = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    listing[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return listing
+
+    def events(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        listing = self._listing()
+        names = {name for name, signature in listing.items() if self.seen.get(name) != signature}
+        self.seen = listing
+        return names
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """
+    Modo vigilancia (--watch): cada par video/subtítulo que llega o cambia en la
+    carpeta se recodifica, se detecta su idioma, se traduce y se incrusta sin
+    preguntar, en un grupo acotado de hilos. El trabajo crece con lo que llega,
+    no con el tamaño de la carpeta.
+
+    - Los cambios llegan por inotify; sin él (otro sistema o límite de vigilancias
+      agotado) se sondea la carpeta.
+    - Un archivo cuenta cuando lleva debounce segundos sin cambiar de tamaño ni fecha.
+    - WATCH_STATE guarda por video el subtítulo usado y las huellas (tamaño, fecha
+      y contenido) de ambos tras procesarlos. Lo que no cambió no se repite; un
+      archivo con otra fecha pero el mismo contenido solo actualiza el índice.
+    - Lo que genera el propio proceso (.utf8.srt, traducciones, translated_*) se
+      anota en el índice y no se toma nunca como una llegada.
+    """
+
+    def __init__(self, downloader, folder, workers=WATCH_WORKERS, debounce=WATCH_DEBOUNCE,
+                 poll_interval=WATCH_POLL_INTERVAL, backend=None, polling=False):
+        self.downloader = downloader
+        self.folder = Path(folder).resolve()
+        self.workers = max(1, workers)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = backend
+        self.polling = polling
+        self.state_path = self.folder / WATCH_STATE
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(self.workers * 2)  # Trabajos en cola como mucho; luego se espera
+        self.stopped = threading.Event()
+        self.executor = None
+        self.pending = {}  # Nombre → (instante del último cambio, (tamaño, fecha))
+        self.active = {}  # Nombre base en proceso → True si volvió a cambiar mientras tanto
+        self.requeued = set()  # Videos que se repasan al terminar su trabajo anterior
+        try:
+            with open(self.state_path, encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            state = {}
+        self.entries = state.get("videos", {})
+        self.generated = set(state.get("generated", []))
+
+    def save(self):
+        with self.lock:
+            state = {"videos": self.entries, "generated": sorted(self.generated)}
+            tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    json.dump(state, file, ensure_ascii=False)
+                os.replace(tmp_path, self.state_path)
+            except OSError as e:
+                print(Fore.YELLOW + f"⚠ No se pudo guardar el índice de {self.folder.name}: {e}")
+
+    def stop(self):
+        self.stopped.set()
+
+    def _watched(self, name):
+        if name.startswith('.') or name.endswith(WATCH_PARTIAL):
+            return False  # Índices, diarios y partes propias o archivos a medio copiar
+        ext = os.path.splitext(name)[1].lower()
+        return (ext in VIDEO_EXTENSIONS or ext == '.srt') and name not in self.generated
+
+    def _stat(self, name):
+        try:
+            stat = (self.folder / name).stat()
+        except OSError:
             return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _listing(self):
+        with os.scandir(self.folder) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+
+    def _mark(self, names):
+        now = time.monotonic()
+        with self.lock:
+            names = [name for name in names if self._watched(name)]
+        for name in names:
+            self.pending[name] = (now, self._stat(name))
+
+    def _settled(self):
+        """Archivos que ya no cambian; los que siguen creciendo vuelven a esperar."""
+        now = time.monotonic()
+        ready = []
+        for name, (since, signature) in list(self.pending.items()):
+            if now - since < self.debounce:
+                continue
+            current = self._stat(name)
+            if current is None:
+                del self.pending[name]  # Borrado o renombrado antes de terminar
+            elif current != signature:
+                self.pending[name] = (now, current)
+            else:
+                del self.pending[name]
+                ready.append(name)
+        with self.lock:
+            ready += self.requeued
+            self.requeued = set()
+        return ready
+
+    def _timeout(self):
+        if not self.pending:
+            return self.poll_interval
+        oldest = min(since for since, _ in self.pending.values())
+        return max(0.1, oldest + self.debounce - time.monotonic())
+
+    def run(self):
+        """Vigila la carpeta hasta stop() o Ctrl+C."""
+        source = None
+        if not self.polling:
+            try:
+                source = InotifyWatch(self.folder)
+            except (OSError, AttributeError) as e:
+                print(Fore.YELLOW + f"⚠ inotify no disponible ({e}); se revisa la carpeta cada {self.poll_interval} s")
+        if source is None:
+            source = PollingWatch(self.folder, self.poll_interval)
+        mode = 'inotify' if isinstance(source, InotifyWatch) else 'sondeo'
+        print(Fore.CYAN + f"👁 Vigilando {self.folder} ({mode}, {self.workers} a la vez). Ctrl+C para salir.")
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="watch")
+        try:
+            self._mark(self._listing())  # Lo que ya estaba: el índice descarta enseguida lo procesado
+            while not self.stopped.is_set():
+                names = source.events(self._timeout())
+                self._mark(self._listing() if names is None else names)
+                ready = self._settled()
+                if ready:
+                    self.dispatch(ready)
+        finally:
+            source.close()
+            print(Fore.CYAN + "⏳ Esperando a los videos en curso...")
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.save()
+            METRICS.flush()
+
+    def dispatch(self, names):
+        """Encola los videos afectados por los archivos que terminaron de llegar."""
+        index = SubtitleIndex(self.folder)  # Solo nombres: una pasada de scandir sin leer archivos
+        owners = {sub.name: base for base, candidates in index.candidates.items() for _, sub in candidates}
+        stems = set()
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in VIDEO_EXTENSIONS:
+                stems.add(stem)
+            elif name in owners:
+                stems.add(owners[name])
+        with self.lock:
+            for stem, candidates in index.candidates.items():
+                index.candidates[stem] = [c for c in candidates if c[1].name not in self.generated]
+        for stem in sorted(stems):
+            video = index.videos.get(stem)
+            if video is None or video.name in self.generated:
+                continue
+            subtitle = index.best_subtitle(video, self.downloader.target_languages[0])
+            if subtitle is None:
+                continue  # Se procesa cuando llegue su subtítulo
+            self.submit(stem, video, subtitle)
+
+    def submit(self, stem, video, subtitle):
+        with self.lock:
+            if stem in self.active:
+                self.active[stem] = True  # Se repasa al terminar con lo que haya entonces
+                return
+            record = self.entries.get(video.name)
+        if self.unchanged(video, subtitle, record):
+            return
+        with self.lock:
+            self.active[stem] = False
+        self.slots.acquire()
+        future = self.executor.submit(self._process, stem, video, subtitle)
+        future.add_done_callback(lambda _: self.slots.release())
+
+    @staticmethod
+    def _signature(path, fingerprint):
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns, fingerprint(path)]
+
+    def unchanged(self, video, subtitle, record):
+        """True si el par ya se procesó así; solo se leen archivos si cambió su fecha."""
+        if (not record or record["subtitle"] != subtitle.name
+                or record["langs"] != list(self.downloader.target_languages)
+                or not all((self.folder / name).exists() for name in record["outputs"])):
+            return False
+        touched = False
+        for key, path, fingerprint in (("video", video, sample_fingerprint), ("source", subtitle, file_fingerprint)):
+            try:
+                stat = path.stat()
+                size, mtime, digest = record[key]
+                if (stat.st_size, stat.st_mtime_ns) == (size, mtime):
+                    continue
+                if stat.st_size != size or fingerprint(path) != digest:
+                    return False
+            except OSError:
+                return False
+            record[key] = [size, stat.st_mtime_ns, digest]  # Tocado pero igual
+            touched = True
+        if touched:
+            self.save()
+        return True
+
+    def _process(self, stem, video, subtitle):
+        try:
+            with METRICS.timer('watch', video=video.name) as fields:
+                fields['ok'] = self.process_pair(video, subtitle)
+        except Exception as e:
+            print(Fore.RED + f"✘ Error inesperado con {video.name}: {e}")
+        finally:
+            with self.lock:
+                if self.active.pop(stem):
+                    self.requeued.add(video.name)
+
+    def process_pair(self, video, subtitle):
+        """Recodifica, detecta, traduce e incrusta un par y lo anota en el índice."""
+        utf8_path = self.downloader.convert_srt_folder([subtitle]).get(subtitle)
+        if not utf8_path:
+            return False
+        if utf8_path != subtitle:
+            with self.lock:
+                self.generated.add(utf8_path.name)  # Antes de que su llegada se tome como un subtítulo nuevo
+        output_path, tracks = self.downloader.process_video(video, utf8_path, translate=True, backend=self.backend)
+        if not output_path:
+            return False
+        outputs = {path.name for path, _ in tracks} | {utf8_path.name, output_path.name}
+        outputs -= {subtitle.name, video.name}
+        record = {
+            "subtitle": subtitle.name,
+            "langs": list(self.downloader.target_languages),
+            "video": self._signature(video, sample_fingerprint),  # Después de editar sus cabeceras
+            "source": self._signature(subtitle, file_fingerprint),
+            "outputs": sorted(outputs),
+        }
+        with self.lock:
+            self.entries[video.name] = record
+            self.generated |= outputs
+        self.save()
+        print(Fore.GREEN + f"✔ {video.name} listo ({output_path.name})")
+        return True
+
+
+def daemon_request(method, path, payload=None, port=DAEMON_PORT):
+    """Cliente mínimo del daemon (solo biblioteca estándar, arranque inmediato)."""
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = Request(f"http://127.0.0.1:{port}{path}", data=data, method=method,
+                      headers={"Content-Type": "application/json"})
+    try:
+        with urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+    except HTTPError as e:
+        return json.loads(e.read() or b'{}')
+
+
+def run_client(args):
+    """Envía un trabajo al daemon o consulta su estado."""
+    if args.submit:
+        job_type, target = args.submit
+        payload = {'type': job_type}
+        payload.update({'url': target, 'range': args.range} if job_type == 'download' else {'path': str(Path(target).resolve())})
+        if args.backend:
+            payload['backend'] = args.backend
+        job = daemon_request("POST", "/jobs", payload, port=args.port)
+    else:
+        job = daemon_request("GET", f"/jobs/{args.status}" if args.status else "/jobs", port=args.port)
+
+    while args.wait and isinstance(job, dict) and job.get('status') in ('queued', 'running'):
+        time.sleep(1)
+        job = daemon_request("GET", f"/jobs/{job['id']}", port=args.port)
+    print(json.dumps(job, indent=2, ensure_ascii=False))
+    if isinstance(job, list):
+        return 0
+    return 0 if job.get('id') and job.get('status') != 'error' else 1
+
+
+def run_menu(downloader):
+    """Menú interactivo con las acciones del programa."""
+    while True:
+        # Menú interactivo
+        print(Fore.CYAN + "\n🡆 Selecciona una opción:")
+        print(Fore.YELLOW + "1. Descargar videos y subtítulos desde YouTube.")
+        print(Fore.YELLOW + "2. Procesar videos y subtítulos existentes en una carpeta.")
+        print(Fore.YELLOW + "3. Traducir subtítulos existentes en una carpeta.")
+        print(Fore.YELLOW + "4. Recodificar subtítulos existentes en una carpeta a UTF-8.")
+        print(Fore.YELLOW + "5. Salir.")
+
+        choice = input(Fore.WHITE + ">>> ").strip()
+
+        if choice == "1":
+            print(Fore.CYAN + "\n🡆 Iniciando descarga de videos...")
+            downloader.run()
+        elif choice == "2":
+            print(Fore.CYAN + "\n🡆 Proporciona la carpeta con videos y subtítulos:")
+            folder_path = input(Fore.WHITE + ">>> ").strip()
+            downloader.process_existing_videos(folder_path)
+        elif choice == "3":
+            subs_folder = Path(input("📂 Ingresa la ruta de la carpeta con subtítulos: "))
+            downloader.translate_folder(subs_folder)
+            break
+        elif choice == "4":
+            folder_path = input("📂 Ingresa la ruta de la carpeta con subtítulos: ")
+            folder = Path(folder_path)
+            if not folder.is_dir():
+                print(Fore.RED + "✘ La ruta proporcionada no es una carpeta válida.")
+            else:
+                print(Fore.CYAN + f"📁 Procesando carpeta: {folder.resolve()}")
+                srt_files = list(folder.glob("*.srt"))
+                if not srt_files:
+                    print(Fore.RED + "✘ No se encontraron archivos .srt en la carpeta.")
+                else:
+                    downloader.convert_srt_folder(srt_files)
+        elif choice == "5":
+            print(Fore.GREEN + "\n✔ Gracias por usar el programa. ¡Hasta pronto!")
+            break
+        else:
+            print(Fore.RED + "✘ Opción inválida. Por favor selecciona 1, 2, 3 o 4.")
+
+    # Preguntar si eliminar archivos temporales
+    downloader.cleanup_temp_files()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Descarga videos de YouTube con subtítulos en español.")
+    parser.add_argument("--batch", metavar="ARCHIVO",
+                        help="Archivo de trabajos con una URL por línea (rango y prioridad opcionales)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                        help="Procesos yt-dlp simultáneos en modo lote")
+    parser.add_argument("--per-host", type=int, default=BATCH_PER_HOST,
+                        help="Procesos simultáneos contra un mismo servidor en modo lote")
+    parser.add_argument("--subs-workers", type=int, default=SUBS_WORKERS,
+                        help="Videos buscando y traduciendo subtítulos a la vez")
+    parser.add_argument("--mux-workers", type=int, default=MUX_WORKERS,
+                        help="Videos mezclándose con sus subtítulos a la vez (limitado por el disco)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Quedarse en segundo plano atendiendo trabajos en 127.0.0.1:--port")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help="Puerto del daemon")
+    parser.add_argument("--submit", nargs=2, metavar=("TIPO", "DESTINO"),
+                        help="Enviar un trabajo al daemon: download URL | folder/translate/recode CARPETA")
+    parser.add_argument("--range", help="Rango de la lista para --submit download o --dry-run (ejemplo: 1-5)")
+    parser.add_argument("--dry-run", metavar="URL",
+                        help="Mostrar el plan de una lista (orden, tamaño y tiempo estimados) sin descargar")
+    parser.add_argument("--status", nargs="?", const="", metavar="ID",
+                        help="Consultar el estado de un trabajo (o de todos) en el daemon")
+    parser.add_argument("--wait", action="store_true", help="Con --submit/--status, esperar a que termine")
+    parser.add_argument("--backend", choices=sorted(TRANSLATION_BACKENDS),
+                        help="Motor de traducción: google (predeterminado), local (modelo en CPU, sin red) o fake (pruebas)")
+    parser.add_argument("--profile", choices=sorted(FORMAT_PROFILES), default="default",
+                        help="Perfil de descarga (formato, contenedor y modo de subtítulos)")
+    parser.add_argument("--max-height", type=int, help="Resolución máxima (ejemplo: 1080)")
+    parser.add_argument("--fragments", type=int, help="Fragmentos descargados a la vez por video")
+    parser.add_argument("--external-downloader", help="Descargador externo para yt-dlp (ejemplo: aria2c)")
+    parser.add_argument("--rate-limit", help="Velocidad máxima de descarga (ejemplo: 5M)")
+    parser.add_argument("--audio-only", action="store_true", default=None, help="Descargar solo el audio")
+    parser.add_argument("--subs", choices=FormatPolicy.SUBTITLE_MODES,
+                        help="mux: traducir e incrustar después; embed: que yt-dlp incruste los originales; none")
+    parser.add_argument("--temp-dir",
+                        help=f"Carpeta temporal de los videos (volumen grande); se usa su subcarpeta {TEMP_SUBDIR}/")
+    parser.add_argument("--small-temp-dir",
+                        help=f"Carpeta temporal de subtítulos e info JSON (por ejemplo, un tmpfs); también en {TEMP_SUBDIR}/")
+    parser.add_argument("--min-free", default=format_size(MIN_FREE_SPACE).replace(" ", ""),
+                        help="Espacio libre mínimo en la carpeta temporal; por debajo se pausan las descargas")
+    parser.add_argument("--watch", metavar="CARPETA",
+                        help="Vigilar una carpeta y procesar sin preguntar cada video con subtítulo que llegue o cambie")
+    parser.add_argument("--watch-workers", type=int, default=WATCH_WORKERS,
+                        help="Videos de la carpeta vigilada que se procesan a la vez")
+    parser.add_argument("--poll", action="store_true", help="Con --watch, revisar la carpeta periódicamente en vez de usar inotify")
+    parser.add_argument("--langs", default=",".join(TARGET_LANGUAGES),
+                        help="Idiomas de destino de los subtítulos, separados por comas (ejemplo: es,en,fr)")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.submit or args.status is not None:
+        # Cliente ligero: no carga el traductor ni las cachés
+        sys.exit(run_client(args))
+    # Siempre en una subcarpeta propia: con --small-temp-dir /dev/shm no se toca nada más de /dev/shm
+    if args.temp_dir:
+        TEMP_DIR = Path(args.temp_dir).resolve() / TEMP_SUBDIR
+    SMALL_TEMP_DIR = Path(args.small_temp_dir).resolve() / TEMP_SUBDIR if args.small_temp_dir else TEMP_DIR
+    MIN_FREE_SPACE = parse_size(args.min_free)
+    RESUME_FREE_SPACE = max(RESUME_FREE_SPACE, MIN_FREE_SPACE + MIN_FREE_SPACE // 2)
     try:
         downloader = YouTubeDownloader()
-        while True:
-            # Menú interactivo
-            print(Fore.CYAN + "\n🡆 Selecciona una opción:")
-            print(Fore.YELLOW + "1. Descargar videos y subtítulos desde YouTube.")
-            print(Fore.YELLOW + "2. Procesar videos y subtítulos existentes en una carpeta.")
-            print(Fore.YELLOW + "3. Traducir subtítulos existentes en una carpeta.")
-            print(Fore.YELLOW + "4. Recodificar subtítulos existentes en una carpeta a UTF-8.")
-            print(Fore.YELLOW + "5. Salir.")
-
-            choice = input(Fore.WHITE + ">>> ").strip()
-
-            if choice == "1":
-                print(Fore.CYAN + "\n🡆 Iniciando descarga de videos...")
-                downloader.run()
-            elif choice == "2":
-                print(Fore.CYAN + "\n🡆 Proporciona la carpeta con videos y subtítulos:")
-                folder_path = input(Fore.WHITE + ">>> ").strip()
-                downloader.process_existing_videos(folder_path)
-            elif choice == "3":
-                subs_folder = Path(input("📂 Ingresa la ruta de la carpeta con subtítulos: "))
-                for sub_file in subs_folder.glob("*.srt"):
-                    translated_path = downloader.translate_subs(sub_file)
-                    if translated_path:
-                        print(f"✔ Subtítulos traducidos: {translated_path}")
-                    else:
-                        print(f"✘ No se pudo traducir subtítulos: {sub_file.name}")
-                break
-            elif choice == "4":
-                folder_path = input("📂 Ingresa la ruta de la carpeta con subtítulos: ")
-                folder = Path(folder_path)
-                if not folder.is_dir():
-                    print(Fore.RED + "✘ La ruta proporcionada no es una carpeta válida.")
-                else:
-                    print(Fore.CYAN + f"📁 Procesando carpeta: {folder.resolve()}")
-                    srt_files = list(folder.glob("*.srt"))
-                    if not srt_files:
-                        print(Fore.RED + "✘ No se encontraron archivos .srt en la carpeta.")
-                    else:
-                        for srt_file in srt_files:
-                            downloader.convert_srt_to_utf8(srt_file)
-            elif choice == "5":
-                print(Fore.GREEN + "\n✔ Gracias por usar el programa. ¡Hasta pronto!")
-                break
+        downloader.target_languages = [lang.strip() for lang in args.langs.split(",") if lang.strip()]
+        downloader.subs_workers, downloader.mux_workers = args.subs_workers, args.mux_workers
+        if args.backend:
+            downloader.translator = downloader.get_backend(args.backend)
+        downloader.format_policy = FORMAT_PROFILES[args.profile].with_changes(
+            max_height=args.max_height, fragments=args.fragments, downloader=args.external_downloader,
+            rate_limit=args.rate_limit, audio_only=args.audio_only, subtitles=args.subs,
+        )
+        if args.dry_run:
+            plan = downloader.plan_playlist(args.dry_run, *downloader.handle_playlist_range(args.range))
+            if plan:
+                plan.print_summary(detail=True)
             else:
-                print(Fore.RED + "✘ Opción inválida. Por favor selecciona 1, 2, 3 o 4.")
-        
-        # Preguntar si eliminar archivos temporales
-        downloader.cleanup_temp_files()
+                print(Fore.YELLOW + "⚠ Esta URL no se puede planificar; se descargaría sin plan")
+        elif args.watch:
+            if not Path(args.watch).is_dir():
+                print(Fore.RED + "✘ La ruta proporcionada no es una carpeta válida.")
+                sys.exit(2)
+            FolderWatcher(downloader, args.watch, workers=args.watch_workers, backend=args.backend,
+                          polling=args.poll).run()
+        elif args.daemon:
+            JobDaemon(downloader, port=args.port).serve_forever()
+        elif args.batch:
+            downloader.run_batch(args.batch, workers=args.workers, per_host=args.per_host)
+        else:
+            run_menu(downloader)
+
+        stats = downloader.memory.stats()
+        print(Fore.CYAN + f"💾 Memoria de traducción: {stats['hits']} aciertos, {stats['misses']} fallos")
+        downloader.memory.close()
+        METRICS.flush()
+        print(Fore.CYAN + f"📈 Métricas: {METRICS_LOG} y {METRICS_PROM}")
 
     except KeyboardInterrupt:
         print(Fore.RED + "\n✘ Operación cancelada por el usuario")
-        sys.exit(130)
\ No newline at end of file
+        sys.exit(130)